@@ -4,11 +4,14 @@ Sistema de autenticación JWT simple para UGC
 
 import jwt
 import os
-from datetime import datetime, timedelta
-from typing import Optional
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
 from fastapi import HTTPException, status, Depends, Header
 from sqlalchemy.orm import Session
-from models_ugc_enhanced import User, RoleEnum
+from models_ugc_enhanced import User, RoleEnum, TokenRevocation
 from database import get_db
 import logging
 
@@ -19,22 +22,181 @@ SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'tu_clave_secreta_muy_segura_cambiar_en
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24  # Token válido por 24 horas
 
+# Usuarios leídos de la base de datos se reutilizan durante este tiempo
+PRINCIPAL_CACHE_SECONDS = float(os.getenv('AUTH_PRINCIPAL_CACHE_SECONDS', '60'))
+# Cada cuánto se vuelve a leer la tabla de revocaciones (cambios hechos por otros procesos)
+REVOCATION_REFRESH_SECONDS = float(os.getenv('AUTH_REVOCATION_REFRESH_SECONDS', '30'))
+
+
+@dataclass
+class UserPrincipal:
+    """Datos del usuario autenticado necesarios para autorizar (sin sesión de base de datos)"""
+    id: int
+    email: str
+    role: RoleEnum
+    activo: bool
+    suspendido: bool
+    created_at: Optional[datetime]
+    motivo_suspension: Optional[str] = None
+
+    def is_admin(self) -> bool:
+        return self.role == RoleEnum.ADMIN
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=user.role,
+            activo=bool(user.activo),
+            suspendido=bool(user.suspendido),
+            created_at=user.created_at,
+            motivo_suspension=user.motivo_suspension
+        )
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> Optional["UserPrincipal"]:
+        """Principal a partir de los claims del token; None si el token no los trae (tokens antiguos)"""
+        if "activo" not in payload or "suspendido" not in payload:
+            return None
+        try:
+            created_at = payload.get("created_at")
+            return cls(
+                id=int(payload["sub"]),
+                email=payload.get("email"),
+                role=RoleEnum(payload.get("role")),
+                activo=bool(payload["activo"]),
+                suspendido=bool(payload["suspendido"]),
+                created_at=datetime.fromisoformat(created_at) if created_at else None
+            )
+        except (KeyError, ValueError):
+            return None
+
+
+class PrincipalCache:
+    """Usuarios autenticados por id con TTL corto"""
+
+    def __init__(self, ttl_seconds: float = PRINCIPAL_CACHE_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[int, Tuple[float, UserPrincipal]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[UserPrincipal]:
+        entry = self._entries.get(user_id)
+        if not entry or entry[0] < time.time():
+            return None
+        return entry[1]
+
+    def set(self, principal: UserPrincipal):
+        with self._lock:
+            self._entries[principal.id] = (time.time() + self.ttl_seconds, principal)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+class RevocationList:
+    """
+    Momento de revocación por usuario, en memoria. Un token con iat anterior queda inválido.
+    La tabla token_revocations se relee cada REVOCATION_REFRESH_SECONDS para ver las
+    revocaciones hechas por otros procesos; entre relecturas la verificación es un dict lookup.
+    """
+
+    def __init__(self, refresh_seconds: float = REVOCATION_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._revoked: Dict[int, float] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _timestamp(value: datetime) -> float:
+        return value.replace(tzinfo=timezone.utc).timestamp()
+
+    def _refresh(self, db: Session):
+        # Solo importan revocaciones más nuevas que el token más antiguo todavía vigente
+        since = datetime.utcnow() - timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
+        try:
+            rows = db.query(TokenRevocation.user_id, TokenRevocation.revoked_at).filter(
+                TokenRevocation.revoked_at >= since
+            ).all()
+        except Exception as e:
+            logger.error(f"Error leyendo revocaciones de tokens: {e}")
+            db.rollback()
+            rows = None
+        with self._lock:
+            if rows is not None:
+                self._revoked = {user_id: self._timestamp(revoked_at) for user_id, revoked_at in rows}
+            self._loaded_at = time.time()
+
+    def is_revoked(self, db: Session, user_id: int, issued_at: Optional[float]) -> bool:
+        if time.time() - self._loaded_at > self.refresh_seconds:
+            self._refresh(db)
+        revoked_at = self._revoked.get(user_id)
+        if revoked_at is None:
+            return False
+        return issued_at is None or issued_at <= revoked_at
+
+    def revoke(self, db: Session, user_id: int):
+        """Registra la revocación (hace commit) y la aplica de inmediato en este proceso"""
+        now = datetime.utcnow()
+        db.merge(TokenRevocation(user_id=user_id, revoked_at=now))
+        db.commit()
+        with self._lock:
+            self._revoked[user_id] = self._timestamp(now)
+
+
+_principal_cache = PrincipalCache()
+_revocations = RevocationList()
+
+
+def invalidate_principal(user_id: int):
+    """Descarta el usuario en caché (p. ej. tras editar sus datos)"""
+    _principal_cache.invalidate(user_id)
+
+
+def revoke_user_sessions(db: Session, user_id: int):
+    """
+    Invalida los tokens ya emitidos para un usuario: llamar al suspenderlo, reactivarlo,
+    desactivarlo o cambiarle el rol, para que sus claims no queden desactualizados.
+    """
+    _revocations.revoke(db, user_id)
+    _principal_cache.invalidate(user_id)
+    logger.info(f"🔒 Sesiones revocadas para usuario {user_id}")
+
 class AuthUGC:
     """Sistema de autenticación para UGC"""
     
     @staticmethod
-    def create_access_token(user_id: int, email: str, role: str) -> str:
-        """Crear token JWT"""
+    def create_access_token(user_id: int, email: str, role: str, activo: bool = True,
+                            suspendido: bool = False, created_at: Optional[datetime] = None) -> str:
+        """Crear token JWT (los claims de autorización evitan leer el usuario en cada request)"""
         expire = datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
         to_encode = {
             "sub": str(user_id),
             "email": email,
             "role": role,
+            "activo": activo,
+            "suspendido": suspendido,
+            "created_at": created_at.isoformat() if created_at else None,
+            "iat": time.time(),
             "exp": expire
         }
         encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
         return encoded_jwt
     
+    @staticmethod
+    def create_user_token(user: User) -> str:
+        """Crear token JWT con los claims del usuario"""
+        return AuthUGC.create_access_token(
+            user.id,
+            user.email,
+            user.role.value,
+            activo=bool(user.activo),
+            suspendido=bool(user.suspendido),
+            created_at=user.created_at
+        )
+    
     @staticmethod
     def verify_token(token: str) -> dict:
         """Verificar y decodificar token JWT"""
@@ -55,7 +217,7 @@ class AuthUGC:
             )
     
     @staticmethod
-    def get_current_user(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)) -> User:
+    def get_current_user(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)) -> UserPrincipal:
         """Obtener usuario actual desde token"""
         if not authorization:
             raise HTTPException(
@@ -88,18 +250,36 @@ class AuthUGC:
                 detail="Token inválido"
             )
         
-        # Obtener usuario
-        user = db.query(User).filter(User.id == int(user_id), User.activo == True).first()
-        if not user:
+        user_id = int(user_id)
+        if _revocations.is_revoked(db, user_id, payload.get("iat")):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Sesión revocada, vuelve a iniciar sesión",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        
+        # Camino rápido: los claims firmados alcanzan (usuarios suspendidos necesitan el motivo)
+        principal = UserPrincipal.from_claims(payload)
+        if principal and principal.activo and not principal.suspendido:
+            return principal
+        
+        principal = _principal_cache.get(user_id)
+        if principal is None:
+            user = db.query(User).filter(User.id == user_id).first()
+            if user:
+                principal = UserPrincipal.from_user(user)
+                _principal_cache.set(principal)
+        
+        if not principal or not principal.activo:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Usuario no encontrado o inactivo"
             )
         
-        return user
+        return principal
     
     @staticmethod
-    def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    def require_admin(current_user: UserPrincipal = Depends(get_current_user)) -> UserPrincipal:
         """Middleware para requerir rol de admin"""
         if not current_user.is_admin():
             raise HTTPException(
@@ -122,15 +302,25 @@ class AuthUGC:
         return user
 
 # Funciones de conveniencia
-def get_current_user(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)) -> User:
+def get_current_user(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)) -> UserPrincipal:
     """Obtener usuario actual"""
     return AuthUGC.get_current_user(authorization, db)
 
-def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
+def get_optional_user(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)) -> Optional[UserPrincipal]:
+    """Usuario actual si la petición trae un token válido; None para visitantes anónimos"""
+    if not authorization:
+        return None
+    try:
+        return AuthUGC.get_current_user(authorization, db)
+    except HTTPException:
+        # Token vencido o inválido: se atiende como anónimo en vez de rechazar la petición
+        return None
+
+def get_current_admin_user(current_user: UserPrincipal = Depends(get_current_user)) -> UserPrincipal:
     """Obtener usuario actual y verificar que sea admin"""
     return AuthUGC.require_admin(current_user)
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+def require_admin(current_user: UserPrincipal = Depends(get_current_user)) -> UserPrincipal:
     """Requerir rol de admin"""
     return AuthUGC.require_admin(current_user)
 
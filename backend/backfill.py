@@ -0,0 +1,314 @@
+"""
+Marco común para backfills largos sobre tablas con id entero.
+La tabla se recorre por rangos de id [desde, hasta) y cada rango se procesa y escribe en su
+propia transacción junto con el checkpoint, así un backfill interrumpido continúa donde quedó.
+El enriquecimiento (la parte que consume CPU) corre en un pool de procesos configurable y las
+escrituras son UPDATE masivos por clave primaria. Entre rangos se cede la base de datos al
+tráfico en vivo (pausa fija y espera mientras haya demasiadas consultas activas) y se informa
+avance y tiempo estimado.
+
+Cada backfill es un plugin (subclase de BackfillJob) que declara el modelo, las columnas que
+lee, el filtro y la función enrich(row) -> dict de cambios (con "id") o None.
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = int(os.getenv('BACKFILL_CHUNK_SIZE', '1000'))
+DEFAULT_WORKERS = int(os.getenv('BACKFILL_WORKERS', '1'))
+# Pausa entre rangos para no competir con el tráfico en vivo
+DEFAULT_THROTTLE_SECONDS = float(os.getenv('BACKFILL_THROTTLE_SECONDS', '0.2'))
+# Si hay más consultas activas que esto (sin contar la nuestra) se espera antes del siguiente rango
+MAX_ACTIVE_QUERIES = int(os.getenv('BACKFILL_MAX_ACTIVE_QUERIES', '20'))
+MAX_BACKOFF_SECONDS = 30.0
+
+CHECKPOINT_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+        job_name VARCHAR(100) PRIMARY KEY,
+        last_id BIGINT NOT NULL DEFAULT 0,
+        processed INTEGER NOT NULL DEFAULT 0,
+        updated INTEGER NOT NULL DEFAULT 0,
+        started_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        finished_at TIMESTAMP NULL
+    );
+"""
+
+SAVE_CHECKPOINT_SQL = text("""
+    INSERT INTO backfill_checkpoints (job_name, last_id, processed, updated, started_at, updated_at)
+    VALUES (:job_name, :last_id, :processed, :updated, NOW(), NOW())
+    ON CONFLICT (job_name) DO UPDATE SET
+        last_id = EXCLUDED.last_id,
+        processed = backfill_checkpoints.processed + EXCLUDED.processed,
+        updated = backfill_checkpoints.updated + EXCLUDED.updated,
+        updated_at = NOW()
+""")
+
+ACTIVE_QUERIES_SQL = text("""
+    SELECT COUNT(*) FROM pg_stat_activity
+    WHERE state = 'active' AND pid <> pg_backend_pid()
+""")
+
+
+class BackfillJob:
+    """
+    Plugin de backfill. Las subclases definen name, model, columns y enrich; opcionalmente
+    filters (condiciones extra), prepare (carga datos auxiliares antes de empezar) y write.
+    La instancia se copia a cada proceso del pool, por eso solo debe guardar datos simples.
+    """
+    name: str = ""
+    model = None
+    columns: Sequence[str] = ("id",)
+    # Jobs sobre una ventana móvil (p. ej. últimos 30 días): al volver a ejecutarse continúan desde
+    # el último id procesado aunque ya hayan terminado, para cubrir las filas nuevas
+    rolling: bool = False
+
+    def prepare(self, db: Session):
+        """Se ejecuta una vez en el proceso principal antes del primer rango"""
+
+    def filters(self) -> List:
+        """Condiciones SQLAlchemy adicionales sobre model"""
+        return []
+
+    def enrich(self, row: Dict) -> Optional[Dict]:
+        """Calcula los cambios de una fila; corre en el pool de procesos"""
+        raise NotImplementedError
+
+    def write(self, db: Session, updates: List[Dict]):
+        """Escribe los cambios de un rango (sin commit)"""
+        db.bulk_update_mappings(self.model, updates)
+
+
+@dataclass
+class BackfillProgress:
+    job_name: str
+    first_id: int
+    last_id: int
+    resumed_from: int
+    processed: int = 0
+    updated: int = 0
+    started: float = 0.0
+
+    def log(self, current_id: int):
+        done = max(current_id - self.resumed_from, 0)
+        remaining = max(self.last_id - current_id, 0)
+        elapsed = time.time() - self.started
+        span = max(self.last_id - self.first_id, 1)
+        percent = min(100.0, 100.0 * (current_id - self.first_id) / span)
+        eta = elapsed * remaining / done if done else 0.0
+        rate = self.processed / elapsed if elapsed else 0.0
+        logger.info(
+            f"📊 [{self.job_name}] {percent:5.1f}% (id {current_id}/{self.last_id}) - "
+            f"{self.processed} filas, {self.updated} actualizadas, {rate:.0f} filas/s, "
+            f"ETA {_format_seconds(eta)}"
+        )
+
+
+def _format_seconds(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m{secs:02d}s" if hours else f"{minutes}m{secs:02d}s"
+
+
+# ===== Pool de procesos =====
+
+_worker_job: Optional[BackfillJob] = None
+
+
+def _init_worker(job: BackfillJob):
+    global _worker_job
+    _worker_job = job
+
+
+def _enrich_in_worker(row: Dict) -> Optional[Dict]:
+    return _worker_job.enrich(row)
+
+
+# ===== Checkpoints =====
+
+def ensure_checkpoint_table():
+    with engine.begin() as connection:
+        connection.execute(text(CHECKPOINT_TABLE_SQL))
+
+
+def load_checkpoint(db: Session, job_name: str) -> Optional[Dict]:
+    row = db.execute(
+        text("SELECT last_id, finished_at FROM backfill_checkpoints WHERE job_name = :job_name"),
+        {"job_name": job_name}
+    ).first()
+    return row._asdict() if row else None
+
+
+def reset_checkpoint(db: Session, job_name: str):
+    db.execute(text("DELETE FROM backfill_checkpoints WHERE job_name = :job_name"), {"job_name": job_name})
+    db.commit()
+
+
+def _mark_finished(db: Session, job_name: str, last_id: int):
+    db.execute(SAVE_CHECKPOINT_SQL, {"job_name": job_name, "last_id": last_id, "processed": 0, "updated": 0})
+    db.execute(
+        text("UPDATE backfill_checkpoints SET finished_at = NOW() WHERE job_name = :job_name"),
+        {"job_name": job_name}
+    )
+    db.commit()
+
+
+# ===== Ejecución =====
+
+class BackfillRunner:
+    """Recorre la tabla del job por rangos de id con checkpoint, pool y pausas"""
+
+    def __init__(self, job: BackfillJob, chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = DEFAULT_WORKERS,
+                 throttle_seconds: float = DEFAULT_THROTTLE_SECONDS, max_active_queries: int = MAX_ACTIVE_QUERIES):
+        self.job = job
+        self.chunk_size = max(1, chunk_size)
+        self.workers = max(1, workers)
+        self.throttle_seconds = max(0.0, throttle_seconds)
+        self.max_active_queries = max_active_queries
+
+    def _bounds(self, db: Session):
+        id_column = self.job.model.id
+        return db.query(func.min(id_column), func.max(id_column)).filter(*self.job.filters()).one()
+
+    def _load_chunk(self, db: Session, start: int, end: int) -> List[Dict]:
+        model = self.job.model
+        columns = [getattr(model, column) for column in self.job.columns]
+        rows = db.query(*columns).filter(
+            model.id >= start,
+            model.id < end,
+            *self.job.filters()
+        ).order_by(model.id).all()
+        return [row._asdict() for row in rows]
+
+    def _wait_for_capacity(self, db: Session):
+        """Cede la base de datos: pausa fija y espera con backoff mientras haya mucha carga"""
+        if self.throttle_seconds:
+            time.sleep(self.throttle_seconds)
+        if self.max_active_queries <= 0:
+            return
+        delay = max(self.throttle_seconds, 0.5)
+        while True:
+            try:
+                active = db.execute(ACTIVE_QUERIES_SQL).scalar() or 0
+                db.rollback()
+            except Exception as e:
+                logger.debug(f"No se pudo medir la carga de la base de datos: {e}")
+                db.rollback()
+                return
+            if active <= self.max_active_queries:
+                return
+            logger.info(f"⏸️  [{self.job.name}] {active} consultas activas, esperando {delay:.1f}s...")
+            time.sleep(delay)
+            delay = min(delay * 2, MAX_BACKOFF_SECONDS)
+
+    def run(self, restart: bool = False) -> BackfillProgress:
+        ensure_checkpoint_table()
+        db = SessionLocal()
+        executor = None
+        try:
+            if restart:
+                reset_checkpoint(db, self.job.name)
+            checkpoint = load_checkpoint(db, self.job.name)
+            if checkpoint and checkpoint["finished_at"] is not None and not self.job.rolling:
+                logger.info(f"✅ [{self.job.name}] ya completado ({checkpoint['finished_at']}); usa --restart para repetir")
+                return BackfillProgress(self.job.name, 0, 0, 0)
+
+            self.job.prepare(db)
+            first_id, last_id = self._bounds(db)
+            db.rollback()
+            if first_id is None:
+                logger.info(f"✅ [{self.job.name}] no hay filas para procesar")
+                return BackfillProgress(self.job.name, 0, 0, 0)
+
+            start = first_id
+            if checkpoint:
+                start = max(first_id, checkpoint["last_id"] + 1)
+                if start > last_id:
+                    logger.info(f"✅ [{self.job.name}] sin filas nuevas desde id {checkpoint['last_id']}")
+                    return BackfillProgress(self.job.name, first_id, last_id, start)
+                logger.info(f"🔁 [{self.job.name}] reanudando desde id {start}")
+            progress = BackfillProgress(self.job.name, first_id, last_id, start, started=time.time())
+            logger.info(
+                f"🚀 [{self.job.name}] ids {start}..{last_id}, rangos de {self.chunk_size}, "
+                f"{self.workers} proceso(s)"
+            )
+
+            if self.workers > 1:
+                executor = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_init_worker, initargs=(self.job,)
+                )
+
+            while start <= last_id:
+                end = start + self.chunk_size
+                rows = self._load_chunk(db, start, end)
+                if executor and rows:
+                    chunksize = max(1, len(rows) // (self.workers * 4))
+                    results = executor.map(_enrich_in_worker, rows, chunksize=chunksize)
+                else:
+                    results = map(self.job.enrich, rows)
+                updates = [update for update in results if update]
+
+                if updates:
+                    self.job.write(db, updates)
+                db.execute(SAVE_CHECKPOINT_SQL, {
+                    "job_name": self.job.name,
+                    "last_id": end - 1,
+                    "processed": len(rows),
+                    "updated": len(updates)
+                })
+                db.commit()
+
+                progress.processed += len(rows)
+                progress.updated += len(updates)
+                progress.log(min(end - 1, last_id))
+                start = end
+                if start <= last_id:
+                    self._wait_for_capacity(db)
+
+            _mark_finished(db, self.job.name, last_id)
+            logger.info(
+                f"🎉 [{self.job.name}] completado: {progress.processed} filas, "
+                f"{progress.updated} actualizadas en {_format_seconds(time.time() - progress.started)}"
+            )
+            return progress
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            if executor:
+                executor.shutdown()
+            db.close()
+
+
+def add_backfill_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Filas (ids) por rango")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Procesos para el enriquecimiento")
+    parser.add_argument("--throttle", type=float, default=DEFAULT_THROTTLE_SECONDS,
+                        help="Segundos de pausa entre rangos")
+    parser.add_argument("--max-active-queries", type=int, default=MAX_ACTIVE_QUERIES,
+                        help="Esperar mientras haya más consultas activas que esto (0 = no medir)")
+    parser.add_argument("--restart", action="store_true", help="Ignorar el checkpoint y empezar de cero")
+
+
+def run_backfill(job: BackfillJob, args: argparse.Namespace) -> BackfillProgress:
+    """Ejecuta un job con las opciones de add_backfill_arguments"""
+    runner = BackfillRunner(
+        job,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        throttle_seconds=args.throttle,
+        max_active_queries=args.max_active_queries
+    )
+    return runner.run(restart=args.restart)
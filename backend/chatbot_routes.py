@@ -4,13 +4,15 @@ Soporta OpenRouter y Ollama con fallback a respuestas predefinidas
 """
 
 from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc, or_, and_
 from typing import Optional, List
 from datetime import datetime, timedelta
 from pydantic import BaseModel
-import requests
 import os
+import json
 import logging
 
 # Intentar cargar variables de entorno desde .env si existe
@@ -22,6 +24,8 @@ except ImportError:
 
 from database import get_db
 from models import Noticia, Diario
+from news_retrieval import get_retrieval_index, format_grounding_context
+from llm_client import get_llm_client
 
 logger = logging.getLogger(__name__)
 
@@ -29,17 +33,18 @@ router = APIRouter(prefix="/chatbot", tags=["ChatBot"])
 
 # ===== CONFIGURACIÓN LLM =====
 
-# OpenRouter API
-# Cargar desde variable de entorno o usar la key por defecto del proyecto
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "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")
-OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+# Proveedores, pool de conexiones y caché de respuestas: ver llm_client.py
 
-# Ollama API
-OLLAMA_API_URL = os.getenv("OLLAMA_API_URL", "http://localhost:11434/api/generate")
-OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama2")
+# Noticias recuperadas que se pasan al LLM como contexto
+GROUNDING_TOP_K = int(os.getenv("CHATBOT_GROUNDING_TOP_K", "5"))
 
-# Configuración de LLM preferido
-PREFERRED_LLM = os.getenv("PREFERRED_LLM", "openrouter")  # "openrouter" o "ollama"
+# Nombres comunes de diarios usados como contexto
+NEWSPAPER_MAP = {
+    'cnn': 'CNN',
+    'correo': 'Correo',
+    'popular': 'Popular',
+    'comercio': 'Comercio'
+}
 
 # ===== SCHEMAS =====
 
@@ -303,35 +308,20 @@ def extract_keywords(question: str) -> List[str]:
     return keywords[:5]  # Limitar a 5 palabras clave
 
 def search_news_by_keywords(db: Session, keywords: List[str], context: Optional[str] = None) -> str:
-    """Busca noticias por palabras clave"""
+    """Busca noticias por palabras clave usando el índice BM25 (sin escanear la tabla)"""
     try:
-        conditions = []
-        for keyword in keywords:
-            conditions.append(Noticia.titulo.ilike(f"%{keyword}%"))
-            conditions.append(Noticia.contenido.ilike(f"%{keyword}%"))
-        
-        query = db.query(Noticia).join(Diario).filter(
-            or_(*conditions)
-        )
-        
-        if context:
-            query = query.filter(Diario.nombre.ilike(f"%{context}%"))
-        
-        noticias = query.order_by(
-            desc(Noticia.fecha_publicacion)
-        ).limit(5).all()
-        
-        if not noticias:
+        results = retrieve_news(db, ' '.join(keywords), context)
+        if not results:
             return None
         
         respuesta = f"🔍 **Noticias relacionadas con '{' '.join(keywords)}':**\n\n"
-        for i, noticia in enumerate(noticias, 1):
-            fecha = noticia.fecha_publicacion.strftime("%d/%m/%Y") if noticia.fecha_publicacion else "Fecha no disponible"
+        for i, noticia in enumerate(results, 1):
+            fecha = noticia['fecha_publicacion'].strftime("%d/%m/%Y") if noticia['fecha_publicacion'] else "Fecha no disponible"
             # Limitar el título a 80 caracteres para mejor legibilidad
-            titulo = noticia.titulo[:80] + "..." if len(noticia.titulo) > 80 else noticia.titulo
-            enlace = noticia.enlace if noticia.enlace else f"/noticia/{noticia.id}"
+            titulo = noticia['titulo'][:80] + "..." if len(noticia['titulo']) > 80 else noticia['titulo']
+            enlace = noticia['enlace'] if noticia['enlace'] else f"/noticia/{noticia['id']}"
             respuesta += f"{i}. **{titulo}**\n"
-            respuesta += f"   📅 {fecha} | 📰 {noticia.diario.nombre} | 📂 {noticia.categoria}\n"
+            respuesta += f"   📅 {fecha} | 📰 {noticia['diario_nombre']} | 📂 {noticia['categoria']}\n"
             respuesta += f"   🔗 [Ver noticia completa]({enlace})\n\n"
         
         return respuesta
@@ -339,76 +329,38 @@ def search_news_by_keywords(db: Session, keywords: List[str], context: Optional[
         logger.error(f"Error buscando noticias por palabras clave: {e}")
         return None
 
+def retrieve_news(db: Session, question: str, context: Optional[str] = None, k: int = 5) -> List[dict]:
+    """Top-k noticias del índice de recuperación para una pregunta, con su puntuación"""
+    index = get_retrieval_index()
+    index.ensure_fresh(db)
+    
+    if context == 'premium':
+        return index.search(question, k=k, premium_only=True, db=db)
+    diario = NEWSPAPER_MAP.get(context.lower(), context) if context else None
+    return index.search(question, k=k, diario=diario)
+
 # ===== FUNCIONES LLM =====
 
-def call_openrouter(question: str, context: Optional[str] = None) -> Optional[str]:
-    """Llama a OpenRouter API"""
-    if not OPENROUTER_API_KEY:
-        return None
-    
-    try:
-        # Construir contexto para el LLM
-        system_prompt = """Eres un asistente de noticias peruanas. Responde de manera concisa y útil.
+def build_system_prompt(context: Optional[str] = None, grounding: Optional[str] = None) -> str:
+    """Instrucciones para el LLM, con la sección actual y las noticias recuperadas"""
+    system_prompt = """Eres un asistente de noticias peruanas. Responde de manera concisa y útil.
         Si la pregunta es sobre noticias específicas, proporciona información basada en el contexto disponible.
         Si no tienes información específica, sé honesto y sugiere buscar en las categorías disponibles."""
-        
-        if context:
-            system_prompt += f"\n\nEl usuario está navegando en la sección de {context}."
-        
-        payload = {
-            "model": "openai/gpt-3.5-turbo",
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": question}
-            ],
-            "temperature": 0.7,
-            "max_tokens": 300
-        }
-        
-        headers = {
-            "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        response = requests.post(OPENROUTER_API_URL, json=payload, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return data.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
-        else:
-            logger.error(f"Error en OpenRouter: {response.status_code} - {response.text}")
-            return None
-    except Exception as e:
-        logger.error(f"Error llamando a OpenRouter: {e}")
-        return None
+    
+    if context:
+        system_prompt += f"\n\nEl usuario está navegando en la sección de {context}."
+    
+    if grounding:
+        system_prompt += f"\n\nNoticias relacionadas de nuestra base de datos:\n{grounding}"
+    
+    return system_prompt
 
-def call_ollama(question: str, context: Optional[str] = None) -> Optional[str]:
-    """Llama a Ollama API"""
+def get_grounding(db: Session, question: str, context: Optional[str] = None) -> Optional[str]:
+    """Noticias recuperadas formateadas para el prompt (None si no hay)"""
     try:
-        prompt = f"""Eres un asistente de noticias peruanas. Responde de manera concisa y útil.
-        
-Pregunta del usuario: {question}
-"""
-        
-        if context:
-            prompt += f"\nContexto: El usuario está navegando en la sección de {context}."
-        
-        payload = {
-            "model": OLLAMA_MODEL,
-            "prompt": prompt,
-            "stream": False
-        }
-        
-        response = requests.post(OLLAMA_API_URL, json=payload, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return data.get("response", "").strip()
-        else:
-            logger.error(f"Error en Ollama: {response.status_code} - {response.text}")
-            return None
+        return format_grounding_context(retrieve_news(db, question, context, k=GROUNDING_TOP_K)) or None
     except Exception as e:
-        logger.error(f"Error llamando a Ollama: {e}")
+        logger.warning(f"No se pudo recuperar contexto para el LLM: {e}")
         return None
 
 def get_fallback_response(question: str) -> str:
@@ -540,8 +492,8 @@ async def ask_question(
     # Generar preguntas sugeridas
     suggested_questions = get_suggested_questions(question, context, "database")
     
-    # Paso 1: Intentar buscar en la base de datos
-    db_response = search_news_in_database(db, question, context)
+    # Paso 1: Intentar buscar en la base de datos (consultas e índice fuera del event loop)
+    db_response = await run_in_threadpool(search_news_in_database, db, question, context)
     if db_response:
         return ChatResponse(
             answer=db_response,
@@ -550,19 +502,10 @@ async def ask_question(
             suggested_questions=suggested_questions
         )
     
-    # Paso 2: Intentar usar LLM
-    llm_response = None
-    
-    if PREFERRED_LLM == "openrouter":
-        llm_response = call_openrouter(question, context)
-        if not llm_response and PREFERRED_LLM == "openrouter":
-            # Fallback a Ollama si OpenRouter falla
-            llm_response = call_ollama(question, context)
-    else:
-        llm_response = call_ollama(question, context)
-        if not llm_response:
-            # Fallback a OpenRouter si Ollama falla
-            llm_response = call_openrouter(question, context)
+    # Paso 2: Consultar los LLM en paralelo (gana la primera respuesta válida), con las noticias recuperadas como contexto
+    grounding = await run_in_threadpool(get_grounding, db, question, context)
+    system_prompt = build_system_prompt(context, grounding)
+    llm_response, _provider = await get_llm_client().ask(system_prompt, question, context)
     
     if llm_response:
         suggested_questions = get_suggested_questions(question, context, "llm")
@@ -583,35 +526,92 @@ async def ask_question(
         suggested_questions=suggested_questions
     )
 
+@router.get("/search")
+async def search_news(
+    q: str = Query(..., min_length=1, description="Texto a buscar"),
+    k: int = Query(5, ge=1, le=50, description="Cantidad de resultados"),
+    context: Optional[str] = Query(None, description="Diario o 'premium'"),
+    db: Session = Depends(get_db)
+):
+    """Búsqueda BM25 sobre el índice del chatbot (top-k con puntuación)"""
+    results = await run_in_threadpool(retrieve_news, db, q, context, k)
+    return {
+        "query": q,
+        "results": results,
+        "total": len(results),
+        "indexed_news": get_retrieval_index().size
+    }
+
+@router.post("/ask/stream")
+async def ask_question_stream(
+    request: ChatRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Variante en streaming (Server-Sent Events) de /chatbot/ask.
+    Eventos: "token" con cada fragmento de texto y "done" con la fuente y las preguntas sugeridas.
+    """
+    question = request.question.strip()
+    context = request.context
+    
+    if not question:
+        raise HTTPException(status_code=400, detail="La pregunta no puede estar vacía")
+    
+    def sse(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    
+    # La búsqueda en base de datos y el contexto se resuelven antes de empezar a emitir
+    db_response = await run_in_threadpool(search_news_in_database, db, question, context)
+    system_prompt = None
+    if not db_response:
+        system_prompt = build_system_prompt(context, await run_in_threadpool(get_grounding, db, question, context))
+    
+    async def event_stream():
+        if db_response:
+            yield sse("token", {"text": db_response})
+            yield sse("done", {
+                "source": "database",
+                "confidence": 0.9,
+                "suggested_questions": get_suggested_questions(question, context, "database")
+            })
+            return
+        
+        provider = None
+        async for delta, provider in get_llm_client().ask_stream(system_prompt, question, context):
+            yield sse("token", {"text": delta})
+        
+        if provider:
+            yield sse("done", {
+                "source": "llm",
+                "provider": provider,
+                "confidence": 0.7,
+                "suggested_questions": get_suggested_questions(question, context, "llm")
+            })
+            return
+        
+        yield sse("token", {"text": get_fallback_response(question)})
+        yield sse("done", {
+            "source": "fallback",
+            "confidence": 0.5,
+            "suggested_questions": get_suggested_questions(question, context, "fallback")
+        })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/health")
 async def chatbot_health():
     """Verifica el estado del chatbot y los servicios LLM"""
-    health_status = {
+    client = get_llm_client()
+    provider = await client.check_health()
+    
+    return {
         "status": "ok",
-        "llm_available": False,
-        "llm_provider": None,
-        "database_available": True
+        "llm_available": provider is not None,
+        "llm_provider": provider,
+        "database_available": True,
+        "llm_cache": {"hits": client.cache.hits, "misses": client.cache.misses}
     }
-    
-    # Verificar OpenRouter
-    if OPENROUTER_API_KEY:
-        try:
-            response = requests.get("https://openrouter.ai/api/v1/models", timeout=5)
-            if response.status_code == 200:
-                health_status["llm_available"] = True
-                health_status["llm_provider"] = "openrouter"
-        except:
-            pass
-    
-    # Verificar Ollama si OpenRouter no está disponible
-    if not health_status["llm_available"]:
-        try:
-            response = requests.get(OLLAMA_API_URL.replace("/api/generate", "/api/tags"), timeout=5)
-            if response.status_code == 200:
-                health_status["llm_available"] = True
-                health_status["llm_provider"] = "ollama"
-        except:
-            pass
-    
-    return health_status
-
@@ -0,0 +1,209 @@
+"""
+Frecuencia de crawl adaptativa por sección (diario, categoría).
+La tasa de publicación de cada sección se aprende del historial de noticias (por hora del día
+de fecha_publicacion, o fecha_extraccion si falta) y de lo que rindió cada visita registrada en
+EstadisticaScraping. Con esas tasas se reparte un presupuesto fijo de visitas por hora: si las
+noticias llegan como un proceso de Poisson de tasa λ y una sección se visita cada T horas, una
+noticia espera en promedio T/2 hasta ser descubierta, y la latencia media total con presupuesto
+fijo se minimiza visitando cada sección con frecuencia proporcional a √λ. Así las visitas se
+concentran donde aparece contenido nuevo sin aumentar las cargas de página.
+"""
+import logging
+import math
+import os
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import Diario, Noticia, EstadisticaScraping
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DAYS = int(os.getenv('CRAWL_HISTORY_DAYS', '14'))
+# Peso (en días) de la tasa media al suavizar el perfil por hora del día
+PRIOR_WEIGHT_DAYS = 3.0
+# Tasa mínima (noticias/hora) para secciones sin historial: se visitan con el intervalo máximo
+MIN_RATE_PER_HOUR = 0.01
+# Visitas registradas necesarias para usar el rendimiento por visita
+MIN_FETCHES_FOR_YIELD = 3
+
+SectionKey = Tuple[str, str]
+
+
+def normalize_key(value: Optional[str]) -> str:
+    """Minúsculas y sin tildes: 'Política' -> 'politica'"""
+    text = unicodedata.normalize('NFKD', value or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower().strip()
+
+
+def match_sources_to_diarios(db: Session, sources: Iterable[str]) -> Dict[int, str]:
+    """diario_id -> nombre de la fuente del scraper ('comercio' coincide con 'El Comercio')"""
+    sources = list(sources)
+    matches = {}
+    for diario_id, nombre in db.query(Diario.id, Diario.nombre).all():
+        nombre = normalize_key(nombre)
+        for source in sources:
+            if normalize_key(source) in nombre:
+                matches[diario_id] = source
+                break
+    return matches
+
+
+@dataclass
+class SectionRate:
+    """Tasa de publicación de una sección en noticias/hora, por hora del día (UTC)"""
+    source: str
+    section: str
+    hourly: List[float]
+    articles: int
+    fetch_rate: Optional[float] = None
+
+    @property
+    def mean_rate(self) -> float:
+        return sum(self.hourly) / 24
+
+    def rate_at(self, hour: int) -> float:
+        return max(self.hourly[hour % 24], MIN_RATE_PER_HOUR)
+
+
+def _fetch_yields(db: Session, diarios: Dict[int, str], sections: set, since: datetime) -> Dict[SectionKey, float]:
+    """Noticias nuevas por hora según las visitas registradas de cada sección"""
+    rows = db.query(
+        EstadisticaScraping.diario_id,
+        EstadisticaScraping.categoria,
+        func.count(EstadisticaScraping.id),
+        func.coalesce(func.sum(EstadisticaScraping.cantidad_noticias), 0),
+        func.min(EstadisticaScraping.fecha_scraping),
+        func.max(EstadisticaScraping.fecha_scraping)
+    ).filter(
+        EstadisticaScraping.fecha_scraping >= since,
+        EstadisticaScraping.estado == 'exitoso',
+        EstadisticaScraping.diario_id.in_(list(diarios))
+    ).group_by(EstadisticaScraping.diario_id, EstadisticaScraping.categoria).all()
+
+    yields = {}
+    for diario_id, categoria, fetches, cantidad, first, last in rows:
+        key = (diarios[diario_id], normalize_key(categoria))
+        if key not in sections or fetches < MIN_FETCHES_FOR_YIELD or not first or not last:
+            continue
+        hours = (last - first).total_seconds() / 3600
+        if hours > 0:
+            yields[key] = float(cantidad) / hours
+    return yields
+
+
+def learn_section_rates(db: Session, sections: Iterable[SectionKey], days: int = HISTORY_DAYS,
+                        now: Optional[datetime] = None) -> Dict[SectionKey, SectionRate]:
+    """
+    Tasa por sección y hora del día a partir de las noticias de los últimos `days` días,
+    suavizada hacia la media de la sección; si hay suficientes visitas registradas, el nivel se
+    promedia con el rendimiento observado por visita.
+    """
+    now = now or datetime.utcnow()
+    since = now - timedelta(days=days)
+    sections = {(source, normalize_key(section)) for source, section in sections}
+    diarios = match_sources_to_diarios(db, {source for source, _ in sections})
+
+    counts: Dict[SectionKey, List[int]] = defaultdict(lambda: [0] * 24)
+    if diarios:
+        fecha = func.coalesce(Noticia.fecha_publicacion, Noticia.fecha_extraccion)
+        rows = db.query(
+            Noticia.diario_id,
+            Noticia.categoria,
+            func.extract('hour', fecha),
+            func.count(Noticia.id)
+        ).filter(
+            Noticia.fecha_extraccion >= since,
+            Noticia.diario_id.in_(list(diarios))
+        ).group_by(Noticia.diario_id, Noticia.categoria, func.extract('hour', fecha)).all()
+
+        for diario_id, categoria, hour, count in rows:
+            key = (diarios[diario_id], normalize_key(categoria))
+            if key in sections and hour is not None:
+                counts[key][int(hour)] += count
+
+    yields = _fetch_yields(db, diarios, sections, since) if diarios else {}
+
+    rates = {}
+    for key in sections:
+        hourly_counts = counts[key]
+        total = sum(hourly_counts)
+        mean = total / (24 * days)
+        hourly = [(count + PRIOR_WEIGHT_DAYS * mean) / (days + PRIOR_WEIGHT_DAYS) for count in hourly_counts]
+
+        fetch_rate = yields.get(key)
+        if fetch_rate is not None:
+            target = (mean + fetch_rate) / 2
+            hourly = [rate * target / mean for rate in hourly] if mean > 0 else [target] * 24
+
+        rates[key] = SectionRate(source=key[0], section=key[1], hourly=hourly, articles=total, fetch_rate=fetch_rate)
+    return rates
+
+
+def allocate_intervals(rates: Dict[SectionKey, float], budget_per_hour: float,
+                       min_interval: float, max_interval: float) -> Dict[SectionKey, float]:
+    """
+    Reparte `budget_per_hour` visitas con frecuencia ∝ √λ, acotando cada intervalo (en segundos)
+    a [min_interval, max_interval]. Las secciones que tocan un límite quedan fijas y el resto del
+    presupuesto se reparte de nuevo entre las demás: primero se fijan las que superan el máximo y
+    luego las que no llegan al mínimo, para que la suma iguale el presupuesto cuando cabe en los límites.
+    """
+    min_frequency = 3600 / max_interval
+    max_frequency = 3600 / min_interval
+    weights = {key: math.sqrt(max(rate, MIN_RATE_PER_HOUR)) for key, rate in rates.items()}
+    frequencies: Dict[SectionKey, float] = {}
+    remaining = budget_per_hour
+
+    while weights:
+        total = sum(weights.values())
+        shares = {key: remaining * weight / total for key, weight in weights.items()}
+        clamped = {key: max_frequency for key, frequency in shares.items() if frequency > max_frequency}
+        if not clamped:
+            clamped = {key: min_frequency for key, frequency in shares.items() if frequency < min_frequency}
+        if not clamped:
+            frequencies.update(shares)
+            break
+        for key, frequency in clamped.items():
+            frequencies[key] = frequency
+            remaining -= frequency
+            del weights[key]
+
+    return {key: 3600 / frequency for key, frequency in frequencies.items()}
+
+
+def section_intervals(db: Session, sections: Iterable[SectionKey], budget_per_hour: float,
+                      min_interval: float, max_interval: float, days: int = HISTORY_DAYS,
+                      now: Optional[datetime] = None) -> Dict[SectionKey, float]:
+    """Intervalo (segundos) hasta la próxima visita de cada sección según la tasa de la hora actual"""
+    now = now or datetime.utcnow()
+    sections = list(sections)
+    learned = learn_section_rates(db, sections, days=days, now=now)
+    current = {
+        (source, section): learned[(source, normalize_key(section))].rate_at(now.hour)
+        for source, section in sections
+    }
+    intervals = allocate_intervals(current, budget_per_hour, min_interval, max_interval)
+    for (source, section), interval in sorted(intervals.items(), key=lambda item: item[1]):
+        logger.info(f"📐 {source}/{section}: {current[(source, section)]:.2f} noticias/h → cada {interval / 60:.0f} min")
+    return intervals
+
+
+def record_section_fetch(db: Session, source: str, section: str, saved: int, duration: float, success: bool):
+    """Registra una visita a una sección (también las que no trajeron nada) para aprender su rendimiento"""
+    diarios = match_sources_to_diarios(db, [source])
+    if not diarios:
+        logger.debug(f"Sin diario para la fuente {source}; visita no registrada")
+        return
+    db.add(EstadisticaScraping(
+        diario_id=next(iter(diarios)),
+        categoria=section,
+        cantidad_noticias=saved,
+        duracion_segundos=int(duration),
+        estado='exitoso' if success else 'error'
+    ))
+    db.commit()
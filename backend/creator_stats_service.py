@@ -0,0 +1,175 @@
+"""
+Estadísticas de creadores UGC (mis publicaciones, progreso y ganancias de monetización).
+Los totales salen de un único GROUP BY tipo, estado sobre los posts del usuario más la suma de
+sus contadores de reacciones; las ganancias se calculan por tipo con la configuración de
+ganancias en memoria. El resultado se guarda por usuario hasta que cambian sus contadores
+(vistas/clicks vaciados, reacciones, nuevos posts o cambios de estado). Los listados de posts
+se paginan y no pasan por la caché.
+"""
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models_ugc_enhanced import Post, PostReactionCount, EstadoPublicacion
+from dashboard_service import EarningsConfigCache, get_earnings_config_cache
+
+logger = logging.getLogger(__name__)
+
+# Margen de seguridad: aunque no llegue ninguna invalidación, las estadísticas se recalculan
+CREATOR_STATS_CACHE_SECONDS = float(os.getenv('CREATOR_STATS_CACHE_SECONDS', '600'))
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+SIMPLE_CONTENT_TYPES = ('texto', 'imagen', 'video', 'post', 'comentario', 'resena')
+PUBLISHED = EstadoPublicacion.PUBLISHED.value
+
+
+def _empty_totals() -> Dict:
+    return {"posts": 0, "views": 0, "clicks": 0, "interacciones": 0, "ganancia": 0.0}
+
+
+class CreatorStatsService:
+    """Totales y ganancias por usuario, memorizados hasta que se invalidan"""
+
+    def __init__(self, earnings: EarningsConfigCache, ttl_seconds: float = CREATOR_STATS_CACHE_SECONDS):
+        self.earnings = earnings
+        self.ttl_seconds = ttl_seconds
+        self._stats: Dict[int, Dict] = {}
+        self._computed_at: Dict[int, float] = {}
+        self._versions: Dict[int, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    # ===== Invalidación =====
+
+    def invalidate_user(self, user_id: Optional[int]):
+        if user_id is None:
+            return
+        with self._lock:
+            self._stats.pop(user_id, None)
+            self._versions[user_id] += 1
+
+    def invalidate_users(self, user_ids: Iterable[int]):
+        for user_id in set(user_ids):
+            self.invalidate_user(user_id)
+
+    def invalidate_all(self):
+        """Se llama al cambiar la configuración de ganancias"""
+        with self._lock:
+            for user_id in list(self._stats):
+                self._versions[user_id] += 1
+            self._stats.clear()
+
+    # ===== Cálculo =====
+
+    def post_earning(self, db: Session, tipo: str, interactions: int) -> float:
+        """Ganancia del creador para un post con `interactions` vistas+clicks+interacciones"""
+        config = self.earnings.for_type(db, tipo)
+        return interactions * config["cost_per_interaction"] * config["percentage"] / 100
+
+    def _compute(self, db: Session, user_id: int) -> Dict:
+        rows = db.query(
+            Post.tipo,
+            Post.estado,
+            func.count(Post.id),
+            func.coalesce(func.sum(func.coalesce(Post.views, 0)), 0),
+            func.coalesce(func.sum(func.coalesce(Post.clicks, 0)), 0),
+            func.coalesce(func.sum(func.coalesce(Post.interacciones, 0)), 0)
+        ).filter(Post.user_id == user_id).group_by(Post.tipo, Post.estado).all()
+
+        reacciones_totales = db.query(
+            func.coalesce(func.sum(PostReactionCount.total), 0)
+        ).join(Post, Post.id == PostReactionCount.post_id).filter(
+            Post.user_id == user_id,
+            Post.estado == PUBLISHED
+        ).scalar() or 0
+
+        all_posts = _empty_totals()
+        published = _empty_totals()
+        published_by_type: Dict[str, Dict] = defaultdict(lambda: {"count": 0, "earnings": 0.0})
+        noticias_publicadas = 0
+        interacciones_noticias = 0
+        contenido_simple = 0
+
+        for tipo, estado, count, views, clicks, interacciones in rows:
+            views, clicks, interacciones = int(views), int(clicks), int(interacciones)
+            ganancia = self.post_earning(db, tipo, views + clicks + interacciones)
+            buckets = [all_posts, published] if estado == PUBLISHED else [all_posts]
+            for totals in buckets:
+                totals["posts"] += count
+                totals["views"] += views
+                totals["clicks"] += clicks
+                totals["interacciones"] += interacciones
+                totals["ganancia"] += ganancia
+
+            if estado != PUBLISHED:
+                continue
+            published_by_type[tipo]["count"] += count
+            published_by_type[tipo]["earnings"] += ganancia
+            if tipo == 'noticia':
+                noticias_publicadas += count
+                interacciones_noticias += views + clicks + interacciones
+            elif tipo in SIMPLE_CONTENT_TYPES:
+                contenido_simple += count
+
+        return {
+            "all": all_posts,
+            "published": published,
+            "published_by_type": dict(published_by_type),
+            "noticias_publicadas": noticias_publicadas,
+            "interacciones_noticias": interacciones_noticias,
+            "contenido_simple": contenido_simple,
+            "reacciones_totales": int(reacciones_totales)
+        }
+
+    def get_stats(self, db: Session, user_id: int) -> Dict:
+        """Estadísticas del usuario (desde memoria si no cambiaron sus contadores)"""
+        with self._lock:
+            stats = self._stats.get(user_id)
+            if stats is not None and time.time() - self._computed_at[user_id] < self.ttl_seconds:
+                return stats
+            version = self._versions[user_id]
+
+        stats = self._compute(db, user_id)
+        with self._lock:
+            # Si se invalidó mientras se calculaba, no se guarda un resultado ya viejo
+            if version == self._versions[user_id]:
+                self._stats[user_id] = stats
+                self._computed_at[user_id] = time.time()
+        return stats
+
+    # ===== Listados =====
+
+    @staticmethod
+    def get_posts_page(db: Session, user_id: int, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0,
+                       published_only: bool = False) -> List[Post]:
+        """Una página de posts del usuario, más recientes primero"""
+        query = db.query(Post).filter(Post.user_id == user_id)
+        if published_only:
+            query = query.filter(Post.estado == PUBLISHED)
+        return query.order_by(Post.created_at.desc(), Post.id.desc()).offset(offset).limit(limit).all()
+
+
+def page_params(limit: int, offset: int):
+    """Acota limit/offset recibidos por query string"""
+    return max(1, min(limit, MAX_PAGE_SIZE)), max(0, offset)
+
+
+def pagination_info(total: int, limit: int, offset: int) -> Dict:
+    return {"total": total, "limit": limit, "offset": offset, "has_more": offset + limit < total}
+
+
+_default_service: Optional[CreatorStatsService] = None
+
+
+def get_creator_stats_service() -> CreatorStatsService:
+    """Retorna el servicio de estadísticas de creadores compartido del proceso"""
+    global _default_service
+    if _default_service is None:
+        _default_service = CreatorStatsService(get_earnings_config_cache())
+    return _default_service
@@ -0,0 +1,201 @@
+"""
+Agregaciones del dashboard de administración UGC.
+Los conteos de posts, usuarios y reportes se resuelven con agregados condicionales (una
+consulta por tabla) y los ingresos con un SUM de interacciones agrupado por tipo de contenido,
+combinado con la configuración de ganancias que se mantiene en memoria. El resultado completo
+se guarda unos segundos para que recargas seguidas del panel no vuelvan a la base de datos.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import case, func, text
+from sqlalchemy.orm import Session
+
+from models_ugc_enhanced import User, Post, SystemSettings, RoleEnum, EstadoPublicacion
+
+logger = logging.getLogger(__name__)
+
+EARNINGS_CONFIG_KEY = "earnings_config"
+EARNINGS_CONFIG_TTL_SECONDS = float(os.getenv('EARNINGS_CONFIG_CACHE_SECONDS', '300'))
+DASHBOARD_CACHE_SECONDS = float(os.getenv('ADMIN_DASHBOARD_CACHE_SECONDS', '30'))
+
+DEFAULT_EARNINGS_CONFIG = {
+    "noticia": {"percentage": 30, "cost_per_interaction": 0.05},
+    "texto": {"percentage": 30, "cost_per_interaction": 0.01},
+    "imagen": {"percentage": 30, "cost_per_interaction": 0.02},
+    "video": {"percentage": 30, "cost_per_interaction": 0.03},
+    "comentario": {"percentage": 30, "cost_per_interaction": 0.005},
+    "resena": {"percentage": 30, "cost_per_interaction": 0.02},
+    "post": {"percentage": 30, "cost_per_interaction": 0.01}
+}
+DEFAULT_TYPE_EARNINGS = {"percentage": 30, "cost_per_interaction": 0.01}
+
+REPORT_COUNTS_SQL = text("""
+    SELECT COUNT(*) AS total,
+           COALESCE(SUM(CASE WHEN estado = 'pending' THEN 1 ELSE 0 END), 0) AS pending
+    FROM reports
+""")
+
+
+def _count_where(condition):
+    """COUNT condicional portable: SUM(CASE WHEN condición THEN 1 ELSE 0 END)"""
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+class EarningsConfigCache:
+    """Configuración de ganancias por tipo (system_settings) cacheada en memoria"""
+
+    def __init__(self, ttl_seconds: float = EARNINGS_CONFIG_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._config: Optional[Dict[str, Dict]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Descarta la configuración en memoria (se llama al guardarla desde el panel)"""
+        with self._lock:
+            self._config = None
+
+    def get(self, db: Session) -> Dict[str, Dict]:
+        """Configuración completa por tipo de contenido"""
+        with self._lock:
+            if self._config is not None and time.time() - self._loaded_at < self.ttl_seconds:
+                return self._config
+
+        config = DEFAULT_EARNINGS_CONFIG
+        try:
+            valor = db.query(SystemSettings.valor).filter(
+                SystemSettings.clave == EARNINGS_CONFIG_KEY
+            ).scalar()
+            if valor:
+                try:
+                    config = json.loads(valor)
+                except Exception as e:
+                    logger.warning(f"Error parsing earnings config: {e}, using default")
+        except Exception as e:
+            logger.error(f"Error cargando configuración de ganancias: {e}")
+            return config
+
+        with self._lock:
+            self._config = config
+            self._loaded_at = time.time()
+        return config
+
+    def for_type(self, db: Session, content_type: str) -> Dict:
+        """Configuración de un tipo de contenido (o la de por defecto)"""
+        return self.get(db).get(content_type, DEFAULT_TYPE_EARNINGS)
+
+
+class AdminDashboardService:
+    """Estadísticas del dashboard de admin calculadas en SQL y cacheadas con TTL corto"""
+
+    def __init__(self, earnings: EarningsConfigCache, ttl_seconds: float = DASHBOARD_CACHE_SECONDS):
+        self.earnings = earnings
+        self.ttl_seconds = ttl_seconds
+        self._cached: Optional[Dict] = None
+        self._cached_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._cached = None
+
+    @staticmethod
+    def post_counts(db: Session) -> Dict[str, int]:
+        row = db.query(
+            func.count(Post.id),
+            _count_where(Post.estado == EstadoPublicacion.PENDING_REVIEW.value),
+            _count_where(Post.estado == EstadoPublicacion.PUBLISHED.value),
+            _count_where(Post.estado == EstadoPublicacion.REJECTED.value),
+            _count_where(Post.estado == EstadoPublicacion.FLAGGED.value)
+        ).one()
+        return {
+            "total": row[0],
+            "pending": int(row[1]),
+            "published": int(row[2]),
+            "rejected": int(row[3]),
+            "flagged": int(row[4])
+        }
+
+    @staticmethod
+    def user_counts(db: Session) -> Dict[str, int]:
+        row = db.query(
+            func.count(User.id),
+            _count_where(User.role == RoleEnum.ADMIN),
+            _count_where(User.suspendido == True)  # noqa: E712
+        ).one()
+        return {"total": row[0], "admins": int(row[1]), "suspended": int(row[2])}
+
+    @staticmethod
+    def report_counts(db: Session) -> Dict[str, int]:
+        # SQL directo para evitar problemas con el enum de estado
+        try:
+            row = db.execute(REPORT_COUNTS_SQL).one()
+            return {"total": row[0] or 0, "pending": int(row[1] or 0)}
+        except Exception as e:
+            logger.error(f"❌ Error obteniendo reportes: {e}")
+            db.rollback()
+            return {"total": 0, "pending": 0}
+
+    def earnings_totals(self, db: Session) -> Dict[str, float]:
+        """SUM de interacciones por tipo en SQL; el costo y porcentaje salen de la config en memoria"""
+        interactions = func.coalesce(Post.views, 0) + func.coalesce(Post.clicks, 0) + func.coalesce(Post.interacciones, 0)
+        rows = db.query(Post.tipo, func.coalesce(func.sum(interactions), 0)).group_by(Post.tipo).all()
+
+        total_ingresos = 0.0
+        ganancia_usuarios = 0.0
+        for tipo, total_interactions in rows:
+            config = self.earnings.for_type(db, tipo)
+            revenue = int(total_interactions) * config["cost_per_interaction"]
+            total_ingresos += revenue
+            ganancia_usuarios += revenue * config["percentage"] / 100
+
+        return {
+            "total_ingresos": round(total_ingresos, 2),
+            "ganancia_admin": round(total_ingresos - ganancia_usuarios, 2),
+            "ganancia_usuarios": round(ganancia_usuarios, 2)
+        }
+
+    def get(self, db: Session) -> Dict:
+        """Datos del dashboard (desde caché si tienen menos de ttl_seconds)"""
+        with self._lock:
+            if self._cached is not None and time.time() - self._cached_at < self.ttl_seconds:
+                return self._cached
+
+        started = time.time()
+        data = {
+            "posts": self.post_counts(db),
+            "users": self.user_counts(db),
+            "earnings": self.earnings_totals(db),
+            "reports": self.report_counts(db)
+        }
+        logger.info(f"📊 Dashboard admin calculado en {(time.time() - started) * 1000:.0f} ms")
+
+        with self._lock:
+            self._cached = data
+            self._cached_at = time.time()
+        return data
+
+
+_default_earnings_cache: Optional[EarningsConfigCache] = None
+_default_dashboard: Optional[AdminDashboardService] = None
+
+
+def get_earnings_config_cache() -> EarningsConfigCache:
+    """Retorna la caché de configuración de ganancias compartida del proceso"""
+    global _default_earnings_cache
+    if _default_earnings_cache is None:
+        _default_earnings_cache = EarningsConfigCache()
+    return _default_earnings_cache
+
+
+def get_dashboard_service() -> AdminDashboardService:
+    """Retorna el servicio de dashboard compartido del proceso"""
+    global _default_dashboard
+    if _default_dashboard is None:
+        _default_dashboard = AdminDashboardService(get_earnings_config_cache())
+    return _default_dashboard
@@ -0,0 +1,99 @@
+"""
+Histograma de noticias por fecha de publicación para el selector de fechas.
+Todas las parejas (fecha, cantidad) salen de un único GROUP BY sobre date(fecha_publicacion),
+cubierto por un índice de expresión, y el resultado se guarda en memoria hasta la próxima ingesta
+o, como máximo, DATE_HISTOGRAM_CACHE_SECONDS (cubre ediciones de fechas y borrados, que no
+cambian la última fecha de extracción).
+"""
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import Diario, Noticia
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_CACHE_SECONDS = float(os.getenv('DATE_HISTOGRAM_CACHE_SECONDS', '300'))
+
+
+class DateHistogramService:
+    """Conteo de noticias por día, opcionalmente filtrado por diario"""
+
+    def __init__(self, ttl_seconds: float = HISTOGRAM_CACHE_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        # nombre_diario -> (vence, marca de ingesta, histograma)
+        self._cache: Dict[Optional[str], Tuple[float, Optional[datetime], List[Tuple[date, int]]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _ingest_marker(db: Session) -> Optional[datetime]:
+        """
+        Última fecha de extracción (consulta sobre índice): cambia en cada ingesta,
+        incluso si la hizo otro proceso como el scheduler.
+        """
+        return db.query(func.max(Noticia.fecha_extraccion)).scalar()
+
+    @staticmethod
+    def _query_histogram(db: Session, nombre_diario: Optional[str]) -> List[Tuple[date, int]]:
+        """Un solo GROUP BY con el conteo de cada fecha"""
+        fecha_col = func.date(Noticia.fecha_publicacion)
+        query = db.query(fecha_col.label('fecha'), func.count(Noticia.id).label('total')).filter(
+            Noticia.fecha_publicacion.isnot(None)
+        )
+        if nombre_diario:
+            query = query.join(Diario).filter(Diario.nombre == nombre_diario)
+
+        rows = query.group_by(fecha_col).order_by(fecha_col.desc()).all()
+        return [(row.fecha, row.total) for row in rows if row.fecha is not None]
+
+    def get_histogram(self, db: Session, nombre_diario: Optional[str] = None) -> List[Tuple[date, int]]:
+        """Retorna [(fecha, total_noticias)] ordenado de la fecha más reciente a la más antigua"""
+        marker = self._ingest_marker(db)
+        with self._lock:
+            cached = self._cache.get(nombre_diario)
+        if cached and cached[0] > time.time() and cached[1] == marker:
+            return cached[2]
+
+        histogram = self._query_histogram(db, nombre_diario)
+        # Un nombre sin noticias (p. ej. un diario inexistente en la URL) no se guarda:
+        # así la caché solo crece con los diarios que existen
+        if histogram or nombre_diario is None:
+            with self._lock:
+                self._cache[nombre_diario] = (time.time() + self.ttl_seconds, marker, histogram)
+        logger.debug(f"📅 Histograma de fechas recalculado ({nombre_diario or 'todos'}): {len(histogram)} días")
+        return histogram
+
+    def invalidate(self):
+        """Descarta los histogramas en caché (se llama tras guardar noticias nuevas)"""
+        with self._lock:
+            self._cache.clear()
+
+
+def format_histogram(histogram: List[Tuple[date, int]]) -> List[Dict]:
+    """Formato de respuesta que usa el frontend para el selector de fechas"""
+    return [
+        {
+            "fecha": fecha.strftime("%Y-%m-%d"),
+            "fecha_formateada": fecha.strftime("%d/%m/%Y"),
+            "dia_semana": fecha.strftime("%A"),
+            "total_noticias": total
+        }
+        for fecha, total in histogram
+    ]
+
+
+_default_service: Optional[DateHistogramService] = None
+
+
+def get_date_histogram_service() -> DateHistogramService:
+    """Retorna la instancia compartida del servicio"""
+    global _default_service
+    if _default_service is None:
+        _default_service = DateHistogramService()
+    return _default_service
@@ -0,0 +1,26 @@
+"""
+Derecho a contenido premium por usuario.
+Se deriva del estado de suscripciones en memoria (subscription_state.SubscriptionStateCache):
+"¿es premium ahora?" (premium_until) es una comparación de fechas sin consultas mientras la entrada del usuario
+esté vigente. Esa entrada vence con fecha_fin de la suscripción activa o tras
+SUBSCRIPTION_STATE_CACHE_SECONDS (por si otro proceso la canceló), y se descarta cuando una
+suscripción del usuario cambia, así que no hay una segunda caché que invalidar.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from subscription_state import get_subscription_state_cache
+
+# fecha_fin NULL = suscripción sin vencimiento
+NO_EXPIRY = datetime.max
+
+
+def premium_until(db: Session, user_id: int) -> Optional[datetime]:
+    """Hasta cuándo el usuario es premium (NO_EXPIRY si no vence), o None si no lo es ahora"""
+    state = get_subscription_state_cache().get(db, user_id)
+    if state.active is None:
+        return None
+    until = state.active.fecha_fin or NO_EXPIRY
+    return until if until > datetime.utcnow() else None
@@ -0,0 +1,217 @@
+"""
+Servicio de exportación de noticias en streaming.
+Las filas se leen con un cursor del lado del servidor (yield_per / stream_results) y se
+escriben en bloques CSV o NDJSON, opcionalmente comprimidos con gzip, de modo que
+exportar todo el archivo histórico usa memoria constante.
+"""
+import csv
+import io
+import json
+import logging
+import re
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, date
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Noticia, Diario
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+# Filas que se piden a la base de datos por cada viaje del cursor
+DEFAULT_BATCH_SIZE = 1000
+
+# Columnas exportadas, en el mismo orden que los antiguos scripts export_news_to_csv*
+EXPORT_FIELDS = [
+    'id', 'titulo', 'contenido', 'enlace', 'imagen_url', 'categoria',
+    'fecha_publicacion', 'fecha_extraccion', 'diario_id', 'diario_nombre',
+    'autor', 'tags', 'sentimiento', 'tiempo_lectura_min', 'popularidad_score',
+    'es_trending', 'palabras_clave', 'resumen_auto', 'idioma', 'region',
+    'titulo_hash', 'contenido_hash', 'similarity_hash', 'es_alerta',
+    'nivel_urgencia', 'keywords_alerta', 'geographic_type', 'geographic_confidence',
+    'geographic_keywords'
+]
+
+JSON_FIELDS = ('tags', 'palabras_clave', 'keywords_alerta', 'geographic_keywords')
+BOOL_FIELDS = ('es_trending', 'es_alerta')
+
+
+@dataclass(frozen=True)
+class CsvStyle:
+    """Dialecto del CSV; cada script de exportación conserva el formato que ya producía"""
+    bom: bool = False
+    quote_all: bool = False
+    clean_text: bool = False
+    date_format: Optional[str] = '%Y-%m-%d %H:%M:%S'  # None -> isoformat
+    true_label: str = 'Sí'
+    false_label: str = 'No'
+
+
+# Endpoint /export
+CSV_STYLE_DEFAULT = CsvStyle()
+# export_news_to_csv_improved.py: para Excel (UTF-8 con BOM, todo entre comillas, texto en una línea)
+CSV_STYLE_EXCEL = CsvStyle(bom=True, quote_all=True, clean_text=True)
+# export_news_to_csv_fixed.py
+CSV_STYLE_FIXED = CsvStyle(bom=True, quote_all=True, true_label='True', false_label='False')
+# export_news_to_csv.py
+CSV_STYLE_PLAIN = CsvStyle(date_format=None, true_label='True', false_label='False')
+
+
+def build_export_query(fecha_desde: Optional[date] = None, fecha_hasta: Optional[date] = None,
+                       diario: Optional[str] = None, categoria: Optional[str] = None,
+                       desde_id: Optional[int] = None):
+    """
+    Consulta de exportación como proyección de columnas (no entidades ORM),
+    así la sesión no acumula objetos en el identity map mientras se recorre el cursor.
+    """
+    columns = [getattr(Noticia, field).label(field) for field in EXPORT_FIELDS if field != 'diario_nombre']
+    query = select(*columns, Diario.nombre.label('diario_nombre')).join(Diario, Noticia.diario_id == Diario.id)
+
+    if fecha_desde:
+        query = query.where(Noticia.fecha_publicacion >= datetime.combine(fecha_desde, datetime.min.time()))
+    if fecha_hasta:
+        query = query.where(Noticia.fecha_publicacion <= datetime.combine(fecha_hasta, datetime.max.time()))
+    if diario:
+        query = query.where(Diario.nombre == diario)
+    if categoria:
+        query = query.where(Noticia.categoria == categoria)
+    if desde_id is not None:
+        query = query.where(Noticia.id > desde_id)
+
+    return query.order_by(Noticia.id)
+
+
+def iter_export_rows(db: Session, batch_size: int = DEFAULT_BATCH_SIZE, **filters) -> Iterator[Dict]:
+    """Recorre las noticias filtradas con un cursor del servidor, un lote a la vez"""
+    query = build_export_query(**filters).execution_options(yield_per=batch_size, stream_results=True)
+    result = db.execute(query)
+    for row in result:
+        yield row._asdict()
+
+
+def clean_text(text: str) -> str:
+    """Texto en una sola línea: sin saltos ni tabulaciones y con espacios colapsados"""
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _format_csv_value(field: str, value, style: CsvStyle = CSV_STYLE_DEFAULT):
+    """Convierte un valor al texto que espera el CSV (fechas legibles, JSON para listas)"""
+    if field in BOOL_FIELDS:
+        return style.true_label if value else style.false_label
+    if value is None:
+        return ''
+    if field in JSON_FIELDS:
+        return json.dumps(value, ensure_ascii=False) if value else ''
+    if isinstance(value, datetime):
+        return value.strftime(style.date_format) if style.date_format else value.isoformat()
+    if isinstance(value, str) and style.clean_text:
+        return clean_text(value)
+    return value
+
+
+def _format_json_value(value):
+    """Valores serializables para NDJSON (las listas JSON quedan como listas)"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def iter_csv_chunks(rows: Iterator[Dict], batch_size: int = DEFAULT_BATCH_SIZE,
+                    style: CsvStyle = CSV_STYLE_DEFAULT) -> Iterator[bytes]:
+    """Serializa filas a CSV en bloques de batch_size filas"""
+    buffer = io.StringIO()
+    if style.bom:
+        buffer.write('\ufeff')
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL if style.quote_all else csv.QUOTE_MINIMAL)
+    writer.writerow(EXPORT_FIELDS)
+
+    pending = 0
+    for row in rows:
+        writer.writerow([_format_csv_value(field, row.get(field), style) for field in EXPORT_FIELDS])
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def iter_ndjson_chunks(rows: Iterator[Dict], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[bytes]:
+    """Serializa filas como JSON delimitado por saltos de línea"""
+    lines: List[str] = []
+    for row in rows:
+        lines.append(json.dumps({field: _format_json_value(row.get(field)) for field in EXPORT_FIELDS},
+                                ensure_ascii=False))
+        if len(lines) >= batch_size:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines = []
+
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Comprime un flujo de bloques en formato gzip sin acumularlo en memoria"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> cabecera gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(db: Session, formato: str = 'csv', comprimir: bool = False,
+                  batch_size: int = DEFAULT_BATCH_SIZE, csv_style: CsvStyle = CSV_STYLE_DEFAULT,
+                  **filters) -> Iterator[bytes]:
+    """Genera el archivo de exportación completo como una secuencia de bloques de bytes"""
+    if formato not in EXPORT_FORMATS:
+        raise ValueError(f"Formato no soportado: {formato}. Use uno de {', '.join(EXPORT_FORMATS)}")
+
+    rows = iter_export_rows(db, batch_size=batch_size, **filters)
+    if formato == 'csv':
+        chunks = iter_csv_chunks(rows, batch_size=batch_size, style=csv_style)
+    else:
+        chunks = iter_ndjson_chunks(rows, batch_size=batch_size)
+    return gzip_chunks(chunks) if comprimir else chunks
+
+
+def stream_export_with_session(formato: str = 'csv', comprimir: bool = False,
+                               csv_style: CsvStyle = CSV_STYLE_DEFAULT, **filters) -> Iterator[bytes]:
+    """
+    Igual que stream_export pero abre y cierra su propia sesión.
+    Se usa desde StreamingResponse, donde la respuesta sigue enviándose después de
+    que el endpoint retorna.
+    """
+    db = SessionLocal()
+    try:
+        yield from stream_export(db, formato=formato, comprimir=comprimir, csv_style=csv_style, **filters)
+    finally:
+        db.close()
+
+
+def export_filename(formato: str = 'csv', comprimir: bool = False, prefix: str = 'noticias_export') -> str:
+    """Nombre de archivo con timestamp para una exportación"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    suffix = '.gz' if comprimir else ''
+    return f"{prefix}_{timestamp}.{formato}{suffix}"
+
+
+def export_to_file(path: str, formato: str = 'csv', comprimir: bool = False,
+                   csv_style: CsvStyle = CSV_STYLE_DEFAULT, **filters) -> int:
+    """Escribe la exportación en disco bloque a bloque; retorna los bytes escritos"""
+    written = 0
+    with open(path, 'wb') as output:
+        for chunk in stream_export_with_session(formato=formato, comprimir=comprimir, csv_style=csv_style, **filters):
+            output.write(chunk)
+            written += len(chunk)
+    logger.info(f"✅ Exportación escrita en {path} ({written / 1024:.1f} KB)")
+    return written
@@ -0,0 +1,101 @@
+"""
+Feed público de publicaciones UGC.
+Los posts publicados se leen junto con el email del autor en una sola consulta (JOIN con
+proyección de las columnas que usa la respuesta) y cada página queda precalculada en memoria.
+La caché se invalida cuando cambia el conjunto publicado: aprobación, rechazo, flag por
+reportes, confirmación de fake o restauración del post.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models_ugc_enhanced import User, Post, EstadoPublicacion
+from upload_pipeline import image_renditions
+
+logger = logging.getLogger(__name__)
+
+# Las vistas y clicks del feed se refrescan como máximo cada este tiempo aunque no haya cambios de estado
+FEED_CACHE_MAX_AGE_SECONDS = float(os.getenv('UGC_FEED_CACHE_SECONDS', '300'))
+MAX_FEED_LIMIT = 100
+
+
+def build_feed_query(limit: int):
+    """Posts publicados más recientes con el email del autor (sin cargar entidades completas)"""
+    return select(
+        Post.id,
+        Post.user_id,
+        Post.tipo,
+        Post.titulo,
+        Post.contenido,
+        Post.descripcion,
+        Post.imagen_url,
+        Post.fuente,
+        Post.estado,
+        func.coalesce(Post.views, 0).label('views'),
+        func.coalesce(Post.clicks, 0).label('clicks'),
+        func.coalesce(Post.total_reportes, 0).label('total_reportes'),
+        Post.created_at,
+        User.email.label('user_email')
+    ).outerjoin(User, User.id == Post.user_id).where(
+        Post.estado == EstadoPublicacion.PUBLISHED.value
+    ).order_by(Post.created_at.desc()).limit(limit)
+
+
+class FeedService:
+    """Páginas del feed público precalculadas por límite"""
+
+    def __init__(self, max_age_seconds: float = FEED_CACHE_MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self._pages: Dict[int, List[Dict]] = {}
+        self._built_at: Dict[int, float] = {}
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Descarta todas las páginas (un post entró o salió del feed)"""
+        with self._lock:
+            self._pages.clear()
+            self._built_at.clear()
+            self._version += 1
+
+    @staticmethod
+    def _load(db: Session, limit: int) -> List[Dict]:
+        feed = []
+        for row in db.execute(build_feed_query(limit)):
+            item = row._asdict()
+            item.update(image_renditions(item['imagen_url']))
+            feed.append(item)
+        return feed
+
+    def get_page(self, db: Session, limit: int = MAX_FEED_LIMIT) -> List[Dict]:
+        """Feed con hasta `limit` posts, desde memoria si no hubo cambios"""
+        limit = max(1, min(limit, MAX_FEED_LIMIT))
+        with self._lock:
+            page = self._pages.get(limit)
+            if page is not None and time.time() - self._built_at[limit] < self.max_age_seconds:
+                return page
+            version = self._version
+
+        page = self._load(db, limit)
+        with self._lock:
+            # Si se invalidó mientras se consultaba, se responde pero no se guarda
+            if version == self._version:
+                self._pages[limit] = page
+                self._built_at[limit] = time.time()
+        return page
+
+
+_default_feed: Optional[FeedService] = None
+
+
+def get_feed_service() -> FeedService:
+    """Retorna el servicio de feed compartido del proceso"""
+    global _default_feed
+    if _default_feed is None:
+        _default_feed = FeedService()
+    return _default_feed
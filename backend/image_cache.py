@@ -0,0 +1,338 @@
+"""
+Caché de imágenes para /proxy-image.
+Las imágenes se guardan en disco direccionadas por contenido (sha256), con un índice SQLite
+URL(+ancho) -> contenido y desalojo LRU cuando se supera el tamaño máximo. Las descargas usan
+una sesión aiohttp compartida y las peticiones simultáneas de la misma imagen se unifican en
+una sola descarga. Con Pillow instalado se generan variantes redimensionadas en WebP.
+"""
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Optional, Tuple
+
+import aiohttp
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'images')
+DEFAULT_MAX_MB = 512
+
+# Anchos permitidos para las variantes (se usa el menor que cubra el pedido)
+VARIANT_WIDTHS = (160, 320, 480, 640, 800, 1024, 1280, 1600)
+WEBP_QUALITY = 80
+MAX_UPSTREAM_BYTES = 15 * 1024 * 1024
+FETCH_TIMEOUT_SECONDS = 10
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+class ImageFetchError(Exception):
+    """La imagen de origen no se pudo descargar (o no es una imagen)"""
+
+
+@dataclass
+class CachedImage:
+    path: str
+    content_type: str
+    size: int
+    etag: str
+
+
+def pick_variant_width(width: Optional[int]) -> Optional[int]:
+    """Ajusta el ancho pedido a uno de VARIANT_WIDTHS (acota la cantidad de variantes en disco)"""
+    if not width or width <= 0:
+        return None
+    for candidate in VARIANT_WIDTHS:
+        if candidate >= width:
+            return candidate
+    return VARIANT_WIDTHS[-1]
+
+
+def _resize_to_webp(data: bytes, width: int) -> Optional[bytes]:
+    """Redimensiona manteniendo proporción y codifica en WebP (se ejecuta en un hilo)"""
+    with Image.open(io.BytesIO(data)) as image:
+        if image.width <= width and image.format == 'WEBP':
+            return None
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format='WEBP', quality=WEBP_QUALITY, method=4)
+        return output.getvalue()
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def iter_file(file: BinaryIO, chunk_size: int = 64 * 1024):
+    """Lee un archivo abierto por bloques y lo cierra al terminar (para StreamingResponse)"""
+    with file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+class ImageCache:
+    """Almacén de imágenes en disco con índice LRU y descargas coalescidas"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or os.getenv('IMAGE_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv('IMAGE_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(self.cache_dir, 'index.sqlite3'), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                key TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                content_type TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_images_last_access ON images (last_access)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_images_digest ON images (digest)")
+        self._conn.commit()
+
+    # ===== Almacenamiento =====
+    # Los métodos de esta sección hacen I/O bloqueante (SQLite y disco): desde corrutinas se
+    # llaman con asyncio.to_thread para no detener el event loop.
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, digest[:2], digest)
+
+    @staticmethod
+    def _key(url: str, width: Optional[int]) -> str:
+        return f"{url}#w={width}" if width else url
+
+    def _lookup(self, key: str) -> Optional[CachedImage]:
+        """Busca una entrada y actualiza su último acceso; descarta entradas sin archivo"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest, content_type, size FROM images WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None
+            path = self._blob_path(row[0])
+            if not os.path.exists(path):
+                self._conn.execute("DELETE FROM images WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE images SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return CachedImage(path=path, content_type=row[1], size=row[2], etag=f'"{row[0][:32]}"')
+
+    def _store(self, key: str, data: bytes, content_type: str) -> CachedImage:
+        """Guarda el contenido (una sola copia por hash) y registra la clave"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO images (key, digest, content_type, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, digest, content_type, len(data), time.time())
+            )
+            self._conn.commit()
+        self._evict_if_needed()
+        return CachedImage(path=path, content_type=content_type, size=len(data), etag=f'"{digest[:32]}"')
+
+    def _link(self, key: str, image: CachedImage):
+        """Registra `key` apuntando a un contenido ya guardado (p. ej. una variante igual al original)"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO images (key, digest, content_type, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, os.path.basename(image.path), image.content_type, image.size, time.time())
+            )
+            self._conn.commit()
+
+    def total_bytes(self) -> int:
+        """Bytes ocupados en disco (cada contenido se cuenta una vez)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT digest, MAX(size) AS size FROM images GROUP BY digest)"
+            ).fetchone()
+        return row[0]
+
+    def _evict_if_needed(self):
+        """Desaloja las entradas usadas hace más tiempo hasta quedar bajo el 90% del máximo"""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+
+        target = self.max_bytes * 0.9
+        evicted = 0
+        with self._lock:
+            rows = self._conn.execute("SELECT key, digest, size FROM images ORDER BY last_access").fetchall()
+            for key, digest, size in rows:
+                if total <= target:
+                    break
+                self._conn.execute("DELETE FROM images WHERE key = ?", (key,))
+                still_used = self._conn.execute(
+                    "SELECT 1 FROM images WHERE digest = ? LIMIT 1", (digest,)
+                ).fetchone()
+                if not still_used:
+                    try:
+                        os.remove(self._blob_path(digest))
+                    except OSError:
+                        pass
+                    total -= size
+                evicted += 1
+            self._conn.commit()
+        logger.info(f"🧹 Caché de imágenes: {evicted} entradas desalojadas ({total / 1024 / 1024:.1f} MB en disco)")
+
+    # ===== Descarga =====
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, limit_per_host=8),
+                timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT_SECONDS),
+                headers={'User-Agent': USER_AGENT}
+            )
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def _fetch_upstream(self, url: str) -> Tuple[bytes, str]:
+        """Descarga la imagen original con límite de tamaño"""
+        session = await self._get_session()
+        try:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    raise ImageFetchError(f"HTTP {response.status}")
+                content_type = response.headers.get('Content-Type', 'image/jpeg').split(';')[0].strip()
+                if not content_type.startswith('image/'):
+                    raise ImageFetchError(f"Contenido no es imagen: {content_type}")
+                data = await response.content.read(MAX_UPSTREAM_BYTES + 1)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise ImageFetchError(str(e))
+
+        if len(data) > MAX_UPSTREAM_BYTES:
+            raise ImageFetchError("Imagen demasiado grande")
+        return data, content_type
+
+    async def _coalesced(self, key: str, producer) -> CachedImage:
+        """Ejecuta producer una sola vez por clave aunque lleguen varias peticiones a la vez"""
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # Se canceló la petición que descargaba, no esta: se vuelve a intentar
+                return await self._coalesced(key, producer)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await producer()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # El cliente que disparó la descarga se desconectó: los demás no deben quedar esperando
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Evita el aviso "exception was never retrieved" si nadie más esperaba
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _get_original(self, url: str) -> CachedImage:
+        cached = await asyncio.to_thread(self._lookup, url)
+        if cached:
+            return cached
+
+        async def produce():
+            data, content_type = await self._fetch_upstream(url)
+            return await asyncio.to_thread(self._store, url, data, content_type)
+
+        return await self._coalesced(url, produce)
+
+    async def get(self, url: str, width: Optional[int] = None) -> CachedImage:
+        """Imagen (original o variante WebP de ancho `width`) servida desde disco"""
+        width = pick_variant_width(width) if PIL_AVAILABLE else None
+        if not width:
+            return await self._get_original(url)
+
+        key = self._key(url, width)
+        cached = await asyncio.to_thread(self._lookup, key)
+        if cached:
+            return cached
+
+        async def produce():
+            original = await self._get_original(url)
+            data = await asyncio.to_thread(_read_file, original.path)
+            loop = asyncio.get_running_loop()
+            try:
+                webp = await loop.run_in_executor(None, _resize_to_webp, data, width)
+            except Exception as e:
+                # Formatos que Pillow no puede abrir (p. ej. SVG): se sirve el original
+                logger.debug(f"No se pudo redimensionar {url}: {e}")
+                webp = None
+            if webp is None:
+                # La variante es el original: se registra la clave para no volver a pasar por Pillow
+                await asyncio.to_thread(self._link, key, original)
+                return original
+            return await asyncio.to_thread(self._store, key, webp, 'image/webp')
+
+        return await self._coalesced(key, produce)
+
+    async def open(self, url: str, width: Optional[int] = None) -> Tuple[CachedImage, BinaryIO]:
+        """
+        Como get, pero con el archivo ya abierto: el desalojo de otra petición puede borrar el
+        blob antes de enviarlo, y un archivo abierto sigue legible aunque se borre.
+        """
+        for _ in range(2):
+            image = await self.get(url, width)
+            try:
+                return image, await asyncio.to_thread(open, image.path, 'rb')
+            except FileNotFoundError:
+                # Desalojada entre la búsqueda y la apertura: _lookup descarta la entrada y se descarga de nuevo
+                continue
+        raise ImageFetchError("La imagen se desalojó de la caché mientras se servía")
+
+
+_default_cache: Optional[ImageCache] = None
+
+
+def get_image_cache() -> ImageCache:
+    """Retorna la caché de imágenes compartida del proceso"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ImageCache()
+    return _default_cache
@@ -0,0 +1,192 @@
+"""
+Contadores write-behind para vistas, clicks e interacciones de posts UGC.
+Los incrementos se acumulan en memoria y un hilo los escribe cada pocos segundos con un
+único UPDATE ... SET views = views + n por post, en lugar de un commit por cada vista.
+Los ingresos (Ingreso) de esas interacciones también se agregan: una fila para el admin y
+otra para el creador por post y por intervalo.
+"""
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+
+from sqlalchemy import text
+
+from database import SessionLocal
+from models_ugc_enhanced import User, Post, Ingreso, RoleEnum
+from creator_stats_service import get_creator_stats_service
+from revenue_service import INGRESO_POR_INTERACCION, PORCENTAJE_ADMIN, PORCENTAJE_CREADOR
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_SECONDS = float(os.getenv('COUNTER_FLUSH_SECONDS', '5'))
+ADMIN_CACHE_SECONDS = 600
+
+COUNTER_COLUMNS = {
+    'view': 'views',
+    'click': 'clicks',
+    'other': 'interacciones'
+}
+
+UPDATE_COUNTERS_SQL = text("""
+    UPDATE posts
+    SET views = COALESCE(views, 0) + :views,
+        clicks = COALESCE(clicks, 0) + :clicks,
+        interacciones = COALESCE(interacciones, 0) + :interacciones
+    WHERE id = :post_id
+""")
+
+
+def counter_column(tipo: str) -> str:
+    """Columna de posts que corresponde a un tipo de interacción"""
+    return COUNTER_COLUMNS.get(tipo, 'interacciones')
+
+
+class InteractionCounterBuffer:
+    """Buffer en memoria de incrementos por post, vaciado periódicamente a la base de datos"""
+
+    def __init__(self, flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        self.flush_interval = flush_interval
+        self._counts: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        # Interacciones que generan ingresos, por post (y por tipo para el concepto)
+        self._revenue: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._admin_id: Optional[int] = None
+        self._admin_checked_at = 0.0
+
+    def _ensure_worker(self):
+        """Arranca el hilo de vaciado la primera vez que se registra algo"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ugc-counter-flush", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def record(self, post_id: int, tipo: str = 'view', revenue: bool = False, count: int = 1):
+        """Registra count interacciones de un tipo; no toca la base de datos"""
+        column = counter_column(tipo)
+        with self._lock:
+            self._counts[post_id][column] += count
+            if revenue:
+                self._revenue[post_id][tipo] += count
+        self._ensure_worker()
+
+    def pending(self, post_id: int, tipo: str = 'view') -> int:
+        """Incrementos aún no escritos para un post (para responder totales actualizados)"""
+        with self._lock:
+            counts = self._counts.get(post_id)
+            return counts.get(counter_column(tipo), 0) if counts else 0
+
+    def _get_admin_id(self, db) -> Optional[int]:
+        """Id del usuario admin que recibe su parte de los ingresos (en caché)"""
+        if self._admin_id is None or time.time() - self._admin_checked_at > ADMIN_CACHE_SECONDS:
+            admin = db.query(User.id).filter(User.role == RoleEnum.ADMIN).first()
+            self._admin_id = admin[0] if admin else None
+            self._admin_checked_at = time.time()
+            if not self._admin_id:
+                logger.warning("No se encontró usuario admin")
+        return self._admin_id
+
+    def _restore(self, counts: Dict[int, Dict[str, int]], revenue: Dict[int, Dict[str, int]]):
+        """Devuelve al buffer los incrementos de un vaciado fallido"""
+        with self._lock:
+            for post_id, columns in counts.items():
+                for column, value in columns.items():
+                    self._counts[post_id][column] += value
+            for post_id, tipos in revenue.items():
+                for tipo, value in tipos.items():
+                    self._revenue[post_id][tipo] += value
+
+    def flush(self) -> int:
+        """Escribe los incrementos acumulados; retorna cuántos posts se actualizaron"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._counts:
+                    return 0
+                counts, self._counts = self._counts, defaultdict(lambda: defaultdict(int))
+                revenue, self._revenue = self._revenue, defaultdict(lambda: defaultdict(int))
+
+            db = SessionLocal()
+            try:
+                db.execute(UPDATE_COUNTERS_SQL, [
+                    {
+                        'post_id': post_id,
+                        'views': columns.get('views', 0),
+                        'clicks': columns.get('clicks', 0),
+                        'interacciones': columns.get('interacciones', 0)
+                    }
+                    for post_id, columns in counts.items()
+                ])
+
+                if revenue:
+                    self._add_aggregated_income(db, revenue)
+
+                owners = [row[0] for row in db.query(Post.user_id).filter(
+                    Post.id.in_(list(counts.keys()))
+                ).distinct()]
+                db.commit()
+                # Las estadísticas de los creadores afectados dejan de ser válidas
+                get_creator_stats_service().invalidate_users(owners)
+                logger.debug(f"💾 Contadores UGC: {len(counts)} posts actualizados")
+                return len(counts)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error vaciando contadores UGC, se reintentará: {e}")
+                self._restore(counts, revenue)
+                return 0
+            finally:
+                db.close()
+
+    def _add_aggregated_income(self, db, revenue: Dict[int, Dict[str, int]]):
+        """Una fila de ingreso para admin y otra para el creador por post en este intervalo"""
+        owners = dict(db.query(Post.id, Post.user_id).filter(Post.id.in_(list(revenue.keys()))).all())
+        admin_id = self._get_admin_id(db)
+
+        for post_id, tipos in revenue.items():
+            creator_id = owners.get(post_id)
+            if creator_id is None:
+                continue
+            total = sum(tipos.values())
+            monto_total = total * INGRESO_POR_INTERACCION
+            detalle = ', '.join(f"{n} {tipo}" for tipo, n in tipos.items())
+
+            if admin_id:
+                db.add(Ingreso(
+                    user_id=admin_id,
+                    post_id=post_id,
+                    monto=monto_total * PORCENTAJE_ADMIN,
+                    tipo="admin",
+                    concepto=f"Ingreso admin por {detalle} en post #{post_id}"[:100]
+                ))
+            db.add(Ingreso(
+                user_id=creator_id,
+                post_id=post_id,
+                monto=monto_total * PORCENTAJE_CREADOR,
+                tipo="creator",
+                concepto=f"Ingreso creador por {detalle} en post #{post_id}"[:100]
+            ))
+
+    def stop(self):
+        """Detiene el hilo y escribe lo pendiente (se llama al cerrar la aplicación)"""
+        self._stop.set()
+        self.flush()
+
+
+_default_buffer: Optional[InteractionCounterBuffer] = None
+
+
+def get_counter_buffer() -> InteractionCounterBuffer:
+    """Retorna el buffer de contadores compartido del proceso"""
+    global _default_buffer
+    if _default_buffer is None:
+        _default_buffer = InteractionCounterBuffer()
+    return _default_buffer
@@ -0,0 +1,288 @@
+"""
+Cliente LLM asíncrono para el chatbot.
+Reutiliza conexiones con una única aiohttp.ClientSession, guarda respuestas por pregunta
+normalizada con TTL y consulta OpenRouter y Ollama en paralelo: gana la primera respuesta válida.
+Las URLs se configuran por variables de entorno, por lo que un servidor local puede
+reemplazar a los proveedores en pruebas.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Solo desde el entorno: sin clave, OpenRouter no se consulta
+OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+OPENROUTER_API_URL = os.getenv("OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
+OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "openai/gpt-3.5-turbo")
+
+OLLAMA_API_URL = os.getenv("OLLAMA_API_URL", "http://localhost:11434/api/generate")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama2")
+
+PREFERRED_LLM = os.getenv("PREFERRED_LLM", "openrouter")  # "openrouter" o "ollama"
+
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "10"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "600"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500"))
+
+
+def normalize_question(question: str) -> str:
+    """Clave de caché: minúsculas, sin tildes, sin signos y con espacios colapsados"""
+    text = unicodedata.normalize('NFKD', question.lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+class ResponseCache:
+    """Caché LRU en memoria con expiración por entrada"""
+
+    def __init__(self, ttl_seconds: float = LLM_CACHE_TTL_SECONDS, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Tuple[str, str]]:
+        entry = self._entries.get(key)
+        if not entry or entry[0] < time.time():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def set(self, key: str, answer: str, provider: str):
+        self._entries[key] = (time.time() + self.ttl_seconds, answer, provider)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class LLMClient:
+    """Acceso a OpenRouter y Ollama con pool de conexiones, caché y carrera entre proveedores"""
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.cache = ResponseCache()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Sesión compartida (keep-alive); se crea dentro del event loop de la aplicación"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=LLM_MAX_CONNECTIONS, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=LLM_TIMEOUT_SECONDS)
+            )
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    def providers(self) -> List[str]:
+        """Proveedores disponibles, el preferido primero"""
+        available = ['ollama']
+        if OPENROUTER_API_KEY:
+            available.insert(0, 'openrouter')
+        if PREFERRED_LLM in available:
+            available.remove(PREFERRED_LLM)
+            available.insert(0, PREFERRED_LLM)
+        return available
+
+    # ===== Peticiones por proveedor =====
+
+    @staticmethod
+    def _openrouter_request(system_prompt: str, question: str, stream: bool) -> Dict:
+        return {
+            "url": OPENROUTER_API_URL,
+            "json": {
+                "model": OPENROUTER_MODEL,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": question}
+                ],
+                "temperature": 0.7,
+                "max_tokens": 300,
+                "stream": stream
+            },
+            "headers": {
+                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                "Content-Type": "application/json"
+            }
+        }
+
+    @staticmethod
+    def _ollama_request(system_prompt: str, question: str, stream: bool) -> Dict:
+        return {
+            "url": OLLAMA_API_URL,
+            "json": {
+                "model": OLLAMA_MODEL,
+                "prompt": f"{system_prompt}\n\nPregunta del usuario: {question}\n",
+                "stream": stream
+            }
+        }
+
+    async def _complete(self, provider: str, system_prompt: str, question: str) -> Optional[str]:
+        """Respuesta completa de un proveedor, o None si falla"""
+        builder = self._openrouter_request if provider == 'openrouter' else self._ollama_request
+        request = builder(system_prompt, question, stream=False)
+        session = await self._get_session()
+        try:
+            async with session.post(request["url"], json=request["json"], headers=request.get("headers")) as response:
+                if response.status != 200:
+                    logger.error(f"Error en {provider}: {response.status} - {(await response.text())[:200]}")
+                    return None
+                data = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.error(f"Error llamando a {provider}: {e}")
+            return None
+
+        try:
+            if provider == 'openrouter':
+                answer = data["choices"][0]["message"]["content"]
+            else:
+                answer = data["response"]
+            return answer.strip() or None
+        except Exception as e:
+            # Respuestas sin choices, con content null o con otra forma no cuentan como respuesta
+            logger.error(f"Respuesta inválida de {provider}: {e}")
+            return None
+
+    async def _stream(self, provider: str, system_prompt: str, question: str) -> AsyncIterator[str]:
+        """Fragmentos de texto a medida que el proveedor los genera"""
+        builder = self._openrouter_request if provider == 'openrouter' else self._ollama_request
+        request = builder(system_prompt, question, stream=True)
+        session = await self._get_session()
+        async with session.post(request["url"], json=request["json"], headers=request.get("headers")) as response:
+            if response.status != 200:
+                raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status)
+            async for raw_line in response.content:
+                line = raw_line.decode('utf-8', errors='replace').strip()
+                if not line:
+                    continue
+                if provider == 'openrouter':
+                    # Server-Sent Events: "data: {...}" y un "data: [DONE]" final
+                    if not line.startswith('data:'):
+                        continue
+                    payload = line[5:].strip()
+                    if payload == '[DONE]':
+                        return
+                    delta = json.loads(payload).get("choices", [{}])[0].get("delta", {}).get("content")
+                else:
+                    # Ollama emite un objeto JSON por línea
+                    chunk = json.loads(line)
+                    delta = chunk.get("response")
+                    if chunk.get("done"):
+                        if delta:
+                            yield delta
+                        return
+                if delta:
+                    yield delta
+
+    # ===== API pública =====
+
+    def _cache_key(self, question: str, context: Optional[str]) -> str:
+        return f"{context or ''}|{normalize_question(question)}"
+
+    async def ask(self, system_prompt: str, question: str, context: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Consulta todos los proveedores a la vez y retorna (respuesta, proveedor) de la primera
+        respuesta válida; cancela las demás. (None, None) si ninguno responde.
+        """
+        key = self._cache_key(question, context)
+        cached = self.cache.get(key)
+        if cached:
+            logger.info(f"💾 Respuesta LLM desde caché ({cached[1]})")
+            return cached
+
+        tasks = {
+            asyncio.create_task(self._complete(provider, system_prompt, question)): provider
+            for provider in self.providers()
+        }
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled():
+                        continue
+                    if task.exception() is not None:
+                        # Un proveedor que falla cuenta como "sin respuesta": se espera a los demás
+                        logger.error(f"Error en {tasks[task]}: {task.exception()}")
+                        continue
+                    answer = task.result()
+                    if answer:
+                        provider = tasks[task]
+                        self.cache.set(key, answer, provider)
+                        return answer, provider
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        return None, None
+
+    async def ask_stream(self, system_prompt: str, question: str,
+                         context: Optional[str] = None) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Variante en streaming: produce (fragmento, proveedor). Prueba los proveedores en orden
+        de preferencia y solo pasa al siguiente si el actual falla antes de emitir texto.
+        """
+        key = self._cache_key(question, context)
+        cached = self.cache.get(key)
+        if cached:
+            yield cached[0], cached[1]
+            return
+
+        for provider in self.providers():
+            parts: List[str] = []
+            try:
+                async for delta in self._stream(provider, system_prompt, question):
+                    parts.append(delta)
+                    yield delta, provider
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, LookupError, AttributeError) as e:
+                logger.error(f"Error en streaming de {provider}: {e}")
+                if parts:
+                    return
+                continue
+
+            if parts:
+                self.cache.set(key, ''.join(parts).strip(), provider)
+                return
+
+    async def check_health(self) -> Optional[str]:
+        """Primer proveedor que responde a una petición liviana, o None"""
+        session = await self._get_session()
+        checks = {
+            'openrouter': OPENROUTER_API_URL.replace("/chat/completions", "/models"),
+            'ollama': OLLAMA_API_URL.replace("/api/generate", "/api/tags")
+        }
+        for provider in self.providers():
+            try:
+                async with session.get(checks[provider], timeout=aiohttp.ClientTimeout(total=5)) as response:
+                    if response.status == 200:
+                        return provider
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                continue
+        return None
+
+
+_default_client: Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    """Retorna el cliente compartido del proceso"""
+    global _default_client
+    if _default_client is None:
+        _default_client = LLMClient()
+    return _default_client
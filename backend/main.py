@@ -1,16 +1,16 @@
 ﻿from fastapi import FastAPI, Depends, HTTPException, Query
 from starlette.requests import Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
 from typing import List, Optional, Dict
 from datetime import datetime, timedelta, timezone
 import logging
-import requests
 import os
 from contextlib import asynccontextmanager
+from urllib.parse import urlparse
 
 # Configurar logging primero
 logging.basicConfig(level=logging.INFO)
@@ -36,6 +36,12 @@ except ImportError:
     # Usar versión simplificada si hay problemas con email
     from alert_system_simple import AlertSystemSimple as AlertSystem
 from scraping_service import ScrapingService
+from date_histogram_service import get_date_histogram_service, format_histogram
+from noticias_service import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, parse_campos, day_bounds, get_noticias_page, stream_noticias_json
+)
+from image_cache import get_image_cache, iter_file, ImageFetchError
+from export_service import EXPORT_FORMATS, export_filename, stream_export_with_session
 from pydantic import BaseModel
 
 # ===== IMPORTS UGC MEJORADO =====
@@ -175,11 +181,32 @@ async def lifespan(app: FastAPI):
     
     create_tables()
     init_diarios()
+    if SUBSCRIPTIONS_ENABLED:
+        # Expira en lote las suscripciones vencidas (las rutas de estado solo leen)
+        from subscription_state import get_expiry_sweeper
+        get_expiry_sweeper().start()
+    if CHATBOT_ENABLED:
+        # El índice BM25 del chatbot se construye en un hilo; las preguntas no esperan en el event loop
+        from news_retrieval import build_in_background
+        build_in_background()
     logger.info("Aplicación iniciada correctamente")
     
     yield
     
     logger.info("Cerrando aplicación...")
+    await get_image_cache().close()
+    if SUBSCRIPTIONS_ENABLED:
+        from subscription_state import get_expiry_sweeper
+        get_expiry_sweeper().stop()
+    if UGC_ENABLED:
+        # Escribir los contadores de vistas/clicks que quedan en memoria
+        from interaction_counters import get_counter_buffer
+        get_counter_buffer().stop()
+    try:
+        from llm_client import get_llm_client
+        await get_llm_client().close()
+    except ImportError:
+        pass
 
 app = FastAPI(
     title="API de Scraping de Diarios Peruanos",
@@ -215,9 +242,11 @@ if SUBSCRIPTIONS_ENABLED:
     logger.info("✅ Rutas de suscripciones disponibles: /subscriptions")
 
 # ===== INCLUIR RUTAS CHATBOT =====
+CHATBOT_ENABLED = False
 try:
     from chatbot_routes import router as chatbot_router
     app.include_router(chatbot_router)
+    CHATBOT_ENABLED = True
     logger.info("✅ Rutas del ChatBot disponibles: /chatbot")
 except ImportError as e:
     logger.warning(f"⚠️  Rutas del ChatBot no disponibles: {e}")
@@ -396,26 +425,9 @@ async def get_fechas_disponibles_por_diario(
     db: Session = Depends(get_db)
 ):
     """Obtener fechas disponibles para un diario específico"""
-    # Obtener fechas únicas para el diario específico
-    fechas = db.query(func.date(Noticia.fecha_publicacion).label('fecha')).join(Diario).filter(
-        Diario.nombre == nombre_diario,
-        Noticia.fecha_publicacion.isnot(None)
-    ).distinct().order_by(func.date(Noticia.fecha_publicacion).desc()).all()
-    
-    # Formatear fechas
-    fechas_formateadas = []
-    for fecha in fechas:
-        fecha_obj = fecha.fecha
-        if fecha_obj is not None:
-            fechas_formateadas.append({
-                "fecha": fecha_obj.strftime("%Y-%m-%d"),
-                "fecha_formateada": fecha_obj.strftime("%d/%m/%Y"),
-                "dia_semana": fecha_obj.strftime("%A"),
-                "total_noticias": db.query(func.count(Noticia.id)).join(Diario).filter(
-                    Diario.nombre == nombre_diario,
-                    func.date(Noticia.fecha_publicacion) == fecha_obj
-                ).scalar()
-            })
+    # Fechas y conteos en un solo GROUP BY (en caché hasta la próxima ingesta)
+    histogram = get_date_histogram_service().get_histogram(db, nombre_diario)
+    fechas_formateadas = format_histogram(histogram)
     
     return {
         "diario": nombre_diario,
@@ -584,20 +596,15 @@ async def get_noticias_por_fecha(
         logger.info(f"Fecha inicio: {fecha_inicio}, Fecha fin: {fecha_fin}")
         
         # Obtener noticias de esa fecha (filtrar por fecha de publicación)
-        query = db.query(Noticia).join(Diario).filter(
+        # El diario se carga en la misma consulta (sin una consulta extra por noticia)
+        query = db.query(Noticia).join(Diario).options(joinedload(Noticia.diario)).filter(
             Noticia.fecha_publicacion >= fecha_inicio,
             Noticia.fecha_publicacion <= fecha_fin
         ).order_by(Noticia.fecha_publicacion.desc())
         
-        # Eliminar duplicados por ID
-        noticias_raw = query.all()
-        seen_ids = set()
-        noticias = []
-        for noticia in noticias_raw:
-            if noticia.id not in seen_ids:
-                seen_ids.add(noticia.id)
-                noticias.append(noticia)
-        logger.info(f"Encontradas {len(noticias)} noticias únicas (después de eliminar duplicados)")
+        # El join con diarios es muchos-a-uno: no puede repetir noticias
+        noticias = query.all()
+        logger.info(f"Encontradas {len(noticias)} noticias")
         
         result = []
         for noticia in noticias:
@@ -628,32 +635,43 @@ async def get_noticias_por_fecha(
         logger.error(f"Error inesperado: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/noticias/por-fecha/paginado")
+async def get_noticias_por_fecha_paginado(
+    fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD (ej: 2025-09-07)"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Noticias por página"),
+    cursor: Optional[str] = Query(None, description="Cursor next_cursor de la página anterior"),
+    campos: Optional[str] = Query(None, description="Campos separados por coma (ej: id,titulo,imagen_url)"),
+    resumen: bool = Query(False, description="Proyección resumida sin contenido"),
+    db: Session = Depends(get_db)
+):
+    """Noticias de una fecha paginadas por cursor, con selección de campos"""
+    try:
+        fields = parse_campos(campos, resumen)
+        return get_noticias_page(db, fecha, fields, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/noticias/por-fecha/stream")
+async def stream_noticias_por_fecha(
+    fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD (ej: 2025-09-07)"),
+    campos: Optional[str] = Query(None, description="Campos separados por coma (ej: id,titulo,imagen_url)"),
+    resumen: bool = Query(False, description="Proyección resumida sin contenido")
+):
+    """Todas las noticias de una fecha como arreglo JSON en streaming"""
+    try:
+        fields = parse_campos(campos, resumen)
+        day_bounds(fecha)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(stream_noticias_json(fecha, fields), media_type="application/json")
+
 @app.get("/noticias/fechas-disponibles")
 async def get_fechas_disponibles(db: Session = Depends(get_db)):
     """Obtener todas las fechas que tienen noticias"""
-    from datetime import datetime
-    
-    # Obtener fechas únicas de noticias (por fecha de publicación)
-    fechas = db.query(
-        func.date(Noticia.fecha_publicacion).label('fecha')
-    ).distinct().order_by(
-        func.date(Noticia.fecha_publicacion).desc()
-    ).all()
-    
-    # Formatear fechas (filtrar las que son None)
-    fechas_formateadas = []
-    for fecha in fechas:
-        fecha_obj = fecha.fecha
-        # Solo procesar fechas que no sean None
-        if fecha_obj is not None:
-            fechas_formateadas.append({
-                "fecha": fecha_obj.strftime("%Y-%m-%d"),
-                "fecha_formateada": fecha_obj.strftime("%d/%m/%Y"),
-                "dia_semana": fecha_obj.strftime("%A"),
-                "total_noticias": db.query(func.count(Noticia.id)).filter(
-                    func.date(Noticia.fecha_publicacion) == fecha_obj
-                ).scalar()
-            })
+    # Fechas y conteos en un solo GROUP BY (en caché hasta la próxima ingesta)
+    histogram = get_date_histogram_service().get_histogram(db)
+    fechas_formateadas = format_histogram(histogram)
     
     return {
         "fechas": fechas_formateadas,
@@ -760,38 +778,76 @@ async def get_analisis_por_fechas(
     except ValueError:
         return {"error": "Formato de fecha inválido. Use YYYY-MM-DD"}
 
+@app.get("/export")
+async def exportar_noticias(
+    formato: str = Query("csv", description="Formato de salida: csv o ndjson"),
+    comprimir: bool = Query(False, description="Comprimir la salida con gzip"),
+    fecha_desde: Optional[str] = Query(None, description="Fecha inicio en formato YYYY-MM-DD"),
+    fecha_hasta: Optional[str] = Query(None, description="Fecha fin en formato YYYY-MM-DD"),
+    diario: Optional[str] = Query(None, description="Nombre del diario"),
+    categoria: Optional[str] = Query(None, description="Categoría de las noticias")
+):
+    """Exportar noticias en streaming (CSV o NDJSON, opcionalmente gzip) con memoria constante"""
+    if formato not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato inválido. Use uno de: {', '.join(EXPORT_FORMATS)}")
+
+    try:
+        desde = datetime.strptime(fecha_desde, "%Y-%m-%d").date() if fecha_desde else None
+        hasta = datetime.strptime(fecha_hasta, "%Y-%m-%d").date() if fecha_hasta else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
+
+    media_types = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+    filename = export_filename(formato, comprimir)
+    logger.info(f"📤 Exportando noticias a {filename} (desde={fecha_desde}, hasta={fecha_hasta}, diario={diario}, categoria={categoria})")
+
+    return StreamingResponse(
+        stream_export_with_session(
+            formato=formato,
+            comprimir=comprimir,
+            fecha_desde=desde,
+            fecha_hasta=hasta,
+            diario=diario,
+            categoria=categoria
+        ),
+        media_type='application/gzip' if comprimir else media_types[formato],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @app.get("/proxy-image")
-async def proxy_image(url: str = Query(..., description="URL de la imagen a servir")):
-    """Endpoint para servir imágenes como proxy, evitando problemas de CORS"""
+async def proxy_image(
+    request: Request,
+    url: str = Query(..., description="URL de la imagen a servir"),
+    w: Optional[int] = Query(None, ge=1, le=4000, description="Ancho deseado (genera una variante WebP)")
+):
+    """Endpoint para servir imágenes como proxy (con caché en disco), evitando problemas de CORS"""
+    # Validar que la URL sea de un diario permitido
+    allowed_domains = ['elcomercio.pe', 'diariocorreo.pe', 'elpopular.pe']
+    host = (urlparse(url).hostname or '').lower()
+    if not any(host == domain or host.endswith(f".{domain}") for domain in allowed_domains):
+        raise HTTPException(status_code=403, detail="Dominio no permitido")
+    
     try:
-        # Validar que la URL sea de un diario permitido
-        allowed_domains = ['elcomercio.pe', 'diariocorreo.pe', 'elpopular.pe']
-        if not any(domain in url for domain in allowed_domains):
-            raise HTTPException(status_code=403, detail="Dominio no permitido")
-        
-        # Hacer la petición a la imagen original
-        response = requests.get(url, stream=True, timeout=10)
-        response.raise_for_status()
-        
-        # Determinar el tipo de contenido
-        content_type = response.headers.get('content-type', 'image/jpeg')
-        
-        # Retornar la imagen como streaming response
-        return StreamingResponse(
-            response.iter_content(chunk_size=8192),
-            media_type=content_type,
-            headers={
-                "Cache-Control": "public, max-age=3600",  # Cache por 1 hora
-                "Access-Control-Allow-Origin": "*"
-            }
-        )
-        
-    except requests.RequestException as e:
+        image, file = await get_image_cache().open(url, w)
+    except ImageFetchError as e:
         logger.error(f"Error al obtener imagen {url}: {e}")
         raise HTTPException(status_code=404, detail="Imagen no encontrada")
     except Exception as e:
         logger.error(f"Error inesperado al servir imagen {url}: {e}")
         raise HTTPException(status_code=500, detail="Error interno del servidor")
+    
+    headers = {
+        "ETag": image.etag,
+        "Cache-Control": "public, max-age=86400",  # Cache por 1 día
+        "Access-Control-Allow-Origin": "*"
+    }
+    if request.headers.get("if-none-match") == image.etag:
+        file.close()
+        return Response(status_code=304, headers=headers)
+    
+    # Se envía desde el archivo ya abierto (sin cargarlo en memoria), así un desalojo concurrente no lo corta
+    headers["Content-Length"] = str(image.size)
+    return StreamingResponse(iter_file(file), media_type=image.content_type, headers=headers)
 
 @app.get("/noticias/{noticia_id}", response_model=NoticiaResponse)
 async def get_noticia_by_id(
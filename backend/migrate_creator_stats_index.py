@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Crear el índice (user_id, created_at) de posts usado por las estadísticas de creadores y
+los listados paginados de /ugc/my-posts. Ejecutar una sola vez en bases de datos existentes.
+"""
+
+import logging
+from sqlalchemy import text
+
+from database import engine
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_posts_user_created ON posts (user_id, created_at);",
+]
+
+
+def create_creator_indexes():
+    with engine.connect() as connection:
+        for statement in INDEXES:
+            logger.info(f"🛠️  {statement}")
+            connection.execute(text(statement))
+        connection.commit()
+        logger.info("✅ Índices de posts por creador listos.")
+
+
+def main():
+    logger.info("=== Migración índices de creadores iniciada ===")
+    create_creator_indexes()
+    logger.info("=== Migración índices de creadores finalizada ===")
+
+
+if __name__ == "__main__":
+    main()
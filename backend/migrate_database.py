@@ -132,6 +132,8 @@ def update_existing_news_hashes():
                 noticia.contenido_hash = enhanced_data.get('contenido_hash')
                 noticia.similarity_hash = enhanced_data.get('similarity_hash')
                 noticia.palabras_clave = enhanced_data.get('palabras_clave')
+                # La base premium depende de las palabras clave: se recalcula en el próximo refresco
+                noticia.premium_score_base = None
                 noticia.tiempo_lectura_min = enhanced_data.get('tiempo_lectura_min', 1)
                 
                 # Valores por defecto
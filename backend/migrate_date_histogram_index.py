@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Crear los índices de expresión sobre date(fecha_publicacion) usados por el histograma de fechas.
+Ejecutar una sola vez en bases de datos creadas antes de agregar los índices al modelo.
+"""
+
+import logging
+from sqlalchemy import text
+
+from database import engine
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_noticias_fecha_publicacion_date "
+    "ON noticias (date(fecha_publicacion));",
+    "CREATE INDEX IF NOT EXISTS ix_noticias_diario_fecha_publicacion_date "
+    "ON noticias (diario_id, date(fecha_publicacion));",
+]
+
+
+def create_date_indexes():
+    with engine.connect() as connection:
+        for statement in INDEXES:
+            logger.info(f"🛠️  {statement}")
+            connection.execute(text(statement))
+        connection.commit()
+        logger.info("✅ Índices de fecha listos.")
+
+
+def main():
+    logger.info("=== Migración índices de fecha iniciada ===")
+    create_date_indexes()
+    logger.info("=== Migración índices de fecha finalizada ===")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,20 @@
 #!/usr/bin/env python3
 """
-Agregar columna premium_score a noticias.
-Ejecutar una sola vez después de actualizar el código.
+Agregar columnas premium_score y premium_score_base a noticias y calcular la base de las
+noticias existentes. Ejecutar una sola vez después de actualizar el código; el cálculo usa el
+marco de backfill, así que se puede interrumpir y retomar (update_premium_scores solo completa
+la base de la ventana reciente).
 """
 
+import argparse
 import logging
+from types import SimpleNamespace
 from sqlalchemy import text
 
 from database import engine
+from models import Noticia
+from premium_service import calculate_premium_base
+from backfill import BackfillJob, add_backfill_arguments, run_backfill
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
@@ -25,9 +32,40 @@ def add_premium_score_column():
         logger.info("✅ Columna premium_score lista.")
 
 
+def add_premium_score_base_column():
+    query = text("""
+        ALTER TABLE IF EXISTS noticias
+        ADD COLUMN IF NOT EXISTS premium_score_base FLOAT;
+    """)
+    with engine.connect() as connection:
+        logger.info("🛠️  Agregando columna premium_score_base a noticias (si no existe)...")
+        connection.execute(query)
+        connection.commit()
+        logger.info("✅ Columna premium_score_base lista.")
+
+
+class PremiumBaseBackfill(BackfillJob):
+    """Completa premium_score_base de las noticias anteriores a la columna"""
+    name = "premium_score_base"
+    model = Noticia
+    columns = ("id", "popularidad_score", "es_trending", "categoria", "palabras_clave")
+
+    def filters(self):
+        return [Noticia.premium_score_base.is_(None)]
+
+    def enrich(self, row):
+        return {"id": row["id"], "premium_score_base": calculate_premium_base(SimpleNamespace(**row))}
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Migración premium_score")
+    add_backfill_arguments(parser)
+    args = parser.parse_args()
+
     logger.info("=== Migración premium_score iniciada ===")
     add_premium_score_column()
+    add_premium_score_base_column()
+    run_backfill(PremiumBaseBackfill(), args)
     logger.info("=== Migración premium_score finalizada ===")
 
 
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Crear la tabla post_reaction_counts y llenarla a partir de las reacciones existentes.
+Ejecutar una sola vez antes de desplegar los contadores de reacciones; se puede volver a
+ejecutar para recalcular los contadores desde cero.
+"""
+
+import logging
+from sqlalchemy import text
+
+from database import engine
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS post_reaction_counts (
+        post_id INTEGER PRIMARY KEY REFERENCES posts(id),
+        like_count INTEGER NOT NULL DEFAULT 0,
+        love_count INTEGER NOT NULL DEFAULT 0,
+        haha_count INTEGER NOT NULL DEFAULT 0,
+        sad_count INTEGER NOT NULL DEFAULT 0,
+        angry_count INTEGER NOT NULL DEFAULT 0,
+        total INTEGER NOT NULL DEFAULT 0
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_reactions_session_post ON reactions (session_id, post_id);",
+    "DELETE FROM post_reaction_counts;",
+    """
+    INSERT INTO post_reaction_counts (post_id, like_count, love_count, haha_count, sad_count, angry_count, total)
+    SELECT post_id,
+           SUM(CASE WHEN tipo = 'like' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN tipo = 'love' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN tipo = 'haha' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN tipo = 'sad' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN tipo = 'angry' THEN 1 ELSE 0 END),
+           COUNT(*)
+    FROM reactions
+    GROUP BY post_id;
+    """,
+]
+
+
+def backfill_reaction_counts():
+    with engine.begin() as connection:
+        for statement in STATEMENTS:
+            logger.info(f"🛠️  {' '.join(statement.split())[:80]}...")
+            connection.execute(text(statement))
+        total = connection.execute(text("SELECT COUNT(*) FROM post_reaction_counts")).scalar()
+        logger.info(f"✅ Contadores de reacciones listos para {total} posts.")
+
+
+def main():
+    logger.info("=== Migración contadores de reacciones iniciada ===")
+    backfill_reaction_counts()
+    logger.info("=== Migración contadores de reacciones finalizada ===")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-﻿from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Float, JSON
+﻿from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Float, JSON, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -40,6 +40,7 @@ class Noticia(Base):
     es_trending = Column(Boolean, default=False)
     es_premium = Column(Boolean, default=False)  # Contenido exclusivo para suscriptores
     premium_score = Column(Float, default=0.0)
+    premium_score_base = Column(Float, nullable=True)  # Parte estática del puntaje (sin frescura)
     palabras_clave = Column(JSON)  # Lista de palabras clave como JSON
     resumen_auto = Column(Text)  # Resumen automático
     idioma = Column(String(5), default='es')
@@ -63,6 +64,12 @@ class Noticia(Base):
     # Relación con diario
     diario = relationship("Diario", back_populates="noticias")
     
+    __table_args__ = (
+        # Índices de expresión para el histograma de fechas (GROUP BY date(fecha_publicacion))
+        Index('ix_noticias_fecha_publicacion_date', func.date(fecha_publicacion)),
+        Index('ix_noticias_diario_fecha_publicacion_date', diario_id, func.date(fecha_publicacion)),
+    )
+    
     def generate_hashes(self):
         """Generar hashes para detección de duplicados"""
         # Normalizar título (minúsculas, sin espacios extras, sin puntuación)
@@ -2,7 +2,7 @@
 Modelos mejorados para sistema UGC con revisión, reportes y detección de fake news
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Float, Enum as SQLEnum, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Float, Enum as SQLEnum, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -127,7 +127,10 @@ class User(Base):
 class Post(Base):
     """Modelo de publicación con estados y revisión"""
     __tablename__ = "posts"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index('ix_posts_user_created', 'user_id', 'created_at'),
+        {'extend_existing': True}
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -248,6 +251,14 @@ class Notification(Base):
     user = relationship("User", back_populates="notificaciones")
     post = relationship("Post")
 
+class TokenRevocation(Base):
+    """Tokens de un usuario emitidos antes de revoked_at dejan de ser válidos (suspensión, cambio de rol)"""
+    __tablename__ = "token_revocations"
+    __table_args__ = {'extend_existing': True}
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
 class SystemSettings(Base):
     """Configuración del sistema"""
     __tablename__ = "system_settings"
@@ -267,6 +278,7 @@ class Reaction(Base):
     __tablename__ = "reactions"
     __table_args__ = (
         UniqueConstraint('post_id', 'user_id', name='unique_user_post_reaction'),
+        Index('ix_reactions_session_post', 'session_id', 'post_id'),
         {'extend_existing': True}
     )
     
@@ -281,6 +293,19 @@ class Reaction(Base):
     post = relationship("Post", backref="reactions")
     user = relationship("User", backref="reactions")
 
+class PostReactionCount(Base):
+    """Contadores de reacciones por post (desnormalizados, se actualizan con cada reacción)"""
+    __tablename__ = "post_reaction_counts"
+    __table_args__ = {'extend_existing': True}
+    
+    post_id = Column(Integer, ForeignKey("posts.id"), primary_key=True)
+    like_count = Column(Integer, default=0, nullable=False)
+    love_count = Column(Integer, default=0, nullable=False)
+    haha_count = Column(Integer, default=0, nullable=False)
+    sad_count = Column(Integer, default=0, nullable=False)
+    angry_count = Column(Integer, default=0, nullable=False)
+    total = Column(Integer, default=0, nullable=False)
+
 class Ingreso(Base):
     """Modelo de ingresos (sin cambios)"""
     __tablename__ = "ingresos"
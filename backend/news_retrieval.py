@@ -0,0 +1,242 @@
+"""
+Índice de recuperación de noticias para el chatbot.
+Índice invertido en memoria con ranking BM25 sobre título, resumen, palabras clave y el
+inicio del contenido. Se construye una vez y luego solo agrega las noticias con id mayor
+al último indexado, así cada pregunta se responde en milisegundos sin escanear la tabla.
+es_premium no se guarda en el índice (se recalcula sobre noticias existentes): el filtro premium
+se consulta en la base de datos solo para los mejores candidatos.
+"""
+import logging
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Diario, Noticia
+
+logger = logging.getLogger(__name__)
+
+# Caracteres del contenido que se indexan (el inicio de la nota concentra la información)
+CONTENT_PREFIX_CHARS = int(os.getenv('RETRIEVAL_CONTENT_CHARS', '1500'))
+# Cada cuántos segundos como máximo se revisa si hay noticias nuevas en la base de datos
+REFRESH_INTERVAL_SECONDS = float(os.getenv('RETRIEVAL_REFRESH_SECONDS', '30'))
+# El título pesa más que el cuerpo
+TITLE_WEIGHT = 3
+# Candidatos por consulta al filtrar premium (por clave primaria)
+PREMIUM_CHECK_BATCH = 100
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOP_WORDS = {
+    'el', 'la', 'los', 'las', 'de', 'del', 'en', 'un', 'una', 'unos', 'unas', 'al', 'y', 'o', 'a',
+    'que', 'cual', 'cuales', 'como', 'cuando', 'donde', 'quien', 'quienes', 'por', 'para', 'con',
+    'sin', 'sobre', 'entre', 'hasta', 'desde', 'tras', 'soy', 'eres', 'es', 'somos', 'son', 'fue',
+    'fueron', 'sera', 'ser', 'esta', 'estan', 'este', 'estos', 'estas', 'ese', 'esa', 'eso',
+    'tengo', 'tiene', 'tenemos', 'tienen', 'habia', 'hay', 'habra', 'ha', 'han', 'puedo', 'puede',
+    'podemos', 'pueden', 'debo', 'debe', 'me', 'te', 'se', 'nos', 'os', 'le', 'les', 'lo', 'su',
+    'sus', 'mas', 'muy', 'ya', 'pero', 'si', 'no', 'mi', 'tu', 'noticia', 'noticias', 'dime',
+    'sabes', 'algo', 'acerca', 'informacion', 'ultimas', 'ultima', 'hoy', 'dia'
+}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas y sin tildes para que 'Perú' y 'peru' coincidan"""
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Tokens significativos de un texto (sin stop words ni palabras muy cortas)"""
+    if not text:
+        return []
+    return [token for token in TOKEN_RE.findall(normalize_text(text))
+            if len(token) > 2 and token not in STOP_WORDS and not token.isdigit()]
+
+
+class NewsRetrievalIndex:
+    """Índice invertido token -> {noticia_id: frecuencia} con puntuación BM25"""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._doc_len: Dict[int, int] = {}
+        self._docs: Dict[int, Dict] = {}
+        self._total_len = 0
+        self._last_id = 0
+        self._last_check = 0.0
+        self._stale = True
+        self._lock = threading.RLock()
+
+    @property
+    def size(self) -> int:
+        return len(self._doc_len)
+
+    def mark_stale(self):
+        """Fuerza a revisar la base de datos en la próxima búsqueda (se llama tras cada ingesta)"""
+        self._stale = True
+
+    def _add_document(self, row: Dict):
+        """Agrega una noticia al índice"""
+        tokens = tokenize(row['titulo']) * TITLE_WEIGHT
+        tokens += tokenize(row.get('resumen_auto'))
+        tokens += tokenize(row.get('contenido_inicio'))
+        palabras_clave = row.get('palabras_clave')
+        if isinstance(palabras_clave, list):
+            tokens += tokenize(' '.join(str(palabra) for palabra in palabras_clave))
+        if not tokens:
+            return
+
+        doc_id = row['id']
+        for token, tf in Counter(tokens).items():
+            self._postings[token][doc_id] = tf
+        self._doc_len[doc_id] = len(tokens)
+        self._total_len += len(tokens)
+        self._docs[doc_id] = {
+            'id': doc_id,
+            'titulo': row['titulo'],
+            'enlace': row.get('enlace'),
+            'categoria': row.get('categoria'),
+            'diario_nombre': row.get('diario_nombre'),
+            'fecha_publicacion': row.get('fecha_publicacion'),
+            'resumen': row.get('resumen_auto') or (row.get('contenido_inicio') or '')[:300]
+        }
+
+    def refresh(self, db: Session, batch_size: int = 2000) -> int:
+        """Indexa las noticias con id mayor al último indexado; retorna cuántas se agregaron"""
+        with self._lock:
+            query = select(
+                Noticia.id,
+                Noticia.titulo,
+                Noticia.enlace,
+                Noticia.categoria,
+                Noticia.fecha_publicacion,
+                Noticia.resumen_auto,
+                Noticia.palabras_clave,
+                func.substr(Noticia.contenido, 1, CONTENT_PREFIX_CHARS).label('contenido_inicio'),
+                Diario.nombre.label('diario_nombre')
+            ).join(Diario, Noticia.diario_id == Diario.id).where(
+                Noticia.id > self._last_id
+            ).order_by(Noticia.id).execution_options(yield_per=batch_size, stream_results=True)
+
+            started = time.time()
+            added = 0
+            for row in db.execute(query):
+                row = row._asdict()
+                self._add_document(row)
+                self._last_id = row['id']
+                added += 1
+
+            self._stale = False
+            self._last_check = time.time()
+            if added:
+                logger.info(f"🔎 Índice del chatbot: {added} noticias indexadas en {time.time() - started:.2f}s "
+                            f"(total {self.size}, {len(self._postings)} términos)")
+            return added
+
+    def ensure_fresh(self, db: Session):
+        """Refresca el índice si se marcó como desactualizado o si pasó el intervalo de revisión"""
+        if not self._stale and time.time() - self._last_check < REFRESH_INTERVAL_SECONDS:
+            return
+        max_id = db.query(func.max(Noticia.id)).scalar() or 0
+        if max_id > self._last_id:
+            self.refresh(db)
+        else:
+            self._stale = False
+            self._last_check = time.time()
+
+    def search(self, query: str, k: int = 5, diario: Optional[str] = None,
+               premium_only: bool = False, db: Optional[Session] = None) -> List[Dict]:
+        """Top-k noticias para la consulta, cada una con su puntuación BM25 (premium_only requiere db)"""
+        if premium_only and db is None:
+            raise ValueError("premium_only requiere una sesión para consultar es_premium")
+        terms = set(tokenize(query))
+        if not terms or not self._doc_len:
+            return []
+
+        with self._lock:
+            n_docs = len(self._doc_len)
+            avg_len = self._total_len / n_docs
+            scores: Dict[int, float] = defaultdict(float)
+
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_len[doc_id] / avg_len)
+                    scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+            diario_filter = normalize_text(diario) if diario else None
+            ranked = []
+            for doc_id, score in sorted(scores.items(), key=lambda item: item[1], reverse=True):
+                doc = self._docs[doc_id]
+                if diario_filter and diario_filter not in normalize_text(doc['diario_nombre'] or ''):
+                    continue
+                ranked.append({**doc, 'score': round(score, 4)})
+                if not premium_only and len(ranked) >= k:
+                    break
+
+        if not premium_only:
+            return ranked
+        results = []
+        for start in range(0, len(ranked), PREMIUM_CHECK_BATCH):
+            batch = ranked[start:start + PREMIUM_CHECK_BATCH]
+            premium_ids = _premium_ids(db, [doc['id'] for doc in batch])
+            results += [doc for doc in batch if doc['id'] in premium_ids]
+            if len(results) >= k:
+                break
+        return results[:k]
+
+
+def _premium_ids(db: Session, ids: List[int]) -> set:
+    """Cuáles de las noticias son premium ahora (el indicador cambia al recalcular el puntaje)"""
+    return set(db.scalars(select(Noticia.id).where(Noticia.id.in_(ids), Noticia.es_premium.is_(True))))
+
+
+def format_grounding_context(results: List[Dict], max_chars_per_doc: int = 300) -> str:
+    """Texto compacto con las noticias recuperadas para incluir en el prompt del LLM"""
+    lines = []
+    for i, doc in enumerate(results, 1):
+        fecha = doc['fecha_publicacion'].strftime("%d/%m/%Y") if isinstance(doc.get('fecha_publicacion'), datetime) else "s/f"
+        resumen = (doc.get('resumen') or '').replace('\n', ' ')[:max_chars_per_doc]
+        lines.append(f"[{i}] {doc['titulo']} ({doc.get('diario_nombre')}, {fecha}, {doc.get('categoria')}): {resumen}")
+    return '\n'.join(lines)
+
+
+_default_index: Optional[NewsRetrievalIndex] = None
+
+
+def get_retrieval_index() -> NewsRetrievalIndex:
+    """Retorna el índice compartido del proceso"""
+    global _default_index
+    if _default_index is None:
+        _default_index = NewsRetrievalIndex()
+    return _default_index
+
+
+def build_in_background() -> threading.Thread:
+    """Construye el índice al iniciar la aplicación, fuera del event loop, para que no lo haga la primera pregunta"""
+    def build():
+        db = SessionLocal()
+        try:
+            get_retrieval_index().ensure_fresh(db)
+        except Exception as e:
+            logger.error(f"❌ Error construyendo el índice de recuperación: {e}")
+        finally:
+            db.close()
+
+    thread = threading.Thread(target=build, name="retrieval-index", daemon=True)
+    thread.start()
+    return thread
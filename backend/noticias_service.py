@@ -0,0 +1,150 @@
+"""
+Consultas livianas de noticias por fecha.
+Proyecta solo las columnas pedidas (sin cargar contenido si no hace falta), pagina con cursor
+(fecha_publicacion, id) y permite emitir el día completo como JSON en streaming.
+"""
+import base64
+import json
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Diario, Noticia
+
+logger = logging.getLogger(__name__)
+
+# Campos que se pueden pedir con ?campos=... (mismos nombres que NoticiaResponse)
+NOTICIA_FIELDS = [
+    'id', 'titulo', 'contenido', 'enlace', 'imagen_url', 'video_url', 'categoria',
+    'fecha_publicacion', 'fecha_extraccion', 'diario_id', 'diario_nombre',
+    'autor', 'tags', 'sentimiento', 'tiempo_lectura_min', 'popularidad_score',
+    'es_trending', 'palabras_clave', 'resumen_auto', 'idioma', 'region',
+    'es_alerta', 'nivel_urgencia', 'keywords_alerta',
+    'geographic_type', 'geographic_confidence', 'geographic_keywords', 'es_premium'
+]
+
+# Proyección resumida para listados (tarjetas del frontend): sin contenido ni metadatos pesados
+SUMMARY_FIELDS = [
+    'id', 'titulo', 'enlace', 'imagen_url', 'video_url', 'categoria',
+    'fecha_publicacion', 'diario_id', 'diario_nombre', 'sentimiento',
+    'geographic_type', 'es_premium'
+]
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+
+
+def parse_campos(campos: Optional[str], resumen: bool = False) -> List[str]:
+    """Lista de campos a proyectar; ValueError si se pide un campo desconocido"""
+    if campos:
+        requested = [campo.strip() for campo in campos.split(',') if campo.strip()]
+        unknown = [campo for campo in requested if campo not in NOTICIA_FIELDS]
+        if unknown:
+            raise ValueError(f"Campos desconocidos: {', '.join(unknown)}")
+        # id y fecha_publicacion son necesarios para el cursor
+        fields = ['id'] + [campo for campo in requested if campo != 'id']
+        if 'fecha_publicacion' not in fields:
+            fields.append('fecha_publicacion')
+        return fields
+    return list(SUMMARY_FIELDS if resumen else NOTICIA_FIELDS)
+
+
+def day_bounds(fecha: str) -> Tuple[datetime, datetime]:
+    """Rango [inicio, fin) de un día en formato YYYY-MM-DD"""
+    fecha_obj = datetime.strptime(fecha, "%Y-%m-%d").date()
+    inicio = datetime.combine(fecha_obj, datetime.min.time())
+    return inicio, inicio + timedelta(days=1)
+
+
+def encode_cursor(fecha_publicacion: datetime, noticia_id: int) -> str:
+    """Cursor opaco con la clave de orden de la última fila entregada"""
+    raw = f"{fecha_publicacion.isoformat()}|{noticia_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverso de encode_cursor; ValueError si el cursor no es válido"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        fecha_iso, noticia_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(fecha_iso), int(noticia_id)
+    except Exception:
+        raise ValueError("Cursor inválido")
+
+
+def build_day_query(fecha: str, fields: List[str], cursor: Optional[str] = None):
+    """Proyección de las columnas pedidas para un día, ordenada por (fecha_publicacion, id) desc"""
+    inicio, fin = day_bounds(fecha)
+    columns = [
+        Diario.nombre.label('diario_nombre') if field == 'diario_nombre' else getattr(Noticia, field).label(field)
+        for field in fields
+    ]
+    query = select(*columns).select_from(Noticia).join(Diario, Noticia.diario_id == Diario.id).where(
+        Noticia.fecha_publicacion >= inicio,
+        Noticia.fecha_publicacion < fin
+    )
+    if cursor:
+        cursor_fecha, cursor_id = decode_cursor(cursor)
+        query = query.where(tuple_(Noticia.fecha_publicacion, Noticia.id) < tuple_(cursor_fecha, cursor_id))
+
+    return query.order_by(Noticia.fecha_publicacion.desc(), Noticia.id.desc())
+
+
+def get_noticias_page(db: Session, fecha: str, fields: List[str], limit: int = DEFAULT_PAGE_SIZE,
+                      cursor: Optional[str] = None) -> Dict:
+    """Una página de noticias del día más el cursor para pedir la siguiente"""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    # Se pide una fila extra para saber si hay más páginas sin un COUNT aparte
+    rows = db.execute(build_day_query(fecha, fields, cursor).limit(limit + 1)).all()
+
+    has_more = len(rows) > limit
+    items = [row._asdict() for row in rows[:limit]]
+    next_cursor = None
+    if has_more and items:
+        last = items[-1]
+        next_cursor = encode_cursor(last['fecha_publicacion'], last['id'])
+
+    return {
+        "fecha": fecha,
+        "noticias": items,
+        "cantidad": len(items),
+        "next_cursor": next_cursor,
+        "has_more": has_more
+    }
+
+
+def _json_default(value):
+    """Serializa fechas para json.dumps"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def stream_noticias_json(fecha: str, fields: List[str]) -> Iterator[bytes]:
+    """
+    Emite todas las noticias del día como un arreglo JSON, leyendo con cursor del servidor.
+    Abre su propia sesión porque StreamingResponse sigue enviando después de que el endpoint retorna.
+    """
+    db = SessionLocal()
+    try:
+        query = build_day_query(fecha, fields).execution_options(yield_per=STREAM_BATCH_SIZE, stream_results=True)
+        yield b'['
+        first = True
+        buffer: List[str] = []
+        for row in db.execute(query):
+            item = json.dumps(row._asdict(), ensure_ascii=False, default=_json_default)
+            buffer.append(item if first else ',' + item)
+            first = False
+            if len(buffer) >= STREAM_BATCH_SIZE:
+                yield ''.join(buffer).encode('utf-8')
+                buffer = []
+        if buffer:
+            yield ''.join(buffer).encode('utf-8')
+        yield b']'
+    finally:
+        db.close()
@@ -0,0 +1,307 @@
+"""
+Snapshot analítico de noticias en formato Parquet.
+Escribe un dataset particionado por fecha y diario (estilo Hive: fecha=YYYY-MM-DD/diario=...),
+con columnas categóricas codificadas como diccionario y listas nativas para tags y palabras clave.
+Cada ejecución agrega solo las noticias nuevas desde el último snapshot; los días ya cerrados
+se compactan a un archivo por partición para que el dataset no acumule miles de archivos chicos.
+"""
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from database import SessionLocal
+from export_service import iter_export_rows
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_DIR = os.getenv(
+    'PARQUET_SNAPSHOT_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'exports', 'parquet')
+)
+STATE_FILENAME = '_snapshot_state.json'
+
+# Filas por archivo Parquet escrito (cada lote genera un archivo por partición)
+DEFAULT_ROWS_PER_BATCH = int(os.getenv('PARQUET_ROWS_PER_BATCH', '50000'))
+# Un día se considera cerrado (y se compacta) cuando tiene al menos esta antigüedad
+COMPACT_AFTER_DAYS = int(os.getenv('PARQUET_COMPACT_AFTER_DAYS', '1'))
+
+LIST_FIELDS = ('tags', 'palabras_clave', 'keywords_alerta', 'geographic_keywords')
+
+
+def _snapshot_schema():
+    """Esquema del dataset: columnas de baja cardinalidad como diccionario, keywords como listas"""
+    categorical = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ('id', pa.int64()),
+        ('titulo', pa.string()),
+        ('contenido', pa.string()),
+        ('enlace', pa.string()),
+        ('imagen_url', pa.string()),
+        ('categoria', categorical),
+        ('fecha_publicacion', pa.timestamp('us')),
+        ('fecha_extraccion', pa.timestamp('us')),
+        ('diario_id', pa.int32()),
+        ('autor', pa.string()),
+        ('tags', pa.list_(pa.string())),
+        ('sentimiento', categorical),
+        ('tiempo_lectura_min', pa.int32()),
+        ('popularidad_score', pa.float64()),
+        ('es_trending', pa.bool_()),
+        ('palabras_clave', pa.list_(pa.string())),
+        ('resumen_auto', pa.string()),
+        ('idioma', categorical),
+        ('region', categorical),
+        ('titulo_hash', pa.string()),
+        ('contenido_hash', pa.string()),
+        ('similarity_hash', pa.string()),
+        ('es_alerta', pa.bool_()),
+        ('nivel_urgencia', categorical),
+        ('keywords_alerta', pa.list_(pa.string())),
+        ('geographic_type', categorical),
+        ('geographic_confidence', pa.float64()),
+        ('geographic_keywords', pa.list_(pa.string())),
+        # Columnas de partición
+        ('fecha', pa.string()),
+        ('diario', pa.string())
+    ])
+
+
+def _as_string_list(value) -> Optional[List[str]]:
+    """Normaliza un campo JSON a lista de strings (algunas filas antiguas guardan dicts o strings)"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return [value]
+    if isinstance(value, dict):
+        value = list(value.keys())
+    if not isinstance(value, (list, tuple)):
+        return [str(value)]
+    return [item if isinstance(item, str) else json.dumps(item, ensure_ascii=False) for item in value]
+
+
+def _prepare_row(row: Dict) -> Dict:
+    """Adapta una fila del servicio de exportación al esquema del snapshot"""
+    for field in LIST_FIELDS:
+        row[field] = _as_string_list(row.get(field))
+    fecha = row.get('fecha_publicacion') or row.get('fecha_extraccion')
+    row['fecha'] = fecha.strftime('%Y-%m-%d') if fecha else 'sin_fecha'
+    row['diario'] = row.pop('diario_nombre', None) or 'desconocido'
+    return row
+
+
+class ParquetSnapshot:
+    """Dataset Parquet incremental: recuerda el último id exportado y solo agrega filas nuevas"""
+
+    def __init__(self, snapshot_dir: Optional[str] = None, rows_per_batch: int = DEFAULT_ROWS_PER_BATCH):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow no está instalado. Instálalo con: pip install pyarrow")
+        self.snapshot_dir = os.path.normpath(snapshot_dir or DEFAULT_SNAPSHOT_DIR)
+        self.rows_per_batch = rows_per_batch
+        self.state_path = os.path.join(self.snapshot_dir, STATE_FILENAME)
+        self.schema = _snapshot_schema()
+
+    def load_state(self) -> Dict:
+        """Estado del último snapshot (último id exportado, filas totales, fecha)"""
+        if not os.path.exists(self.state_path):
+            return {'last_id': 0, 'total_rows': 0, 'updated_at': None}
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_state(self, state: Dict, target_dir: Optional[str] = None):
+        """Guarda el estado de forma atómica, solo después de escribir los archivos"""
+        target_dir = target_dir or self.snapshot_dir
+        os.makedirs(target_dir, exist_ok=True)
+        state_path = os.path.join(target_dir, STATE_FILENAME)
+        tmp_path = f"{state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, state_path)
+
+    def _write_batch(self, rows: List[Dict], run_id: str, batch_number: int, target_dir: Optional[str] = None) -> Set[str]:
+        """
+        Escribe un lote de filas como archivos Parquet nuevos dentro de sus particiones. El lote se
+        escribe primero en un directorio oculto (ignorado por los lectores) y sus archivos se mueven
+        a las particiones solo si la escritura terminó; si algo falla no queda nada del lote.
+        Retorna las fechas de partición tocadas.
+        """
+        target_dir = target_dir or self.snapshot_dir
+        staging_dir = os.path.join(target_dir, f".staging-{run_id}-{batch_number}")
+        table = pa.Table.from_pylist(rows, schema=self.schema)
+        moved = []
+        try:
+            ds.write_dataset(
+                table,
+                staging_dir,
+                format='parquet',
+                partitioning=ds.partitioning(pa.schema([('fecha', pa.string()), ('diario', pa.string())]), flavor='hive'),
+                basename_template=f"part-{run_id}-{batch_number}-{{i}}.parquet",
+                existing_data_behavior='overwrite_or_ignore',
+                file_options=ds.ParquetFileFormat().make_write_options(compression='zstd')
+            )
+            for root, _, files in os.walk(staging_dir):
+                partition_dir = os.path.join(target_dir, os.path.relpath(root, staging_dir))
+                for name in files:
+                    os.makedirs(partition_dir, exist_ok=True)
+                    destination = os.path.join(partition_dir, name)
+                    os.replace(os.path.join(root, name), destination)
+                    moved.append(destination)
+        except BaseException:
+            for path in moved:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            raise
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        return {row['fecha'] for row in rows}
+
+    def _swap_in(self, build_dir: str, destination: Optional[str] = None):
+        """Reemplaza un directorio (por defecto el snapshot completo) por uno recién construido"""
+        destination = destination or self.snapshot_dir
+        old_dir = None
+        if os.path.exists(destination):
+            old_dir = os.path.join(os.path.dirname(destination), f".old-{uuid.uuid4().hex}")
+            os.replace(destination, old_dir)
+        os.replace(build_dir, destination)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+    @staticmethod
+    def closed_days(fechas: Iterable[str], now: Optional[datetime] = None) -> List[str]:
+        """Fechas de partición con al menos COMPACT_AFTER_DAYS días de antigüedad ('sin_fecha' nunca cierra)"""
+        limit = ((now or datetime.now()) - timedelta(days=COMPACT_AFTER_DAYS)).strftime('%Y-%m-%d')
+        return sorted(fecha for fecha in fechas if fecha != 'sin_fecha' and fecha <= limit)
+
+    def _compact_partition(self, partition_dir: str):
+        """Reescribe los archivos de una partición fecha=/diario= en uno solo y lo cambia de forma atómica"""
+        table = ds.dataset(partition_dir, format='parquet').to_table().sort_by('id')
+        build_dir = os.path.join(os.path.dirname(partition_dir), f".compact-{uuid.uuid4().hex}")
+        os.makedirs(build_dir)
+        try:
+            pq.write_table(table, os.path.join(build_dir, f"part-{uuid.uuid4().hex}.parquet"), compression='zstd')
+        except BaseException:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            raise
+        self._swap_in(build_dir, partition_dir)
+
+    def compact(self, fechas: Optional[Iterable[str]] = None, target_dir: Optional[str] = None) -> int:
+        """
+        Deja un solo archivo en cada partición de las fechas indicadas (todas si no se indican).
+        Retorna cuántas particiones se reescribieron.
+        """
+        target_dir = target_dir or self.snapshot_dir
+        if fechas is None:
+            fechas = [name.split('=', 1)[1] for name in os.listdir(target_dir)
+                      if name.startswith('fecha=')] if os.path.isdir(target_dir) else []
+
+        compacted = 0
+        for fecha in fechas:
+            fecha_dir = os.path.join(target_dir, f"fecha={fecha}")
+            if not os.path.isdir(fecha_dir):
+                continue
+            for name in os.listdir(fecha_dir):
+                partition_dir = os.path.join(fecha_dir, name)
+                if name.startswith(('.', '_')) or not os.path.isdir(partition_dir):
+                    continue
+                files = [f for f in os.listdir(partition_dir) if f.endswith('.parquet') and not f.startswith(('.', '_'))]
+                if len(files) > 1:
+                    self._compact_partition(partition_dir)
+                    compacted += 1
+        if compacted:
+            logger.info(f"🗜️ Snapshot Parquet: {compacted} particiones compactadas")
+        return compacted
+
+    def update(self, full: bool = False) -> int:
+        """
+        Agrega al dataset las noticias con id mayor al último exportado.
+        Con full=True se reconstruye todo en un directorio temporal, compactado, que reemplaza al
+        snapshot anterior solo si la exportación termina bien (así no quedan filas duplicadas).
+        En las actualizaciones incrementales se compactan los días cerrados que recibieron filas.
+        Retorna la cantidad de filas nuevas.
+        """
+        state = {'last_id': 0, 'total_rows': 0, 'updated_at': None} if full else self.load_state()
+        last_id = state['last_id']
+        run_id = uuid.uuid4().hex
+        target_dir = f"{self.snapshot_dir}.build-{run_id}" if full else self.snapshot_dir
+
+        logger.info(f"📦 Actualizando snapshot Parquet en {self.snapshot_dir} (desde id {last_id})")
+
+        db = SessionLocal()
+        new_rows = 0
+        batch: List[Dict] = []
+        batch_number = 0
+        touched: Set[str] = set()
+        completed = False
+        try:
+            for row in iter_export_rows(db, batch_size=min(self.rows_per_batch, 5000), desde_id=last_id):
+                batch.append(_prepare_row(row))
+                if len(batch) >= self.rows_per_batch:
+                    touched |= self._write_batch(batch, run_id, batch_number, target_dir)
+                    new_rows += len(batch)
+                    last_id = batch[-1]['id']
+                    batch = []
+                    batch_number += 1
+
+            if batch:
+                touched |= self._write_batch(batch, run_id, batch_number, target_dir)
+                new_rows += len(batch)
+                last_id = batch[-1]['id']
+            if full:
+                self.compact(target_dir=target_dir)
+            completed = True
+        finally:
+            db.close()
+            if full:
+                # La reconstrucción completa es todo o nada: si falla, el snapshot anterior queda intacto
+                if completed:
+                    state.update({
+                        'last_id': last_id,
+                        'total_rows': new_rows,
+                        'updated_at': datetime.now().isoformat()
+                    })
+                    self._save_state(state, target_dir)
+                    self._swap_in(target_dir)
+                else:
+                    shutil.rmtree(target_dir, ignore_errors=True)
+            elif new_rows:
+                # Se guarda el progreso aunque falle un lote posterior: los lotes escritos ya están completos
+                state.update({
+                    'last_id': last_id,
+                    'total_rows': state.get('total_rows', 0) + new_rows,
+                    'updated_at': datetime.now().isoformat()
+                })
+                self._save_state(state)
+
+        if not full:
+            try:
+                self.compact(self.closed_days(touched))
+            except Exception as e:
+                # Las filas ya están en el snapshot: se reintenta en la próxima actualización que toque esos días
+                logger.warning(f"⚠️ No se pudo compactar el snapshot Parquet: {e}")
+
+        logger.info(f"✅ Snapshot Parquet actualizado: {new_rows} noticias nuevas (último id {last_id})")
+        return new_rows
+
+def update_parquet_snapshot(snapshot_dir: Optional[str] = None, full: bool = False, compact: bool = False) -> int:
+    """Atajo para scripts y tareas programadas (compact=True compacta además todas las particiones)"""
+    snapshot = ParquetSnapshot(snapshot_dir)
+    new_rows = snapshot.update(full=full)
+    if compact and not full:
+        snapshot.compact()
+    return new_rows
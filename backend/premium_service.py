@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 from typing import List, Optional
 
+from sqlalchemy import Numeric, case, cast, func, literal, update
 from sqlalchemy.orm import Session
 
 from models import Noticia
@@ -15,14 +16,19 @@ CATEGORY_BOOST = {
 }
 
 
-def calculate_premium_score(noticia: Noticia, now: Optional[datetime] = None) -> float:
+# Frescura: suma puntos en las primeras 48h y castiga a la mitad pasadas 120h
+FRESHNESS_HOURS = 48
+FRESHNESS_POINTS_PER_HOUR = 0.3
+STALE_HOURS = 120
+STALE_FACTOR = 0.5
+
+
+def calculate_premium_base(noticia: Noticia) -> float:
     """
-    Heurística para estimar qué tan atractiva es una noticia para contenido premium.
-    Combina popularidad, tendencia, categoría, palabras clave y frescura.
+    Parte estática del puntaje premium (no depende de la hora): popularidad, tendencia,
+    categoría y palabras clave. Se calcula al insertar la noticia; quien modifique esas columnas
+    debe dejar premium_score_base en NULL para que backfill_premium_bases la recalcule.
     """
-    if now is None:
-        now = datetime.utcnow()
-
     score = 0.0
 
     # Popularidad del scraper (normalizada)
@@ -41,19 +47,75 @@ def calculate_premium_score(noticia: Noticia, now: Optional[datetime] = None) ->
     keywords = noticia.palabras_clave or []
     score += min(len(keywords), 8) * 0.8
 
-    # Frescura (más valor si es reciente en últimas 48h)
-    fecha_ref = noticia.fecha_publicacion or noticia.fecha_extraccion or now
-    horas = max((now - fecha_ref).total_seconds() / 3600, 1)
-    if horas <= 48:
-        score += (48 - horas) * 0.3
+    return round(score, 2)
 
-    # Penalizar si es muy antigua
-    if horas > 120:
-        score *= 0.5
 
+def apply_freshness(base: float, horas: float) -> float:
+    """Parte dependiente del tiempo, aplicada sobre la base (misma regla que premium_score_expr)"""
+    horas = max(horas, 1)
+    score = base
+    if horas <= FRESHNESS_HOURS:
+        score += (FRESHNESS_HOURS - horas) * FRESHNESS_POINTS_PER_HOUR
+
+    # Penalizar si es muy antigua
+    if horas > STALE_HOURS:
+        score *= STALE_FACTOR
     return round(score, 2)
 
 
+def calculate_premium_score(noticia: Noticia, now: Optional[datetime] = None) -> float:
+    """
+    Heurística para estimar qué tan atractiva es una noticia para contenido premium.
+    Combina popularidad, tendencia, categoría, palabras clave y frescura.
+    """
+    if now is None:
+        now = datetime.utcnow()
+
+    base = noticia.premium_score_base
+    if base is None:
+        base = calculate_premium_base(noticia)
+
+    fecha_ref = noticia.fecha_publicacion or noticia.fecha_extraccion or now
+    return apply_freshness(base, (now - fecha_ref).total_seconds() / 3600)
+
+
+def premium_score_expr(now: datetime):
+    """
+    Puntaje premium evaluado en SQL: base estática + frescura según las horas desde la
+    publicación. Sirve para ordenar en consultas o para el UPDATE masivo de premium_score.
+    """
+    fecha_ref = func.coalesce(Noticia.fecha_publicacion, Noticia.fecha_extraccion, literal(now))
+    horas = func.greatest(func.extract('epoch', literal(now) - fecha_ref) / 3600.0, 1)
+    base = func.coalesce(Noticia.premium_score_base, 0)
+    score = case(
+        (horas > STALE_HOURS, base * STALE_FACTOR),
+        (horas <= FRESHNESS_HOURS, base + (FRESHNESS_HOURS - horas) * FRESHNESS_POINTS_PER_HOUR),
+        else_=base
+    )
+    return func.round(cast(score, Numeric), 2)
+
+
+def backfill_premium_bases(db: Session, since: Optional[datetime] = None, batch_size: int = 1000) -> int:
+    """Calcula premium_score_base de las noticias que aún no lo tienen (anteriores a la columna)"""
+    updated = 0
+    while True:
+        query = db.query(
+            Noticia.id, Noticia.popularidad_score, Noticia.es_trending, Noticia.categoria, Noticia.palabras_clave
+        ).filter(Noticia.premium_score_base.is_(None))
+        if since is not None:
+            query = query.filter(Noticia.fecha_extraccion >= since)
+        rows = query.order_by(Noticia.id).limit(batch_size).all()
+        if not rows:
+            break
+        db.bulk_update_mappings(Noticia, [
+            {"id": row.id, "premium_score_base": calculate_premium_base(row)}
+            for row in rows
+        ])
+        db.commit()
+        updated += len(rows)
+    return updated
+
+
 def update_premium_scores(
     db: Session,
     hours_window: int = 168,
@@ -61,31 +123,38 @@ def update_premium_scores(
     top_percentage: float = 0.15,
 ) -> None:
     """
-    Recalcular puntajes premium de noticias recientes.
-    Si auto_mark = True, marca automáticamente el top (top_percentage) como premium.
+    Recalcular puntajes premium de noticias recientes con un único UPDATE en SQL.
+    Si auto_mark = True, marca automáticamente el top (top_percentage) como premium, con el
+    umbral calculado por percentile_cont.
     """
     now = datetime.utcnow()
     since = now - timedelta(hours=hours_window)
+    in_window = Noticia.fecha_extraccion >= since
 
-    noticias = (
-        db.query(Noticia)
-        .filter(Noticia.fecha_extraccion >= since)
-        .all()
-    )
+    backfill_premium_bases(db, since)
 
-    if not noticias:
+    result = db.execute(
+        update(Noticia)
+        .where(in_window)
+        .values(premium_score=premium_score_expr(now))
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        db.commit()
         return
 
-    for noticia in noticias:
-        noticia.premium_score = calculate_premium_score(noticia, now)
-
-    if auto_mark and noticias:
-        sorted_news = sorted(noticias, key=lambda n: n.premium_score, reverse=True)
-        cutoff = max(1, int(len(sorted_news) * top_percentage))
-        threshold = sorted_news[cutoff - 1].premium_score
-
-        for noticia in noticias:
-            noticia.es_premium = noticia.premium_score >= threshold
+    if auto_mark:
+        threshold = db.query(
+            func.percentile_cont(1 - top_percentage).within_group(Noticia.premium_score.asc())
+        ).filter(in_window).scalar()
+
+        if threshold is not None:
+            db.execute(
+                update(Noticia)
+                .where(in_window)
+                .values(es_premium=Noticia.premium_score >= threshold)
+                .execution_options(synchronize_session=False)
+            )
 
     db.commit()
 
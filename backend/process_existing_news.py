@@ -5,23 +5,35 @@ Script para procesar noticias existentes y generar datos para trending y analyti
 
 import os
 import sys
+import argparse
 import logging
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 
 # Agregar el directorio actual al path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from database import get_db, engine
-from models import Noticia, TrendingKeywords, AlertaConfiguracion, AlertaDisparo
+from models import Noticia, Diario, TrendingKeywords, AlertaConfiguracion, AlertaDisparo
 from alert_system_simple import AlertSystemSimple
-from duplicate_detector import DuplicateDetector
+from backfill import BackfillJob, add_backfill_arguments, run_backfill
 import random
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_alert_system = None
+
+
+def get_alert_system() -> AlertSystemSimple:
+    """Una instancia por proceso del pool"""
+    global _alert_system
+    if _alert_system is None:
+        _alert_system = AlertSystemSimple()
+    return _alert_system
+
 def create_sample_alerts(db: Session):
     """Crear alertas de ejemplo si no existen"""
     try:
@@ -76,59 +88,104 @@ def create_sample_alerts(db: Session):
         logger.error(f"❌ Error creando alertas de ejemplo: {e}")
         db.rollback()
 
-def process_existing_news(db: Session):
-    """Procesar noticias existentes para generar datos de trending y analytics"""
-    try:
-        logger.info("🔄 Procesando noticias existentes...")
-        
-        # Obtener noticias de los últimos 30 días
-        fecha_limite = datetime.utcnow() - timedelta(days=30)
-        noticias = db.query(Noticia).filter(
-            Noticia.fecha_extraccion >= fecha_limite
-        ).all()
+def _matching_alert_keyword(texto: str, noticia: Dict, alerta: Dict, diarios: Dict[int, str]) -> Optional[str]:
+    """Misma regla que AlertSystemSimple._check_single_alert sobre una configuración en memoria"""
+    if alerta["categorias"] and noticia["categoria"] not in alerta["categorias"]:
+        return None
+    if alerta["diarios"] and diarios.get(noticia["diario_id"]) not in alerta["diarios"]:
+        return None
+    for keyword in alerta["keywords"]:
+        if keyword.lower() in texto:
+            return keyword
+    return None
 
-        if not noticias:
-            logger.warning("⚠️ No se encontraron noticias para procesar")
-            return
 
-        logger.info(f"📰 Procesando {len(noticias)} noticias...")
-
-        # Inicializar sistema de alertas
-        alert_system = AlertSystemSimple()
-        processed_count = 0
-        trending_count = 0
-
-        for noticia in noticias:
-            try:
-                # Procesar alertas y sentimientos
-                result = alert_system.process_news_alerts(db, noticia)
-                
-                # Marcar algunas noticias como trending (simulación)
-                # En un sistema real, esto se basaría en métricas reales
-                if random.random() < 0.3:  # 30% de probabilidad
-                    noticia.es_trending = True
-                    trending_count += 1
-                
-                processed_count += 1
-                
-                if processed_count % 50 == 0:
-                    logger.info(f"📊 Procesadas {processed_count}/{len(noticias)} noticias...")
-                    db.commit()  # Commit intermedio
-
-            except Exception as e:
-                logger.error(f"❌ Error procesando noticia {noticia.id}: {e}")
-                continue
-
-        # Commit final
-        db.commit()
-        
-        logger.info(f"✅ Procesamiento completado:")
-        logger.info(f"   • {processed_count} noticias procesadas")
-        logger.info(f"   • {trending_count} noticias marcadas como trending")
+class ExistingNewsBackfill(BackfillJob):
+    """
+    Urgencia, sentimiento, alertas configuradas y marca de trending de las noticias de los
+    últimos 30 días. El análisis de texto corre en el pool; las alertas disparadas se insertan
+    en bloque junto con la actualización de cada rango.
+    """
+    name = "process_existing_news"
+    model = Noticia
+    rolling = True
+    columns = ("id", "titulo", "contenido", "categoria", "diario_id")
 
-    except Exception as e:
-        logger.error(f"❌ Error procesando noticias existentes: {e}")
-        db.rollback()
+    def __init__(self, dias: int = 30):
+        self.fecha_limite = datetime.utcnow() - timedelta(days=dias)
+        self.alertas: List[Dict] = []
+        self.diarios: Dict[int, str] = {}
+
+    def prepare(self, db: Session):
+        self.alertas = [
+            {
+                "id": alerta.id,
+                "nombre": alerta.nombre,
+                "keywords": alerta.keywords if isinstance(alerta.keywords, list) else [],
+                "categorias": alerta.categorias if isinstance(alerta.categorias, list) else [],
+                "diarios": alerta.diarios if isinstance(alerta.diarios, list) else [],
+                "nivel_urgencia": alerta.nivel_urgencia
+            }
+            for alerta in db.query(AlertaConfiguracion).filter(AlertaConfiguracion.activa == True).all()
+        ]
+        self.diarios = dict(db.query(Diario.id, Diario.nombre).all())
+
+    def filters(self):
+        return [Noticia.fecha_extraccion >= self.fecha_limite]
+
+    def enrich(self, row):
+        alert_system = get_alert_system()
+        update = {"id": row["id"]}
+
+        # Procesar alertas y sentimientos
+        urgency_level, urgency_keywords = alert_system.analyze_news_urgency(row["titulo"], row["contenido"])
+        if urgency_level in ['alta', 'critica'] or urgency_keywords:
+            update.update({"es_alerta": True, "nivel_urgencia": urgency_level, "keywords_alerta": urgency_keywords})
+        update["sentimiento"] = alert_system.analyze_sentiment(row["titulo"] + " " + (row["contenido"] or ""))
+
+        # Marcar algunas noticias como trending (simulación)
+        # En un sistema real, esto se basaría en métricas reales
+        if random.random() < 0.3:  # 30% de probabilidad
+            update["es_trending"] = True
+            # La base premium incluye la tendencia: se recalcula en el próximo backfill_premium_bases
+            update["premium_score_base"] = None
+
+        texto = row["titulo"].lower()
+        if row["contenido"]:
+            texto += " " + row["contenido"].lower()
+        disparos = []
+        for alerta in self.alertas:
+            keyword = _matching_alert_keyword(texto, row, alerta, self.diarios)
+            if keyword:
+                disparos.append((alerta["id"], keyword, alerta["nivel_urgencia"]))
+        update["_disparos"] = disparos
+        return update
+
+    def write(self, db: Session, updates: List[Dict]):
+        ahora = datetime.utcnow()
+        disparos = []
+        for update in updates:
+            for configuracion_id, keyword, nivel in update.pop("_disparos"):
+                disparos.append({
+                    "configuracion_id": configuracion_id,
+                    "noticia_id": update["id"],
+                    "keyword_match": keyword,
+                    "nivel_urgencia": nivel,
+                    "fecha_disparo": ahora,
+                    "notificacion_enviada": False  # No enviamos emails en versión simple
+                })
+        db.bulk_update_mappings(Noticia, updates)
+        if disparos:
+            db.bulk_insert_mappings(AlertaDisparo, disparos)
+
+
+def process_existing_news(args):
+    """Procesar noticias existentes para generar datos de trending y analytics"""
+    logger.info("🔄 Procesando noticias existentes...")
+    progress = run_backfill(ExistingNewsBackfill(), args)
+    logger.info(f"✅ Procesamiento completado:")
+    logger.info(f"   • {progress.processed} noticias procesadas")
+    logger.info(f"   • {progress.updated} noticias actualizadas")
 
 def generate_trending_keywords(db: Session):
     """Generar palabras clave trending basadas en noticias existentes"""
@@ -137,17 +194,17 @@ def generate_trending_keywords(db: Session):
         
         # Obtener noticias recientes
         fecha_limite = datetime.utcnow() - timedelta(days=7)
-        noticias = db.query(Noticia).filter(
+        titulos = db.query(Noticia.titulo).filter(
             Noticia.fecha_extraccion >= fecha_limite
-        ).all()
+        ).yield_per(1000)
 
         # Contar palabras clave comunes
         keyword_count = {}
         common_words = ['el', 'la', 'de', 'que', 'y', 'en', 'un', 'es', 'se', 'no', 'te', 'lo', 'le', 'da', 'su', 'por', 'son', 'con', 'para', 'al', 'del', 'los', 'las', 'una', 'como', 'más', 'pero', 'sus', 'me', 'ya', 'muy', 'mi', 'sin', 'sobre', 'este', 'ser', 'tiene', 'todo', 'esta', 'fue', 'hasta', 'desde']
 
-        for noticia in noticias:
+        for (titulo,) in titulos:
             # Procesar título
-            words = noticia.titulo.lower().split()
+            words = titulo.lower().split()
             for word in words:
                 word = word.strip('.,!?":;()[]{}')
                 if len(word) > 3 and word not in common_words:
@@ -180,6 +237,10 @@ def generate_trending_keywords(db: Session):
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description="Procesar noticias existentes (alertas, sentimiento, trending)")
+    add_backfill_arguments(parser)
+    args = parser.parse_args()
+
     print("🚀 PROCESADOR DE NOTICIAS EXISTENTES")
     print("=" * 50)
     
@@ -191,7 +252,7 @@ def main():
         create_sample_alerts(db)
         
         # Procesar noticias existentes
-        process_existing_news(db)
+        process_existing_news(args)
         
         # Generar palabras clave trending
         generate_trending_keywords(db)
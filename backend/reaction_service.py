@@ -0,0 +1,123 @@
+"""
+Reacciones de posts UGC con contadores desnormalizados.
+Cada alta, cambio o baja de una reacción ajusta la fila de post_reaction_counts en la misma
+transacción con un UPSERT atómico, así las lecturas no recorren la tabla reactions. Las
+estadísticas de varios posts (contadores y la reacción propia) se obtienen en una sola consulta.
+"""
+import logging
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import and_, select, text
+from sqlalchemy.orm import Session
+
+from models_ugc_enhanced import PostReactionCount, Reaction, TipoReaccion
+
+logger = logging.getLogger(__name__)
+
+REACTION_TYPES = [tipo.value for tipo in TipoReaccion]
+MAX_BATCH_POSTS = 200
+
+UPSERT_COUNTS_SQL = text("""
+    INSERT INTO post_reaction_counts (post_id, like_count, love_count, haha_count, sad_count, angry_count, total)
+    VALUES (:post_id, :like_count, :love_count, :haha_count, :sad_count, :angry_count, :total)
+    ON CONFLICT (post_id) DO UPDATE SET
+        like_count = post_reaction_counts.like_count + EXCLUDED.like_count,
+        love_count = post_reaction_counts.love_count + EXCLUDED.love_count,
+        haha_count = post_reaction_counts.haha_count + EXCLUDED.haha_count,
+        sad_count = post_reaction_counts.sad_count + EXCLUDED.sad_count,
+        angry_count = post_reaction_counts.angry_count + EXCLUDED.angry_count,
+        total = post_reaction_counts.total + EXCLUDED.total
+""")
+
+
+def empty_stats() -> Dict:
+    stats = {tipo: 0 for tipo in REACTION_TYPES}
+    stats.update({"total": 0, "user_reaction": None})
+    return stats
+
+
+def apply_reaction_delta(db: Session, post_id: int, added: Optional[str] = None, removed: Optional[str] = None):
+    """
+    Ajusta los contadores del post: +1 para `added`, -1 para `removed` (un cambio de reacción
+    pasa ambos). No hace commit; debe ir en la misma transacción que el cambio en reactions.
+    """
+    params = {f"{tipo}_count": 0 for tipo in REACTION_TYPES}
+    params.update({"post_id": post_id, "total": 0})
+    if added:
+        params[f"{added}_count"] += 1
+        params["total"] += 1
+    if removed:
+        params[f"{removed}_count"] -= 1
+        params["total"] -= 1
+    db.execute(UPSERT_COUNTS_SQL, params)
+
+
+def toggle_reaction(db: Session, post_id: int, tipo: str, user_id: Optional[int] = None,
+                    session_id: Optional[str] = None) -> str:
+    """
+    Agrega, cambia o quita (si se repite el mismo tipo) la reacción del usuario o sesión y
+    actualiza los contadores. Retorna la acción: 'added', 'changed' o 'removed'.
+    """
+    query = db.query(Reaction).filter(Reaction.post_id == post_id)
+    if user_id:
+        existing = query.filter(Reaction.user_id == user_id).first()
+    else:
+        existing = query.filter(Reaction.session_id == session_id).first()
+
+    if existing and existing.tipo == tipo:
+        db.delete(existing)
+        apply_reaction_delta(db, post_id, removed=tipo)
+        action = "removed"
+    elif existing:
+        previous = existing.tipo
+        existing.tipo = tipo
+        apply_reaction_delta(db, post_id, added=tipo, removed=previous)
+        action = "changed"
+    else:
+        db.add(Reaction(
+            post_id=post_id,
+            user_id=user_id,
+            session_id=session_id if not user_id else None,
+            tipo=tipo
+        ))
+        apply_reaction_delta(db, post_id, added=tipo)
+        action = "added"
+
+    db.commit()
+    return action
+
+
+def get_reaction_stats(db: Session, post_ids: Iterable[int], user_id: Optional[int] = None,
+                       session_id: Optional[str] = None) -> Dict[int, Dict]:
+    """
+    Contadores por post y la reacción propia (por usuario o sesión) en una sola consulta:
+    post_reaction_counts por clave primaria con LEFT JOIN a la reacción propia, que usa el
+    índice único (post_id, user_id) o ix_reactions_session_post.
+    """
+    post_ids = list(dict.fromkeys(post_ids))[:MAX_BATCH_POSTS]
+    result = {post_id: empty_stats() for post_id in post_ids}
+    if not post_ids:
+        return result
+
+    if user_id:
+        own = and_(Reaction.post_id == PostReactionCount.post_id, Reaction.user_id == user_id)
+    elif session_id:
+        own = and_(Reaction.post_id == PostReactionCount.post_id, Reaction.session_id == session_id)
+    else:
+        own = None
+
+    columns = [getattr(PostReactionCount, f"{tipo}_count") for tipo in REACTION_TYPES]
+    query = select(PostReactionCount.post_id, PostReactionCount.total, *columns)
+    if own is not None:
+        query = query.add_columns(Reaction.tipo.label('user_reaction')).outerjoin(Reaction, own)
+    query = query.where(PostReactionCount.post_id.in_(post_ids))
+
+    for row in db.execute(query):
+        row = row._asdict()
+        stats = result[row['post_id']]
+        for tipo in REACTION_TYPES:
+            stats[tipo] = row[f"{tipo}_count"]
+        stats["total"] = row['total']
+        stats["user_reaction"] = row.get('user_reaction')
+    return result
+
@@ -9,6 +9,9 @@ from models_ugc_enhanced import (
     EstadoReporte, EstadoPublicacion, MotivoReporte
 )
 from notification_service import NotificationService
+from feed_service import get_feed_service
+from auth_ugc import revoke_user_sessions
+from creator_stats_service import get_creator_stats_service
 from datetime import datetime
 import logging
 
@@ -120,6 +123,9 @@ class ReportService:
                 logger.warning(f"🚩 Post {post_id} marcado como FLAGGED ({post.total_reportes} reportes)")
             
             db.commit()
+            if post.estado == 'flagged':
+                get_feed_service().invalidate()
+                get_creator_stats_service().invalidate_user(post.user_id)
             
             logger.info(f"✅ Reporte creado: Post {post_id} por usuario {reporter_id}")
             
@@ -193,6 +199,11 @@ class ReportService:
             })
             
             db.commit()
+            get_feed_service().invalidate()
+            get_creator_stats_service().invalidate_user(post.user_id)
+            if author:
+                # Los tokens del autor traen suspendido=False en sus claims
+                revoke_user_sessions(db, author.id)
             
             logger.warning(f"🚫 Post {post_id} confirmado como FAKE. Usuario {post.user_id} suspendido.")
             
@@ -227,6 +238,8 @@ class ReportService:
             }, synchronize_session=False)
             
             db.commit()
+            get_feed_service().invalidate()
+            get_creator_stats_service().invalidate_user(post.user_id)
             
             logger.info(f"✅ Reportes descartados para post {post_id}")
             
@@ -30,51 +30,25 @@ class RevenueService:
         Returns:
             Dict con información de ingresos generados
         """
-        # Obtener post
-        post = db.query(Post).filter(Post.id == post_id).first()
+        from interaction_counters import get_counter_buffer
+        
+        # Solo se verifica que el post exista; el incremento y los ingresos se escriben en lote
+        post = db.query(Post.id, Post.views, Post.clicks, Post.interacciones).filter(Post.id == post_id).first()
         if not post:
             raise ValueError("Post no encontrado")
         
-        # Registrar interacción
-        if tipo == "view":
-            post.views += 1
-        elif tipo == "click":
-            post.clicks += 1
-        else:
-            post.interacciones += 1
+        counters = get_counter_buffer()
+        counters.record(post_id, tipo, revenue=True)
         
         # Calcular ingresos
         monto_total = INGRESO_POR_INTERACCION
         monto_admin = monto_total * PORCENTAJE_ADMIN
         monto_creador = monto_total * PORCENTAJE_CREADOR
         
-        # Obtener admin (primer usuario con rol admin)
-        admin = db.query(User).filter(User.role == RoleEnum.ADMIN).first()
-        if not admin:
-            logger.warning("No se encontró usuario admin")
-        
-        # Crear ingreso para el admin
-        if admin:
-            ingreso_admin = Ingreso(
-                user_id=admin.id,
-                post_id=post.id,
-                monto=monto_admin,
-                tipo="admin",
-                concepto=f"Ingreso admin por {tipo} en post #{post.id}"
-            )
-            db.add(ingreso_admin)
-        
-        # Crear ingreso para el creador del post
-        ingreso_creador = Ingreso(
-            user_id=post.user_id,
-            post_id=post.id,
-            monto=monto_creador,
-            tipo="creator",
-            concepto=f"Ingreso creador por {tipo} en post #{post.id}"
+        total_interacciones = sum(
+            (getattr(post, col) or 0) + counters.pending(post_id, t)
+            for t, col in (("view", "views"), ("click", "clicks"), ("other", "interacciones"))
         )
-        db.add(ingreso_creador)
-        
-        db.commit()
         
         return {
             "post_id": post.id,
@@ -82,7 +56,7 @@ class RevenueService:
             "monto_total": monto_total,
             "monto_admin": monto_admin,
             "monto_creador": monto_creador,
-            "total_interacciones": post.get_total_interacciones()
+            "total_interacciones": total_interacciones
         }
     
     @staticmethod
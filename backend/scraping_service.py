@@ -8,6 +8,7 @@ import logging
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scraping.main_scraper import MainScraper
+from url_frontier import get_url_frontier  # scraping/ queda en sys.path al importar main_scraper
 from database import get_db
 from models import Diario, Noticia, EstadisticaScraping
 # Importar modelos de UGC para que SQLAlchemy pueda resolver las relaciones
@@ -28,7 +29,10 @@ except ImportError:
     # Usar versión simplificada si hay problemas con email
     from alert_system_simple import AlertSystemSimple as AlertSystem
 from sqlalchemy.orm import Session
-from premium_service import update_premium_scores
+from premium_service import update_premium_scores, calculate_premium_base
+from date_histogram_service import get_date_histogram_service
+from news_retrieval import get_retrieval_index
+from crawl_frequency import record_section_fetch
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +64,7 @@ class ScrapingService:
             # Guardar en base de datos con nueva lógica
             save_result = self.save_news_to_database_enhanced(all_news)
             result.update(save_result)
+            self.finish_validators(save_result)
             
             # Calcular duración
             duration = int((datetime.now() - start_time).total_seconds())
@@ -75,6 +80,7 @@ class ScrapingService:
             result['error'] = str(e)
             result['duration_seconds'] = int((datetime.now() - start_time).total_seconds())
             logger.error(f"Error en scraping: {e}")
+            self.main_scraper.discard_validators()
         
         return result
     
@@ -119,6 +125,7 @@ class ScrapingService:
             # Guardar en base de datos con nueva lógica
             save_result = self.save_news_to_database_enhanced(all_news)
             result.update(save_result)
+            self.finish_validators(save_result, *self.main_scraper.social_sources())
             
             # Contar noticias guardadas por plataforma
             saved_by_platform = {}
@@ -145,6 +152,8 @@ class ScrapingService:
             result['error'] = str(e)
             result['duration_seconds'] = int((datetime.now() - start_time).total_seconds())
             logger.error(f"❌ Error en scraping de redes sociales: {e}", exc_info=True)
+            for source in self.main_scraper.social_sources():
+                self.main_scraper.discard_validators(source)
         
         return result
 
@@ -179,6 +188,7 @@ class ScrapingService:
 
             save_result = self.save_news_to_database_enhanced(youtube_news)
             result.update(save_result)
+            self.finish_validators(save_result, 'youtube')
 
             duration = int((datetime.now() - start_time).total_seconds())
             result['duration_seconds'] = duration
@@ -193,8 +203,89 @@ class ScrapingService:
             result['error'] = str(e)
             result['duration_seconds'] = int((datetime.now() - start_time).total_seconds())
             logger.error("❌ Error en scraping de YouTube: %s", e, exc_info=True)
+            self.main_scraper.discard_validators('youtube')
 
         return result
+
+    def execute_source_scraping(self, source: str, section: str = None) -> Dict:
+        """Ejecutar scraping de un solo diario o red social (un trabajo del scheduler por fuente),
+        o de una sola sección del diario si se indica `section`; las visitas a secciones quedan
+        en EstadisticaScraping para aprender su frecuencia de publicación.
+        No recalcula puntajes premium: el scheduler lo hace con su propio intervalo."""
+        start_time = datetime.now()
+        label = f"{source}/{section}" if section else source
+        result = {
+            'success': False,
+            'source': source,
+            'section': section,
+            'total_extracted': 0,
+            'total_saved': 0,
+            'duplicates_detected': 0,
+            'alerts_triggered': 0,
+            'duration_seconds': 0,
+            'error': None
+        }
+
+        try:
+            # El lock de la fuente se mantiene hasta guardar: otra sección no puede dejar validadores
+            # pendientes en el mismo scraper antes de que se confirmen los de esta
+            with self.main_scraper.source_lock(source):
+                if section:
+                    news = self.main_scraper.scrape_section(source, section)
+                else:
+                    news = self.main_scraper.scrape_source(source)
+                result['total_extracted'] = len(news)
+
+                save_result = self.save_news_to_database_enhanced(news)
+                result.update(save_result)
+                result.pop('saved_news', None)
+                if not self.finish_validators(save_result, source):
+                    # La transacción se revirtió: que el scheduler reintente la fuente
+                    raise RuntimeError(self.general_save_errors(save_result)[0])
+
+            result['duration_seconds'] = int((datetime.now() - start_time).total_seconds())
+            result['success'] = True
+            logger.info(f"✅ {label}: {result['total_saved']} noticias guardadas, "
+                        f"{result['duplicates_detected']} duplicados en {result['duration_seconds']}s")
+
+        except Exception as e:
+            self.main_scraper.discard_validators(source)
+            result['error'] = str(e)
+            result['duration_seconds'] = int((datetime.now() - start_time).total_seconds())
+            logger.error(f"❌ Error en scraping de {label}: {e}")
+
+        if section:
+            self.record_section_fetch(source, section, result)
+        return result
+
+    @staticmethod
+    def general_save_errors(save_result: Dict) -> List[str]:
+        """Errores que revirtieron toda la transacción de save_news_to_database_enhanced"""
+        return [error for error in save_result.get('errors', []) if error.startswith("Error general")]
+
+    def finish_validators(self, save_result: Dict, *sources: str) -> bool:
+        """
+        Confirma los validadores HTTP (ETag/Last-Modified/hash) de las páginas scrapeadas por
+        `sources` (todas las fuentes si no se indican) solo si sus noticias llegaron al commit;
+        si no, se descartan para volver a procesarlas. Retorna si el guardado fue exitoso.
+        """
+        saved = not self.general_save_errors(save_result)
+        finish = self.main_scraper.commit_validators if saved else self.main_scraper.discard_validators
+        for source in sources or (None,):
+            finish(source)
+        return saved
+
+    def record_section_fetch(self, source: str, section: str, result: Dict) -> None:
+        """Guardar la visita a una sección (con 0 noticias nuevas si no trajo nada)"""
+        db = next(get_db())
+        try:
+            record_section_fetch(db, source, section, result['total_saved'],
+                                 result['duration_seconds'], result['success'])
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"No se pudo registrar la visita a {source}/{section}: {e}")
+        finally:
+            db.close()
     
     def save_news_to_database_enhanced(self, news: List[Dict]) -> Dict:
         """Guardar noticias con detección de duplicados avanzada y sistema de alertas"""
@@ -206,6 +297,8 @@ class ScrapingService:
             'errors': [],
             'saved_news': []  # Lista de noticias guardadas para estadísticas
         }
+        # URLs que quedan en la base de datos (guardadas o ya existentes); se marcan tras el commit
+        ingested_urls = []
         
         try:
             for news_item in news:
@@ -240,6 +333,7 @@ class ScrapingService:
                     )
                     
                     if duplicate_check['is_duplicate']:
+                        ingested_urls.append(news_item.get('enlace'))
                         result['duplicates_detected'] += 1
                         logger.info(f"Duplicado detectado ({duplicate_check['duplicate_type']}): {news_item['titulo']}")
                         continue
@@ -304,6 +398,9 @@ class ScrapingService:
                     if 'autor' in enhanced_news:
                         noticia.autor = enhanced_news['autor']
                     
+                    # La parte estática del puntaje premium se calcula una sola vez
+                    noticia.premium_score_base = calculate_premium_base(noticia)
+                    
                     db.add(noticia)
                     db.flush()  # Para obtener el ID
                     
@@ -315,6 +412,7 @@ class ScrapingService:
                         result['errors'].extend(alert_result['errors'])
                     
                     result['total_saved'] += 1
+                    ingested_urls.append(news_item.get('enlace'))
                     
                     # Guardar información de la noticia guardada para estadísticas
                     result['saved_news'].append({
@@ -330,6 +428,10 @@ class ScrapingService:
                     continue
             
             db.commit()
+            get_url_frontier().mark_fetched_many(ingested_urls)
+            if result['total_saved']:
+                get_date_histogram_service().invalidate()
+                get_retrieval_index().mark_stale()
             logger.info(f"Guardadas {result['total_saved']} noticias nuevas, "
                        f"detectados {result['duplicates_detected']} duplicados, "
                        f"activadas {result['alerts_triggered']} alertas")
@@ -16,6 +16,12 @@ from premium_service import (
     update_premium_scores,
     get_recommended_premium_news,
 )
+from subscription_state import (
+    SubscriptionSnapshot,
+    expire_due_subscriptions,
+    get_subscription_state_cache,
+)
+from entitlement_service import NO_EXPIRY, premium_until
 
 router = APIRouter(prefix="/subscriptions", tags=["Subscriptions"])
 
@@ -166,6 +172,11 @@ PERIOD_TO_DAYS = {
 }
 
 
+def subscription_changed(user_id: int) -> None:
+    """Descarta el estado en caché (y con él el derecho premium) tras modificar una suscripción"""
+    get_subscription_state_cache().invalidate(user_id)
+
+
 def calculate_end_date(start: datetime, plan: SubscriptionPlan) -> datetime:
     """Calcular fecha de fin basada en el plan"""
     if plan.periodo == "personalizado" and plan.periodo_tipo and plan.periodo_cantidad:
@@ -450,21 +461,8 @@ def expire_subscriptions(
     _: User = Depends(get_current_admin_user),
 ) -> dict:
     """Expirar suscripciones que han pasado su fecha de fin - Solo admin"""
-    now = datetime.utcnow()
-    
-    # Buscar suscripciones activas que han expirado
-    expired_subscriptions = db.query(UserSubscription).filter(
-        UserSubscription.estado == "active",
-        UserSubscription.fecha_fin.isnot(None),
-        UserSubscription.fecha_fin <= now
-    ).all()
-    
-    expired_count = 0
-    for subscription in expired_subscriptions:
-        subscription.estado = "expired"
-        expired_count += 1
-    
-    db.commit()
+    # El hilo de expiración ya lo hace periódicamente; esto fuerza una pasada inmediata
+    expired_count = expire_due_subscriptions(db)
     
     return {
         "message": f"Se expiraron {expired_count} suscripción(es)",
@@ -517,6 +515,7 @@ def checkout_subscription(
     db.add(subscription)
     db.commit()
     db.refresh(subscription)
+    subscription_changed(current_user.id)
 
     instrucciones = {
         "mensaje": "Paga el plan usando alguno de los métodos y envía el comprobante al correo soporte@tuapp.com.",
@@ -558,6 +557,7 @@ def confirm_subscription(
     subscription.fecha_fin = calculate_end_date(subscription.fecha_inicio, plan)
     db.commit()
     db.refresh(subscription)
+    subscription_changed(subscription.user_id)
 
     dias_restantes = None
     if subscription.fecha_fin:
@@ -575,44 +575,34 @@ def confirm_subscription(
     )
 
 
+def summary_from_snapshot(subscription: SubscriptionSnapshot, dias_restantes) -> SubscriptionSummary:
+    return SubscriptionSummary(
+        subscription_id=subscription.id,
+        estado=subscription.estado,
+        fecha_inicio=subscription.fecha_inicio,
+        fecha_fin=subscription.fecha_fin,
+        renovacion_automatica=subscription.renovacion_automatica,
+        referencia_pago=subscription.referencia_pago,
+        plan=subscription.plan,
+        dias_restantes=dias_restantes,
+    )
+
+
 @router.get("/me", response_model=Optional[SubscriptionSummary])
 def get_my_subscription(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> Optional[SubscriptionSummary]:
     now = datetime.utcnow()
-    subscription = (
-        db.query(UserSubscription)
-        .filter(
-            UserSubscription.user_id == current_user.id,
-            UserSubscription.estado == "active",
-            or_(
-                UserSubscription.fecha_fin.is_(None),
-                UserSubscription.fecha_fin > now,
-            ),
-        )
-        .order_by(UserSubscription.fecha_inicio.desc())
-        .first()
-    )
+    subscription = get_subscription_state_cache().get(db, current_user.id).active
 
     if not subscription:
         return None
-    
-    # Verificar si la suscripción ha expirado (incluso para períodos cortos)
-    if subscription.fecha_fin and subscription.fecha_fin <= now:
-        # Marcar como expirada automáticamente
-        subscription.estado = "expired"
-        db.commit()
-        return None
 
     dias_restantes = None
     if subscription.fecha_fin:
         # Calcular tiempo restante en días, horas o minutos según corresponda
         tiempo_restante = subscription.fecha_fin - now
-        if tiempo_restante.total_seconds() < 0:
-            subscription.estado = "expired"
-            db.commit()
-            return None
         dias_restantes = max(tiempo_restante.days, 0)
         # Si es menos de un día, también calcular horas y minutos
         if dias_restantes == 0:
@@ -624,17 +614,7 @@ def get_my_subscription(
             else:
                 dias_restantes = horas_restantes / 24  # Convertir horas a días fraccionarios
 
-    plan = subscription.plan
-    return SubscriptionSummary(
-        subscription_id=subscription.id,
-        estado=subscription.estado,
-        fecha_inicio=subscription.fecha_inicio,
-        fecha_fin=subscription.fecha_fin,
-        renovacion_automatica=subscription.renovacion_automatica,
-        referencia_pago=subscription.referencia_pago,
-        plan=plan,
-        dias_restantes=dias_restantes,
-    )
+    return summary_from_snapshot(subscription, dias_restantes)
 
 
 class SubscriptionStatusResponse(BaseModel):
@@ -652,142 +632,58 @@ def get_subscription_status(
     current_user: User = Depends(get_current_user),
 ) -> SubscriptionStatusResponse:
     """Obtener estado completo de suscripciones del usuario"""
+    # Solo lectura: la expiración la hace el hilo de fondo y el estado vence con fecha_fin
     now = datetime.utcnow()
-    
-    # Primero, marcar como expiradas las suscripciones activas que ya vencieron
-    expired_subscriptions = (
-        db.query(UserSubscription)
-        .filter(
-            UserSubscription.user_id == current_user.id,
-            UserSubscription.estado == "active",
-            UserSubscription.fecha_fin.isnot(None),
-            UserSubscription.fecha_fin <= now
-        )
-        .all()
-    )
-    
-    for expired_sub in expired_subscriptions:
-        expired_sub.estado = "expired"
-    
-    if expired_subscriptions:
-        db.commit()
-    
-    # Buscar suscripción activa
-    active_subscription = (
-        db.query(UserSubscription)
-        .filter(
-            UserSubscription.user_id == current_user.id,
-            UserSubscription.estado == "active",
-            or_(
-                UserSubscription.fecha_fin.is_(None),
-                UserSubscription.fecha_fin > now,
-            ),
-        )
-        .order_by(UserSubscription.fecha_inicio.desc())
-        .first()
-    )
-    
-    # Buscar suscripción pendiente más reciente (solo si NO hay una activa)
-    # También verificar si hay una suscripción revisada reciente (active, expired, rejected)
-    # para evitar mostrar pendientes antiguas que deberían estar canceladas
-    pending_subscription = None
-    if not active_subscription:
-        # Verificar si hay una suscripción que fue revisada (aprobada o rechazada)
-        recent_reviewed = (
-            db.query(UserSubscription)
-            .filter(
-                UserSubscription.user_id == current_user.id,
-                UserSubscription.fecha_revision.isnot(None)
-            )
-            .order_by(UserSubscription.fecha_revision.desc())
-            .first()
-        )
-        
-        if recent_reviewed:
-            # Solo mostrar pendiente si es más reciente que la última revisada
-            pending_subscription = (
-                db.query(UserSubscription)
-                .filter(
-                    UserSubscription.user_id == current_user.id,
-                    UserSubscription.estado == "pending",
-                    UserSubscription.creado_en > recent_reviewed.creado_en
-                )
-                .order_by(UserSubscription.creado_en.desc())
-                .first()
-            )
-        else:
-            # Si no hay ninguna revisada, buscar cualquier pendiente
-            pending_subscription = (
-                db.query(UserSubscription)
-                .filter(
-                    UserSubscription.user_id == current_user.id,
-                    UserSubscription.estado == "pending"
-                )
-                .order_by(UserSubscription.creado_en.desc())
-                .first()
-            )
-    
-    # Buscar suscripción rechazada más reciente (solo si NO hay una activa ni pendiente)
-    rejected_subscription = None
-    if not active_subscription and not pending_subscription:
-        rejected_subscription = (
-            db.query(UserSubscription)
-            .filter(
-                UserSubscription.user_id == current_user.id,
-                UserSubscription.estado == "rejected",
-                UserSubscription.fecha_revision.isnot(None)
-            )
-            .order_by(UserSubscription.fecha_revision.desc())
-            .first()
-        )
+    state = get_subscription_state_cache().get(db, current_user.id)
     
     active_summary = None
-    if active_subscription:
-        plan = active_subscription.plan
+    if state.active:
         dias_restantes = None
-        if active_subscription.fecha_fin:
-            dias_restantes = max((active_subscription.fecha_fin - now).days, 0)
-        active_summary = SubscriptionSummary(
-            subscription_id=active_subscription.id,
-            estado=active_subscription.estado,
-            fecha_inicio=active_subscription.fecha_inicio,
-            fecha_fin=active_subscription.fecha_fin,
-            renovacion_automatica=active_subscription.renovacion_automatica,
-            referencia_pago=active_subscription.referencia_pago,
-            plan=plan,
-            dias_restantes=dias_restantes,
-        )
+        if state.active.fecha_fin:
+            dias_restantes = max((state.active.fecha_fin - now).days, 0)
+        active_summary = summary_from_snapshot(state.active, dias_restantes)
     
     pending_data = None
-    if pending_subscription:
-        plan = pending_subscription.plan
+    if state.pending:
         pending_data = {
-            "subscription_id": pending_subscription.id,
-            "plan_nombre": plan.nombre if plan else "Plan desconocido",
-            "referencia_pago": pending_subscription.referencia_pago,
-            "fecha_pago_notificado": pending_subscription.fecha_pago_notificado.isoformat() if pending_subscription.fecha_pago_notificado else None
+            "subscription_id": state.pending.id,
+            "plan_nombre": state.pending.plan_nombre,
+            "referencia_pago": state.pending.referencia_pago,
+            "fecha_pago_notificado": state.pending.fecha_pago_notificado.isoformat() if state.pending.fecha_pago_notificado else None
         }
     
     rejected_data = None
-    if rejected_subscription:
-        plan = rejected_subscription.plan
+    if state.rejected:
         rejected_data = {
-            "subscription_id": rejected_subscription.id,
-            "plan_nombre": plan.nombre if plan else "Plan desconocido",
-            "motivo_rechazo": rejected_subscription.motivo_rechazo,
-            "fecha_revision": rejected_subscription.fecha_revision.isoformat() if rejected_subscription.fecha_revision else None
+            "subscription_id": state.rejected.id,
+            "plan_nombre": state.rejected.plan_nombre,
+            "motivo_rechazo": state.rejected.motivo_rechazo,
+            "fecha_revision": state.rejected.fecha_revision.isoformat() if state.rejected.fecha_revision else None
         }
     
     return SubscriptionStatusResponse(
-        has_active=active_subscription is not None,
-        has_pending=pending_subscription is not None,
-        has_rejected=rejected_subscription is not None,
+        has_active=state.active is not None,
+        has_pending=state.pending is not None,
+        has_rejected=state.rejected is not None,
         pending_subscription=pending_data,
         rejected_subscription=rejected_data,
         active_subscription=active_summary
     )
 
 
+@router.get("/entitlement")
+def get_premium_entitlement(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> dict:
+    """Consulta liviana: si el usuario puede ver contenido premium ahora y hasta cuándo"""
+    until = premium_until(db, current_user.id)
+    return {
+        "premium": until is not None,
+        "premium_until": until.isoformat() if until not in (None, NO_EXPIRY) else None
+    }
+
+
 @router.post("/premium/recalculate")
 def recalculate_premium_scores(
     payload: RecalculateRequest,
@@ -890,6 +786,7 @@ def notify_payment(
     
     subscription.fecha_pago_notificado = datetime.utcnow()
     db.commit()
+    subscription_changed(current_user.id)
     
     return {
         "message": "Pago notificado. Espera la verificación del administrador.",
@@ -1006,6 +903,7 @@ def approve_payment(
     
     db.commit()
     db.refresh(subscription)
+    subscription_changed(subscription.user_id)
     
     dias_restantes = None
     if subscription.fecha_fin:
@@ -1051,6 +949,7 @@ def reject_payment(
     subscription.fecha_revision = datetime.utcnow()
     
     db.commit()
+    subscription_changed(subscription.user_id)
     
     return {
         "message": "Pago rechazado",
@@ -1089,21 +988,7 @@ def get_active_subscriptions(
     now = datetime.utcnow()
     
     # Primero, marcar como expiradas las suscripciones activas que ya vencieron
-    expired_subscriptions = (
-        db.query(UserSubscription)
-        .filter(
-            UserSubscription.estado == "active",
-            UserSubscription.fecha_fin.isnot(None),
-            UserSubscription.fecha_fin <= now
-        )
-        .all()
-    )
-    
-    for expired_sub in expired_subscriptions:
-        expired_sub.estado = "expired"
-    
-    if expired_subscriptions:
-        db.commit()
+    expire_due_subscriptions(db, now)
     
     # Ahora obtener las suscripciones realmente activas
     subscriptions = (
@@ -1172,6 +1057,7 @@ def cancel_subscription(
     subscription.cancelado_por = admin_user.id
     
     db.commit()
+    subscription_changed(subscription.user_id)
     
     return {
         "message": "Suscripción cancelada",
@@ -0,0 +1,244 @@
+"""
+Estado de suscripciones por usuario y expiración en segundo plano.
+Un hilo expira periódicamente todas las suscripciones vencidas con un único UPDATE, así las
+rutas de lectura ya no escriben. El estado de cada usuario (activa, pendiente, rechazada) se
+resuelve con una sola consulta sobre sus suscripciones y queda en memoria hasta que cambia
+(checkout, aviso de pago, aprobación, rechazo, cancelación) o hasta que vence la activa.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session, joinedload
+
+from database import SessionLocal
+from models import UserSubscription
+
+logger = logging.getLogger(__name__)
+
+SWEEP_INTERVAL_SECONDS = float(os.getenv('SUBSCRIPTION_SWEEP_SECONDS', '60'))
+STATE_CACHE_SECONDS = float(os.getenv('SUBSCRIPTION_STATE_CACHE_SECONDS', '300'))
+
+
+def plan_snapshot(plan) -> Optional[Dict]:
+    """Campos del plan que usan las respuestas (para no retener objetos ORM en memoria)"""
+    if not plan:
+        return None
+    return {
+        "id": plan.id,
+        "nombre": plan.nombre,
+        "descripcion": plan.descripcion,
+        "precio": plan.precio,
+        "periodo": plan.periodo,
+        "periodo_tipo": plan.periodo_tipo,
+        "periodo_cantidad": plan.periodo_cantidad,
+        "beneficios": plan.beneficios,
+        "es_activo": plan.es_activo,
+        "creado_en": plan.creado_en
+    }
+
+
+@dataclass
+class SubscriptionSnapshot:
+    id: int
+    estado: str
+    fecha_inicio: Optional[datetime]
+    fecha_fin: Optional[datetime]
+    renovacion_automatica: bool
+    referencia_pago: Optional[str]
+    fecha_pago_notificado: Optional[datetime]
+    fecha_revision: Optional[datetime]
+    motivo_rechazo: Optional[str]
+    creado_en: Optional[datetime]
+    plan: Optional[Dict]
+
+    @classmethod
+    def from_model(cls, subscription: UserSubscription) -> "SubscriptionSnapshot":
+        return cls(
+            id=subscription.id,
+            estado=subscription.estado,
+            fecha_inicio=subscription.fecha_inicio,
+            fecha_fin=subscription.fecha_fin,
+            renovacion_automatica=bool(subscription.renovacion_automatica),
+            referencia_pago=subscription.referencia_pago,
+            fecha_pago_notificado=subscription.fecha_pago_notificado,
+            fecha_revision=subscription.fecha_revision,
+            motivo_rechazo=subscription.motivo_rechazo,
+            creado_en=subscription.creado_en,
+            plan=plan_snapshot(subscription.plan)
+        )
+
+    @property
+    def plan_nombre(self) -> str:
+        return self.plan["nombre"] if self.plan else "Plan desconocido"
+
+
+@dataclass
+class SubscriptionState:
+    """Suscripción activa, pendiente y rechazada relevantes para un usuario"""
+    active: Optional[SubscriptionSnapshot]
+    pending: Optional[SubscriptionSnapshot]
+    rejected: Optional[SubscriptionSnapshot]
+
+
+def _latest(items: List[SubscriptionSnapshot], attr: str) -> Optional[SubscriptionSnapshot]:
+    candidates = [item for item in items if getattr(item, attr) is not None]
+    return max(candidates, key=lambda item: getattr(item, attr)) if candidates else None
+
+
+def resolve_state(subscriptions: List[SubscriptionSnapshot], now: datetime) -> SubscriptionState:
+    """
+    Aplica las reglas de /subscriptions/status sobre todas las suscripciones del usuario:
+    la activa vigente más reciente; si no hay, la pendiente creada después de la última
+    revisión; si tampoco, la última rechazada.
+    """
+    active = _latest([
+        s for s in subscriptions
+        if s.estado == "active" and (s.fecha_fin is None or s.fecha_fin > now)
+    ], "fecha_inicio")
+
+    pending = None
+    if not active:
+        recent_reviewed = _latest(subscriptions, "fecha_revision")
+        pendings = [s for s in subscriptions if s.estado == "pending"]
+        if recent_reviewed:
+            # Solo mostrar pendiente si es más reciente que la última revisada (sin fecha no se compara)
+            pendings = [
+                s for s in pendings
+                if s.creado_en and recent_reviewed.creado_en and s.creado_en > recent_reviewed.creado_en
+            ]
+        pending = _latest(pendings, "creado_en")
+
+    rejected = None
+    if not active and not pending:
+        rejected = _latest([s for s in subscriptions if s.estado == "rejected"], "fecha_revision")
+
+    return SubscriptionState(active=active, pending=pending, rejected=rejected)
+
+
+class SubscriptionStateCache:
+    """Estado resuelto por usuario; vence con la suscripción activa o tras STATE_CACHE_SECONDS"""
+
+    def __init__(self, ttl_seconds: float = STATE_CACHE_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[int, tuple] = {}
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, user_id: Optional[int]):
+        if user_id is None:
+            return
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def invalidate_many(self, user_ids):
+        for user_id in set(user_ids):
+            self.invalidate(user_id)
+
+    @staticmethod
+    def _load(db: Session, user_id: int) -> List[SubscriptionSnapshot]:
+        subscriptions = db.query(UserSubscription).options(
+            joinedload(UserSubscription.plan)
+        ).filter(UserSubscription.user_id == user_id).all()
+        return [SubscriptionSnapshot.from_model(subscription) for subscription in subscriptions]
+
+    def get(self, db: Session, user_id: int) -> SubscriptionState:
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > time.time() and (entry[1] is None or entry[1] > now):
+                return entry[2]
+            version = self._versions.get(user_id, 0)
+
+        state = resolve_state(self._load(db, user_id), now)
+        # La entrada deja de valer cuando vence la suscripción activa
+        valid_until = state.active.fecha_fin if state.active else None
+        with self._lock:
+            if version == self._versions.get(user_id, 0):
+                self._entries[user_id] = (time.time() + self.ttl_seconds, valid_until, state)
+        return state
+
+
+def expire_due_subscriptions(db: Session, now: Optional[datetime] = None) -> int:
+    """Marca como expiradas todas las suscripciones activas vencidas en un solo UPDATE"""
+    now = now or datetime.utcnow()
+    result = db.execute(
+        update(UserSubscription)
+        .where(
+            UserSubscription.estado == "active",
+            UserSubscription.fecha_fin.isnot(None),
+            UserSubscription.fecha_fin <= now
+        )
+        .values(estado="expired")
+        .returning(UserSubscription.user_id)
+        .execution_options(synchronize_session=False)
+    )
+    user_ids = [row[0] for row in result]
+    db.commit()
+    if user_ids:
+        get_subscription_state_cache().invalidate_many(user_ids)
+        logger.info(f"⏰ {len(user_ids)} suscripción(es) expiradas")
+    return len(user_ids)
+
+
+class SubscriptionExpirySweeper:
+    """Hilo que ejecuta expire_due_subscriptions cada SWEEP_INTERVAL_SECONDS"""
+
+    def __init__(self, interval: float = SWEEP_INTERVAL_SECONDS):
+        self.interval = interval
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="subscription-expiry", daemon=True)
+        self._thread.start()
+        logger.info(f"⏰ Expiración de suscripciones cada {self.interval:.0f}s")
+
+    def _run(self):
+        while True:
+            self.sweep()
+            if self._stop.wait(self.interval):
+                break
+
+    def sweep(self) -> int:
+        db = SessionLocal()
+        try:
+            return expire_due_subscriptions(db)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error expirando suscripciones: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def stop(self):
+        self._stop.set()
+
+
+_default_cache: Optional[SubscriptionStateCache] = None
+_default_sweeper: Optional[SubscriptionExpirySweeper] = None
+
+
+def get_subscription_state_cache() -> SubscriptionStateCache:
+    """Retorna la caché de estados de suscripción compartida del proceso"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SubscriptionStateCache()
+    return _default_cache
+
+
+def get_expiry_sweeper() -> SubscriptionExpirySweeper:
+    """Retorna el hilo de expiración compartido del proceso"""
+    global _default_sweeper
+    if _default_sweeper is None:
+        _default_sweeper = SubscriptionExpirySweeper()
+    return _default_sweeper
@@ -0,0 +1,153 @@
+"""
+Pruebas de la frecuencia de visitas por sección: reparto del presupuesto y tasas aprendidas
+"""
+
+import math
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+pytest.importorskip("sqlalchemy")
+
+from crawl_frequency import MIN_RATE_PER_HOUR, PRIOR_WEIGHT_DAYS, allocate_intervals, learn_section_rates
+
+MIN_INTERVAL = 600      # máx. 6 visitas/hora
+MAX_INTERVAL = 7200     # mín. 0.5 visitas/hora
+NOW = datetime(2025, 6, 1, 12, 0)
+
+
+def visits_per_hour(intervals):
+    return {key: 3600 / interval for key, interval in intervals.items()}
+
+
+def test_reparto_proporcional_a_raiz_de_la_tasa():
+    rates = {("a", "x"): 4.0, ("b", "x"): 1.0}
+    frequencies = visits_per_hour(allocate_intervals(rates, 3, MIN_INTERVAL, MAX_INTERVAL))
+    assert frequencies[("a", "x")] == pytest.approx(2 * frequencies[("b", "x")])
+    assert sum(frequencies.values()) == pytest.approx(3)
+
+
+def test_secciones_acotadas_suman_el_presupuesto():
+    rates = {("a", "x"): 100.0, ("b", "x"): 1.0, ("c", "x"): 1.0, ("d", "x"): 0.0}
+    intervals = allocate_intervals(rates, 10, MIN_INTERVAL, MAX_INTERVAL)
+    frequencies = visits_per_hour(intervals)
+    assert intervals[("a", "x")] == pytest.approx(MIN_INTERVAL)
+    assert intervals[("d", "x")] == pytest.approx(MAX_INTERVAL)
+    assert frequencies[("b", "x")] == pytest.approx(frequencies[("c", "x")])
+    assert sum(frequencies.values()) == pytest.approx(10)
+
+
+def test_limite_superior_y_luego_inferior():
+    # Al fijar la sección dominante en el máximo, lo liberado sube a la otra por encima del mínimo
+    rates = {("a", "x"): 10000.0, ("b", "x"): 1.0}
+    frequencies = visits_per_hour(allocate_intervals(rates, 10, MIN_INTERVAL, 3600))
+    assert frequencies[("a", "x")] == pytest.approx(6)
+    assert frequencies[("b", "x")] == pytest.approx(4)
+
+
+@pytest.mark.parametrize("budget", [4, 7.3, 12, 20, 47])
+def test_presupuesto_factible_siempre_se_usa_completo(budget):
+    rates = {("s", str(i)): rate for i, rate in enumerate([0, 0.02, 0.5, 1, 3, 8, 30, 120])}
+    intervals = allocate_intervals(rates, budget, MIN_INTERVAL, MAX_INTERVAL)
+    assert sum(visits_per_hour(intervals).values()) == pytest.approx(budget)
+    for interval in intervals.values():
+        assert MIN_INTERVAL - 1e-6 <= interval <= MAX_INTERVAL + 1e-6
+
+
+def test_presupuesto_fuera_de_los_limites():
+    rates = {("a", "x"): 5.0, ("b", "x"): 0.1}
+    assert set(allocate_intervals(rates, 0.1, MIN_INTERVAL, MAX_INTERVAL).values()) == {MAX_INTERVAL}
+    assert set(allocate_intervals(rates, 100, MIN_INTERVAL, MAX_INTERVAL).values()) == {MIN_INTERVAL}
+
+
+def test_sin_secciones():
+    assert allocate_intervals({}, 10, MIN_INTERVAL, MAX_INTERVAL) == {}
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *args):
+        return self
+
+    def group_by(self, *args):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Devuelve las filas preparadas en el orden de las consultas: diarios, noticias, visitas"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+
+    def query(self, *args):
+        return FakeQuery(self.results.pop(0))
+
+
+DIARIOS = [(1, "El Comercio"), (2, "Diario Correo")]
+
+
+def test_suavizado_conserva_la_tasa_media():
+    days = 14
+    db = FakeSession(DIARIOS, [(1, "Política", 10, 28), (1, "Política", 22, 14)], [])
+    rate = learn_section_rates(db, [("comercio", "Política")], days=days, now=NOW)[("comercio", "politica")]
+
+    mean = 42 / (24 * days)
+    assert rate.articles == 42
+    assert rate.hourly[10] == pytest.approx((28 + PRIOR_WEIGHT_DAYS * mean) / (days + PRIOR_WEIGHT_DAYS))
+    assert rate.hourly[3] == pytest.approx(PRIOR_WEIGHT_DAYS * mean / (days + PRIOR_WEIGHT_DAYS))
+    assert rate.mean_rate == pytest.approx(mean)
+    assert rate.fetch_rate is None
+
+
+def test_seccion_sin_historial_usa_la_tasa_minima():
+    db = FakeSession(DIARIOS, [(2, "deportes", 8, 5)], [])
+    rates = learn_section_rates(db, [("comercio", "deportes"), ("correo", "deportes")], days=7, now=NOW)
+    assert rates[("comercio", "deportes")].articles == 0
+    assert rates[("comercio", "deportes")].rate_at(8) == MIN_RATE_PER_HOUR
+    assert rates[("correo", "deportes")].articles == 5
+
+
+def test_fuente_sin_diario():
+    db = FakeSession(DIARIOS)
+    rate = learn_section_rates(db, [("peru21", "politica")], days=7, now=NOW)[("peru21", "politica")]
+    assert rate.hourly == [0] * 24
+    assert rate.rate_at(0) == MIN_RATE_PER_HOUR
+
+
+def test_rendimiento_por_visita_ajusta_el_nivel():
+    days = 7
+    first, last = NOW - timedelta(hours=100), NOW
+    db = FakeSession(
+        DIARIOS,
+        [(1, "economia", 9, 21), (1, "economia", 15, 21)],
+        [(1, "Economía", 10, 300, first, last), (1, "deportes", 2, 50, first, last)]
+    )
+    rates = learn_section_rates(db, [("comercio", "economia"), ("comercio", "deportes")], days=days, now=NOW)
+
+    economia = rates[("comercio", "economia")]
+    mean = 42 / (24 * days)
+    assert economia.fetch_rate == pytest.approx(3.0)
+    assert economia.mean_rate == pytest.approx((mean + 3.0) / 2)
+    # El perfil por hora mantiene su forma
+    assert economia.hourly[9] / economia.hourly[0] == pytest.approx(
+        (21 + PRIOR_WEIGHT_DAYS * mean) / (PRIOR_WEIGHT_DAYS * mean))
+
+    # Menos de MIN_FETCHES_FOR_YIELD visitas no cuentan
+    assert rates[("comercio", "deportes")].fetch_rate is None
+
+
+def test_rendimiento_sin_historial_de_noticias():
+    first, last = NOW - timedelta(hours=10), NOW
+    db = FakeSession(DIARIOS, [], [(2, "politica", 4, 20, first, last)])
+    rate = learn_section_rates(db, [("correo", "politica")], days=7, now=NOW)[("correo", "politica")]
+    assert rate.hourly == [pytest.approx(1.0)] * 24
+    assert math.isclose(rate.mean_rate, 1.0)
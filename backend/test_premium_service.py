@@ -0,0 +1,123 @@
+"""
+Pruebas del puntaje premium: la frescura en Python (apply_freshness) debe dar lo mismo que la
+regla original y que premium_score_expr evaluada en PostgreSQL
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+pytest.importorskip("sqlalchemy")
+
+from premium_service import apply_freshness, calculate_premium_base, calculate_premium_score, premium_score_expr
+
+NOW = datetime(2025, 6, 1, 12, 0)
+HOURS = [0, 0.25, 1, 10.5, 47.9, 48, 48.1, 119, 120, 121, 500]
+
+
+def baseline_score(noticia, now):
+    """Regla original de calculate_premium_score, antes de separar base y frescura"""
+    score = min(noticia.popularidad_score or 0.0, 100) * 0.6
+    if noticia.es_trending:
+        score += 12
+    score += {"política": 6, "economía": 5, "deportes": 4, "internacional": 3,
+              "tecnología": 3, "espectáculos": 2}.get((noticia.categoria or "").lower(), 1)
+    score += min(len(noticia.palabras_clave or []), 8) * 0.8
+    fecha_ref = noticia.fecha_publicacion or noticia.fecha_extraccion or now
+    horas = max((now - fecha_ref).total_seconds() / 3600, 1)
+    if horas <= 48:
+        score += (48 - horas) * 0.3
+    if horas > 120:
+        score *= 0.5
+    return round(score, 2)
+
+
+def noticia(horas=None, premium_score_base=None, **fields):
+    values = dict(
+        popularidad_score=72.5,
+        es_trending=True,
+        categoria="Política",
+        palabras_clave=["a", "b", "c"],
+        fecha_publicacion=NOW - timedelta(hours=horas) if horas is not None else None,
+        fecha_extraccion=None,
+        premium_score_base=premium_score_base
+    )
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+@pytest.mark.parametrize("horas", HOURS)
+def test_score_igual_a_la_regla_original(horas):
+    item = noticia(horas)
+    assert calculate_premium_score(item, NOW) == pytest.approx(baseline_score(item, NOW), abs=0.01)
+
+
+@pytest.mark.parametrize("horas", HOURS)
+def test_base_guardada_da_el_mismo_score(horas):
+    item = noticia(horas)
+    stored = noticia(horas, premium_score_base=calculate_premium_base(item))
+    assert calculate_premium_score(stored, NOW) == pytest.approx(calculate_premium_score(item, NOW), abs=0.01)
+
+
+def test_fecha_de_referencia():
+    # Sin publicación se usa la extracción; sin ninguna, la noticia cuenta como recién publicada
+    extraida = noticia(fecha_extraccion=NOW - timedelta(hours=200))
+    assert calculate_premium_score(extraida, NOW) == baseline_score(extraida, NOW)
+    sin_fecha = noticia()
+    assert calculate_premium_score(sin_fecha, NOW) == apply_freshness(calculate_premium_base(sin_fecha), 0)
+
+
+def test_limites_de_frescura():
+    assert apply_freshness(40, 0) == apply_freshness(40, 1) == 54.1
+    assert apply_freshness(40, 48) == 40
+    assert apply_freshness(40, 120) == 40
+    assert apply_freshness(40, 121) == 20
+
+
+@pytest.fixture(scope="module")
+def connection():
+    try:
+        from database import engine
+        conn = engine.connect()
+    except Exception as e:
+        pytest.skip(f"PostgreSQL no disponible: {e}")
+    yield conn
+    conn.close()
+
+
+def evaluate_expr(conn, base, fecha_publicacion, fecha_extraccion):
+    """premium_score_expr con las columnas de Noticia reemplazadas por valores fijos"""
+    from sqlalchemy import literal, select
+    from sqlalchemy.sql.visitors import replacement_traverse
+    from models import Noticia
+
+    values = {
+        "premium_score_base": base,
+        "fecha_publicacion": fecha_publicacion,
+        "fecha_extraccion": fecha_extraccion,
+    }
+
+    def replace(element):
+        if getattr(element, "table", None) is Noticia.__table__ and element.key in values:
+            return literal(values[element.key], type_=element.type)
+        return None
+
+    expr = replacement_traverse(premium_score_expr(NOW), {}, replace)
+    return float(conn.execute(select(expr)).scalar())
+
+
+@pytest.mark.parametrize("horas", HOURS)
+def test_expr_sql_igual_a_apply_freshness(connection, horas):
+    fecha = NOW - timedelta(hours=horas)
+    assert evaluate_expr(connection, 40.0, fecha, None) == pytest.approx(apply_freshness(40.0, horas), abs=0.01)
+
+
+def test_expr_sql_fecha_de_referencia(connection):
+    extraida = NOW - timedelta(hours=30)
+    assert evaluate_expr(connection, 40.0, None, extraida) == pytest.approx(apply_freshness(40.0, 30), abs=0.01)
+    assert evaluate_expr(connection, 40.0, None, None) == pytest.approx(apply_freshness(40.0, 0), abs=0.01)
@@ -0,0 +1,108 @@
+"""
+Pruebas de resolve_state: mismas reglas que tenía /subscriptions/status con consultas
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+pytest.importorskip("sqlalchemy")
+
+from subscription_state import SubscriptionSnapshot, resolve_state
+
+NOW = datetime(2025, 6, 1, 12, 0)
+
+
+def snapshot(id, estado, fecha_inicio=None, fecha_fin=None, fecha_revision=None, creado_en=None):
+    return SubscriptionSnapshot(
+        id=id,
+        estado=estado,
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_fin,
+        renovacion_automatica=False,
+        referencia_pago=None,
+        fecha_pago_notificado=None,
+        fecha_revision=fecha_revision,
+        motivo_rechazo=None,
+        creado_en=creado_en,
+        plan=None
+    )
+
+
+def days(n):
+    return NOW + timedelta(days=n)
+
+
+def test_sin_suscripciones():
+    state = resolve_state([], NOW)
+    assert state.active is None and state.pending is None and state.rejected is None
+
+
+def test_activa_mas_reciente_vigente():
+    subscriptions = [
+        snapshot(1, "active", fecha_inicio=days(-60), fecha_fin=days(-30)),
+        snapshot(2, "active", fecha_inicio=days(-10), fecha_fin=days(20)),
+        snapshot(3, "active", fecha_inicio=days(-20), fecha_fin=None),
+        snapshot(4, "pending", creado_en=days(-1)),
+    ]
+    state = resolve_state(subscriptions, NOW)
+    assert state.active.id == 2
+    # Con una activa no se muestran pendientes ni rechazadas
+    assert state.pending is None and state.rejected is None
+
+
+def test_activa_vence_en_fecha_fin():
+    state = resolve_state([snapshot(1, "active", fecha_inicio=days(-30), fecha_fin=NOW)], NOW)
+    assert state.active is None
+
+
+def test_pendiente_posterior_a_la_ultima_revision():
+    subscriptions = [
+        snapshot(1, "rejected", fecha_revision=days(-5), creado_en=days(-7)),
+        snapshot(2, "pending", creado_en=days(-8)),
+        snapshot(3, "pending", creado_en=days(-2)),
+    ]
+    state = resolve_state(subscriptions, NOW)
+    assert state.pending.id == 3
+    assert state.rejected is None
+
+
+def test_pendiente_anterior_a_la_revision_muestra_rechazada():
+    subscriptions = [
+        snapshot(1, "rejected", fecha_revision=days(-5), creado_en=days(-3)),
+        snapshot(2, "pending", creado_en=days(-4)),
+    ]
+    state = resolve_state(subscriptions, NOW)
+    assert state.pending is None
+    assert state.rejected.id == 1
+
+
+def test_revisada_sin_fecha_de_creacion_no_muestra_pendientes():
+    # En SQL "creado_en > NULL" no coincide con ninguna fila
+    subscriptions = [
+        snapshot(1, "expired", fecha_revision=days(-5), creado_en=None),
+        snapshot(2, "pending", creado_en=days(-1)),
+    ]
+    state = resolve_state(subscriptions, NOW)
+    assert state.pending is None
+
+
+def test_sin_revisiones_cualquier_pendiente():
+    subscriptions = [
+        snapshot(1, "pending", creado_en=days(-9)),
+        snapshot(2, "pending", creado_en=days(-3)),
+    ]
+    assert resolve_state(subscriptions, NOW).pending.id == 2
+
+
+def test_rechazada_mas_reciente_por_revision():
+    subscriptions = [
+        snapshot(1, "rejected", fecha_revision=days(-2), creado_en=days(-10)),
+        snapshot(2, "rejected", fecha_revision=days(-6), creado_en=days(-4)),
+        snapshot(3, "rejected", fecha_revision=None, creado_en=days(-1)),
+    ]
+    assert resolve_state(subscriptions, NOW).rejected.id == 1
@@ -63,7 +63,7 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(new_user)
     
-    token = AuthUGC.create_access_token(new_user.id, new_user.email, new_user.role.value)
+    token = AuthUGC.create_user_token(new_user)
     
     logger.info(f"Usuario UGC registrado: {new_user.email}")
     
@@ -88,7 +88,7 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
             detail="Email o contraseña incorrectos"
         )
     
-    token = AuthUGC.create_access_token(user.id, user.email, user.role.value)
+    token = AuthUGC.create_user_token(user)
     
     logger.info(f"Usuario UGC logueado: {user.email}")
     
@@ -20,9 +20,15 @@ from models_ugc_enhanced import (
     User, Post, Report, Notification, SystemSettings, Reaction,
     RoleEnum, TipoContenido, EstadoPublicacion, EstadoReporte, MotivoReporte, TipoReaccion
 )
-from auth_ugc import AuthUGC, get_current_user, get_current_admin_user
+from auth_ugc import AuthUGC, get_current_user, get_current_admin_user, get_optional_user
 from notification_service import NotificationService
 from report_service import ReportService
+from interaction_counters import get_counter_buffer
+from reaction_service import REACTION_TYPES, MAX_BATCH_POSTS, toggle_reaction, get_reaction_stats
+from feed_service import get_feed_service
+from creator_stats_service import DEFAULT_PAGE_SIZE, get_creator_stats_service, page_params, pagination_info
+from dashboard_service import get_dashboard_service, get_earnings_config_cache
+from upload_pipeline import save_upload, image_renditions, UploadTooLarge, InvalidImage, MAX_UPLOAD_BYTES
 import logging
 
 logger = logging.getLogger(__name__)
@@ -63,6 +69,8 @@ class PostResponse(BaseModel):
     contenido: str
     descripcion: Optional[str] = None
     imagen_url: Optional[str] = None
+    imagen_thumb_url: Optional[str] = None  # Miniatura WebP (si la imagen se subió al sitio)
+    imagen_original_url: Optional[str] = None
     fuente: Optional[str] = None
     estado: str
     views: int
@@ -132,6 +140,10 @@ class ReactionStats(BaseModel):
     total: int = 0
     user_reaction: Optional[str] = None  # Reacción del usuario actual
 
+class ReactionBatchRequest(BaseModel):
+    post_ids: List[int]
+    session_id: Optional[str] = None  # Para usuarios anónimos
+
 # ===== ENDPOINTS DE AUTENTICACIÓN =====
 
 @auth_router.post("/register", response_model=TokenResponse)
@@ -151,7 +163,7 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(new_user)
     
-    token = AuthUGC.create_access_token(new_user.id, new_user.email, new_user.role.value)
+    token = AuthUGC.create_user_token(new_user)
     
     logger.info(f"Usuario UGC registrado: {new_user.email}")
     
@@ -176,7 +188,7 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
             detail="Email o contraseña incorrectos"
         )
     
-    token = AuthUGC.create_access_token(user.id, user.email, user.role.value)
+    token = AuthUGC.create_user_token(user)
     
     logger.info(f"Usuario UGC logueado: {user.email}")
     
@@ -207,7 +219,7 @@ async def upload_image(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user)
 ):
-    """Subir imagen para noticias"""
+    """Subir imagen para noticias (sin EXIF, deduplicada y con versiones medium/thumbnail)"""
     
     # Verificar que el archivo sea una imagen
     if not file.content_type or not file.content_type.startswith('image/'):
@@ -216,65 +228,34 @@ async def upload_image(
             detail="Solo se permiten archivos de imagen (JPG, PNG, GIF, etc.)"
         )
     
-    # Verificar tamaño del archivo (máx 5MB)
-    file_size = 0
-    content = await file.read()
-    file_size = len(content)
-    
-    if file_size > 5 * 1024 * 1024:  # 5MB
+    # Se escribe a disco por bloques; el tamaño máximo se controla durante la lectura
+    try:
+        result = await save_upload(file)
+    except UploadTooLarge:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El archivo es demasiado grande. Máximo 5MB"
+            detail=f"El archivo es demasiado grande. Máximo {MAX_UPLOAD_BYTES // (1024 * 1024)}MB"
         )
-    
-    # Crear directorio de uploads si no existe
-    # Usar ruta relativa al archivo actual para consistencia con main.py
-    backend_dir = os.path.dirname(os.path.abspath(__file__))
-    upload_dir = os.path.join(backend_dir, "uploads", "images")
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Generar nombre único para el archivo
-    file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'jpg'
-    unique_filename = f"{uuid.uuid4()}.{file_extension}"
-    file_path = os.path.join(upload_dir, unique_filename)
-    
-    # Guardar archivo
-    with open(file_path, "wb") as buffer:
-        buffer.write(content)
-    
-    # Verificar que el archivo se guardó correctamente
-    if os.path.exists(file_path):
-        logger.info(f"✅ Imagen guardada exitosamente: {file_path}")
-    else:
-        logger.error(f"❌ Error: No se pudo guardar la imagen en {file_path}")
-    
-    # Retornar URL relativa
-    image_url = f"/uploads/images/{unique_filename}"
-    
-    logger.info(f"Imagen subida por usuario {current_user.id}: {unique_filename} -> {image_url}")
-    
-    # Verificar que el archivo existe y es accesible
-    if not os.path.exists(file_path):
-        logger.error(f"❌ Error crítico: Archivo guardado pero no encontrado en {file_path}")
+    except InvalidImage as e:
+        logger.warning(f"Imagen inválida subida por usuario {current_user.id}: {e}")
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error al guardar la imagen"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El archivo no es una imagen válida"
         )
     
-    # Verificar tamaño del archivo guardado
-    saved_file_size = os.path.getsize(file_path)
-    if saved_file_size != file_size:
-        logger.warning(f"⚠️ Tamaño del archivo guardado ({saved_file_size}) no coincide con el tamaño original ({file_size})")
-    
-    logger.info(f"✅ Imagen guardada y verificada: {file_path} ({saved_file_size} bytes)")
+    image_url = result.image_url
+    renditions = image_renditions(image_url)
+    logger.info(f"✅ Imagen subida por usuario {current_user.id}: {result.filename} -> {image_url}"
+                f"{' (duplicada)' if result.deduplicated else ''}")
     
     return {
         "success": True,
         "image_url": image_url,
-        "filename": unique_filename,
-        "size": file_size,
-        "saved_size": saved_file_size,
-        "file_path": file_path  # Solo para debug, no debería enviarse en producción
+        "filename": result.filename,
+        "size": result.size,
+        "deduplicated": result.deduplicated,
+        "medium_url": renditions['imagen_url'],
+        "thumbnail_url": renditions['imagen_thumb_url']
     }
 
 # Endpoint de servir imágenes movido a main.py usando StaticFiles
@@ -327,6 +308,7 @@ async def create_post(
         db.add(new_post)
         db.commit()
         db.refresh(new_post)
+        get_creator_stats_service().invalidate_user(current_user.id)
         
         # Verificar que imagen_url se guardó correctamente
         logger.info(f"✅ Post creado con ID {new_post.id}, imagen_url guardada: {new_post.imagen_url}")
@@ -353,39 +335,21 @@ async def create_post(
 
 @ugc_router.get("/my-posts")
 async def get_my_posts(
+    limit: int = DEFAULT_PAGE_SIZE,
+    offset: int = 0,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Obtener mis publicaciones con todos los estados y estadísticas"""
-    posts = db.query(Post).filter(Post.user_id == current_user.id).order_by(Post.created_at.desc()).all()
-    
-    # Calcular estadísticas con manejo de NULL
-    total_views = sum((post.views if post.views is not None else 0) for post in posts)
-    total_clicks = sum((post.clicks if post.clicks is not None else 0) for post in posts)
-    total_interacciones = sum((post.interacciones if post.interacciones is not None else 0) for post in posts)
-    
-    # Calcular ganancias del usuario usando configuración por tipo
-    total_ganancia = 0.0
-    for post in posts:
-        try:
-            earnings_config = get_earnings_for_type(db, post.tipo)
-            # Manejar valores NULL
-            views = post.views if post.views is not None else 0
-            clicks = post.clicks if post.clicks is not None else 0
-            interacciones = post.interacciones if post.interacciones is not None else 0
-            
-            total_interactions = views + clicks + interacciones
-            cost_per_interaction = earnings_config["cost_per_interaction"]
-            user_percentage = earnings_config["percentage"] / 100
-            post_earning = total_interactions * cost_per_interaction * user_percentage
-            total_ganancia += post_earning
-        except Exception as e:
-            logger.warning(f"Error calculando earnings para post {post.id}: {e}")
-            continue
+    """Obtener mis publicaciones con todos los estados y estadísticas (paginadas)"""
+    limit, offset = page_params(limit, offset)
+    creator_stats = get_creator_stats_service()
+    totals = creator_stats.get_stats(db, current_user.id)["all"]
+    posts = creator_stats.get_posts_page(db, current_user.id, limit, offset)
     
+    # Los listados usan las versiones reducidas de las imágenes
     posts_data = [
         PostResponse(
-            **post.__dict__,
+            **{**post.__dict__, **image_renditions(post.imagen_url)},
             user_email=current_user.email
         ) for post in posts
     ]
@@ -393,11 +357,12 @@ async def get_my_posts(
     return {
         "posts": posts_data,
         "stats": {
-            "total_posts": len(posts),
-            "total_views": total_views,
-            "total_clicks": total_clicks,
-            "total_ganancia": round(total_ganancia, 2)
-        }
+            "total_posts": totals["posts"],
+            "total_views": totals["views"],
+            "total_clicks": totals["clicks"],
+            "total_ganancia": round(totals["ganancia"], 2)
+        },
+        "pagination": pagination_info(totals["posts"], limit, offset)
     }
 
 # ===== ENDPOINTS DE MONETIZACIÓN =====
@@ -448,8 +413,7 @@ async def get_monetization_progress(
     db: Session = Depends(get_db)
 ):
     """Obtener progreso de requisitos de monetización"""
-    from sqlalchemy import func
-    from datetime import datetime, timedelta
+    from datetime import datetime
     
     # Obtener requisitos configurables
     requirements = get_monetization_requirements(db)
@@ -459,36 +423,13 @@ async def get_monetization_progress(
     account_age = datetime.utcnow() - current_user.created_at
     account_age_days = account_age.days
     
-    # Requisito 1: Noticias publicadas
-    noticias_publicadas = db.query(func.count(Post.id)).filter(
-        Post.user_id == current_user.id,
-        Post.tipo == 'noticia',
-        Post.estado == 'published'
-    ).scalar()
-    
-    # Requisito 2: Interacciones en noticias
-    interacciones_noticias = db.query(
-        func.sum(Post.views + Post.clicks + Post.interacciones)
-    ).filter(
-        Post.user_id == current_user.id,
-        Post.tipo == 'noticia',
-        Post.estado == 'published'
-    ).scalar() or 0
-    
-    # Requisito 3: Contenido simple (posts, imágenes, videos)
-    contenido_simple = db.query(func.count(Post.id)).filter(
-        Post.user_id == current_user.id,
-        Post.tipo.in_(['texto', 'imagen', 'video', 'post', 'comentario', 'resena']),
-        Post.estado == 'published'
-    ).scalar()
-    
-    # Requisito 4: Reacciones totales (suma de todas las reacciones en todos los posts del usuario)
-    reacciones_totales = db.query(func.count(Reaction.id)).join(
-        Post, Reaction.post_id == Post.id
-    ).filter(
-        Post.user_id == current_user.id,
-        Post.estado == 'published'
-    ).scalar() or 0
+    # Requisitos 1 a 4: noticias publicadas, interacciones en noticias, contenido simple
+    # (posts, imágenes, videos) y reacciones totales en todos los posts publicados del usuario
+    creator_stats = get_creator_stats_service().get_stats(db, current_user.id)
+    noticias_publicadas = creator_stats["noticias_publicadas"]
+    interacciones_noticias = creator_stats["interacciones_noticias"]
+    contenido_simple = creator_stats["contenido_simple"]
+    reacciones_totales = creator_stats["reacciones_totales"]
     
     # Verificar si todos los requisitos se cumplen
     req_noticias = noticias_publicadas >= requirements["min_noticias"]
@@ -574,6 +515,8 @@ async def activate_monetization(
 
 @ugc_router.get("/monetization/earnings")
 async def get_user_earnings(
+    limit: int = DEFAULT_PAGE_SIZE,
+    offset: int = 0,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -592,71 +535,42 @@ async def get_user_earnings(
             detail="Debes activar la monetización primero"
         )
     
-    # Obtener todos los posts del usuario
-    posts = db.query(Post).filter(
-        Post.user_id == current_user.id,
-        Post.estado == 'published'
-    ).all()
+    limit, offset = page_params(limit, offset)
+    creator_stats = get_creator_stats_service()
+    stats = creator_stats.get_stats(db, current_user.id)
+    published = stats["published"]
     
-    # Calcular ganancias por post
+    # Ganancias por post solo para la página pedida
     posts_earnings = []
-    total_views = 0
-    total_clicks = 0
-    total_interactions = 0
-    total_earnings = 0.0
-    
-    # Agrupar ganancias por tipo
-    from collections import defaultdict
-    earnings_by_type = defaultdict(lambda: {"count": 0, "earnings": 0.0})
-    
-    for post in posts:
-        try:
-            earnings_config = get_earnings_for_type(db, post.tipo)
-            # Manejar valores NULL
-            views = post.views if post.views is not None else 0
-            clicks = post.clicks if post.clicks is not None else 0
-            interacciones = post.interacciones if post.interacciones is not None else 0
-            
-            post_interactions = views + clicks + interacciones
-            cost_per_interaction = earnings_config["cost_per_interaction"]
-            user_percentage = earnings_config["percentage"] / 100
-            post_earning = post_interactions * cost_per_interaction * user_percentage
-            
-            total_views += views
-            total_clicks += clicks
-            total_interactions += interacciones
-            total_earnings += post_earning
-            
-            posts_earnings.append({
-                "id": post.id,
-                "tipo": post.tipo,
-                "titulo": post.titulo,
-                "contenido": post.contenido,
-                "views": views,
-                "clicks": clicks,
-                "interacciones": interacciones,
-                "user_earnings": post_earning,
-                "created_at": post.created_at
-            })
-            
-            earnings_by_type[post.tipo]["count"] += 1
-            earnings_by_type[post.tipo]["earnings"] += post_earning
-        except Exception as e:
-            logger.warning(f"Error calculando earnings para post {post.id}: {e}")
-            continue
+    for post in creator_stats.get_posts_page(db, current_user.id, limit, offset, published_only=True):
+        views = post.views or 0
+        clicks = post.clicks or 0
+        interacciones = post.interacciones or 0
+        posts_earnings.append({
+            "id": post.id,
+            "tipo": post.tipo,
+            "titulo": post.titulo,
+            "contenido": post.contenido,
+            "views": views,
+            "clicks": clicks,
+            "interacciones": interacciones,
+            "user_earnings": creator_stats.post_earning(db, post.tipo, views + clicks + interacciones),
+            "created_at": post.created_at
+        })
     
     earnings_by_type_list = [
         {"tipo": tipo, "count": data["count"], "earnings": data["earnings"]}
-        for tipo, data in earnings_by_type.items()
+        for tipo, data in stats["published_by_type"].items()
     ]
     
     return {
-        "total_earnings": total_earnings,
-        "total_views": total_views,
-        "total_clicks": total_clicks,
-        "total_interactions": total_interactions,
+        "total_earnings": published["ganancia"],
+        "total_views": published["views"],
+        "total_clicks": published["clicks"],
+        "total_interactions": published["interacciones"],
         "posts": posts_earnings,
-        "earnings_by_type": earnings_by_type_list
+        "earnings_by_type": earnings_by_type_list,
+        "pagination": pagination_info(published["posts"], limit, offset)
     }
 
 @ugc_router.get("/feed", response_model=List[PostResponse])
@@ -665,19 +579,7 @@ async def get_published_feed(
     db: Session = Depends(get_db)
 ):
     """Obtener feed público (solo posts published)"""
-    posts = db.query(Post).filter(
-        Post.estado == 'published'
-    ).order_by(Post.created_at.desc()).limit(limit).all()
-    
-    result = []
-    for post in posts:
-        user = db.query(User).filter(User.id == post.user_id).first()
-        result.append(PostResponse(
-            **post.__dict__,
-            user_email=user.email if user else None
-        ))
-    
-    return result
+    return get_feed_service().get_page(db, limit)
 
 @ugc_router.post("/posts/{post_id}/view")
 async def register_post_view(
@@ -685,25 +587,17 @@ async def register_post_view(
     db: Session = Depends(get_db)
 ):
     """Registrar una vista en un post (sin necesidad de autenticación)"""
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = db.query(Post.id, Post.views).filter(Post.id == post_id).first()
     
     if not post:
         raise HTTPException(status_code=404, detail="Publicación no encontrada")
     
-    # Incrementar contador de vistas
-    if post.views is None:
-        post.views = 0
-    post.views += 1
-    
-    try:
-        db.commit()
-        db.refresh(post)
-        logger.info(f"👁️ Vista registrada en post {post_id}. Total vistas: {post.views}")
-        return {"success": True, "views": post.views}
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error registrando vista en post {post_id}: {e}")
-        raise HTTPException(status_code=500, detail="Error registrando vista")
+    # El incremento se acumula en memoria y se escribe en lote (write-behind)
+    counters = get_counter_buffer()
+    counters.record(post_id, "view")
+    total = (post.views or 0) + counters.pending(post_id, "view")
+    logger.debug(f"👁️ Vista registrada en post {post_id}. Total: {total}")
+    return {"success": True, "views": total}
 
 @ugc_router.post("/posts/{post_id}/click")
 async def register_post_click(
@@ -711,25 +605,17 @@ async def register_post_click(
     db: Session = Depends(get_db)
 ):
     """Registrar un click en un post (cuando se abre el modal/detalle)"""
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = db.query(Post.id, Post.clicks).filter(Post.id == post_id).first()
     
     if not post:
         raise HTTPException(status_code=404, detail="Publicación no encontrada")
     
-    # Incrementar contador de clicks
-    if post.clicks is None:
-        post.clicks = 0
-    post.clicks += 1
-    
-    try:
-        db.commit()
-        db.refresh(post)
-        logger.info(f"🖱️ Click registrado en post {post_id}. Total clicks: {post.clicks}")
-        return {"success": True, "clicks": post.clicks}
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error registrando click en post {post_id}: {e}")
-        raise HTTPException(status_code=500, detail="Error registrando click")
+    # El incremento se acumula en memoria y se escribe en lote (write-behind)
+    counters = get_counter_buffer()
+    counters.record(post_id, "click")
+    total = (post.clicks or 0) + counters.pending(post_id, "click")
+    logger.debug(f"🖱️ Click registrada en post {post_id}. Total: {total}")
+    return {"success": True, "clicks": total}
 
 @ugc_router.post("/posts/{post_id}/interact")
 async def register_post_interaction(
@@ -737,25 +623,17 @@ async def register_post_interaction(
     db: Session = Depends(get_db)
 ):
     """Registrar una interacción en un post (like, share, etc)"""
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = db.query(Post.id, Post.interacciones).filter(Post.id == post_id).first()
     
     if not post:
         raise HTTPException(status_code=404, detail="Publicación no encontrada")
     
-    # Incrementar contador de interacciones
-    if post.interacciones is None:
-        post.interacciones = 0
-    post.interacciones += 1
-    
-    try:
-        db.commit()
-        db.refresh(post)
-        logger.info(f"⭐ Interacción registrada en post {post_id}. Total interacciones: {post.interacciones}")
-        return {"success": True, "interacciones": post.interacciones}
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error registrando interacción en post {post_id}: {e}")
-        raise HTTPException(status_code=500, detail="Error registrando interacción")
+    # El incremento se acumula en memoria y se escribe en lote (write-behind)
+    counters = get_counter_buffer()
+    counters.record(post_id, "other")
+    total = (post.interacciones or 0) + counters.pending(post_id, "other")
+    logger.debug(f"⭐ Interacción registrada en post {post_id}. Total: {total}")
+    return {"success": True, "interacciones": total}
 
 # ===== ENDPOINTS DE REACCIONES =====
 
@@ -763,7 +641,7 @@ async def register_post_interaction(
 async def add_reaction(
     post_id: int,
     reaction_data: ReactionCreate,
-    current_user: Optional[User] = Depends(lambda: None),  # Opcional
+    current_user: Optional[User] = Depends(get_optional_user),
     db: Session = Depends(get_db)
 ):
     """Agregar o cambiar reacción a un post"""
@@ -773,82 +651,63 @@ async def add_reaction(
         raise HTTPException(status_code=404, detail="Publicación no encontrada")
     
     # Validar tipo de reacción
-    valid_reactions = ['like', 'love', 'haha', 'sad', 'angry']
-    if reaction_data.tipo not in valid_reactions:
-        raise HTTPException(status_code=400, detail=f"Tipo de reacción inválido. Debe ser uno de: {', '.join(valid_reactions)}")
-    
-    # Buscar si ya existe una reacción del usuario/sesión
-    if current_user:
-        existing_reaction = db.query(Reaction).filter(
-            Reaction.post_id == post_id,
-            Reaction.user_id == current_user.id
-        ).first()
-    elif reaction_data.session_id:
-        existing_reaction = db.query(Reaction).filter(
-            Reaction.post_id == post_id,
-            Reaction.session_id == reaction_data.session_id
-        ).first()
-    else:
+    if reaction_data.tipo not in REACTION_TYPES:
+        raise HTTPException(status_code=400, detail=f"Tipo de reacción inválido. Debe ser uno de: {', '.join(REACTION_TYPES)}")
+    
+    if not current_user and not reaction_data.session_id:
         raise HTTPException(status_code=400, detail="Se requiere autenticación o session_id")
     
-    if existing_reaction:
-        # Si es la misma reacción, eliminarla (toggle)
-        if existing_reaction.tipo == reaction_data.tipo:
-            db.delete(existing_reaction)
-            db.commit()
-            logger.info(f"🔄 Reacción {reaction_data.tipo} eliminada del post {post_id}")
-            return {"success": True, "action": "removed", "tipo": reaction_data.tipo}
-        else:
-            # Cambiar la reacción
-            existing_reaction.tipo = reaction_data.tipo
-            db.commit()
-            logger.info(f"🔄 Reacción cambiada a {reaction_data.tipo} en post {post_id}")
-            return {"success": True, "action": "changed", "tipo": reaction_data.tipo}
+    # Misma reacción = quitarla (toggle); los contadores del post se ajustan en la misma transacción
+    action = toggle_reaction(
+        db,
+        post_id,
+        reaction_data.tipo,
+        user_id=current_user.id if current_user else None,
+        session_id=reaction_data.session_id
+    )
+    get_creator_stats_service().invalidate_user(post.user_id)
+    
+    if action == "removed":
+        logger.info(f"🔄 Reacción {reaction_data.tipo} eliminada del post {post_id}")
+    elif action == "changed":
+        logger.info(f"🔄 Reacción cambiada a {reaction_data.tipo} en post {post_id}")
     else:
-        # Crear nueva reacción
-        new_reaction = Reaction(
-            post_id=post_id,
-            user_id=current_user.id if current_user else None,
-            session_id=reaction_data.session_id if not current_user else None,
-            tipo=reaction_data.tipo
-        )
-        db.add(new_reaction)
-        db.commit()
         logger.info(f"✨ Nueva reacción {reaction_data.tipo} agregada al post {post_id}")
-        return {"success": True, "action": "added", "tipo": reaction_data.tipo}
+    return {"success": True, "action": action, "tipo": reaction_data.tipo}
 
 @ugc_router.get("/posts/{post_id}/reactions")
 async def get_post_reactions(
     post_id: int,
     session_id: Optional[str] = None,
-    current_user: Optional[User] = Depends(lambda: None),
+    current_user: Optional[User] = Depends(get_optional_user),
     db: Session = Depends(get_db)
 ):
     """Obtener estadísticas de reacciones de un post"""
-    # Contar reacciones por tipo
-    reactions = db.query(Reaction).filter(Reaction.post_id == post_id).all()
-    
-    stats = {
-        "like": 0,
-        "love": 0,
-        "haha": 0,
-        "sad": 0,
-        "angry": 0,
-        "total": len(reactions),
-        "user_reaction": None
-    }
-    
-    for reaction in reactions:
-        if reaction.tipo in stats:
-            stats[reaction.tipo] += 1
-        
-        # Verificar si el usuario actual ya reaccionó
-        if current_user and reaction.user_id == current_user.id:
-            stats["user_reaction"] = reaction.tipo
-        elif session_id and reaction.session_id == session_id:
-            stats["user_reaction"] = reaction.tipo
-    
-    return stats
+    stats = get_reaction_stats(
+        db,
+        [post_id],
+        user_id=current_user.id if current_user else None,
+        session_id=session_id
+    )
+    return stats[post_id]
+
+@ugc_router.post("/posts/reactions/batch")
+async def get_posts_reactions_batch(
+    batch: ReactionBatchRequest,
+    current_user: Optional[User] = Depends(get_optional_user),
+    db: Session = Depends(get_db)
+):
+    """Estadísticas de reacciones de varios posts (p. ej. todas las tarjetas visibles) en una consulta"""
+    if len(batch.post_ids) > MAX_BATCH_POSTS:
+        raise HTTPException(status_code=400, detail=f"Máximo {MAX_BATCH_POSTS} posts por consulta")
+    
+    stats = get_reaction_stats(
+        db,
+        batch.post_ids,
+        user_id=current_user.id if current_user else None,
+        session_id=batch.session_id
+    )
+    return {str(post_id): post_stats for post_id, post_stats in stats.items()}
 
 @ugc_router.post("/report")
 async def report_post(
@@ -969,99 +828,7 @@ async def get_admin_dashboard(
 ):
     """Obtener estadísticas del dashboard de admin"""
     try:
-        logger.info("📊 Iniciando carga de dashboard admin...")
-        
-        # Obtener todos los posts
-        logger.info("Obteniendo posts...")
-        total_posts = db.query(Post).count()
-        pending_posts = db.query(Post).filter(Post.estado == 'pending_review').count()
-        published_posts = db.query(Post).filter(Post.estado == 'published').count()
-        rejected_posts = db.query(Post).filter(Post.estado == 'rejected').count()
-        flagged_posts = db.query(Post).filter(Post.estado == 'flagged').count()
-        logger.info(f"✅ Posts obtenidos: {total_posts} total")
-        
-        # Obtener usuarios
-        logger.info("Obteniendo usuarios...")
-        total_users = db.query(User).count()
-        admin_users = db.query(User).filter(User.role == 'admin').count()
-        suspended_users = db.query(User).filter(User.suspendido == True).count()
-        logger.info(f"✅ Usuarios obtenidos: {total_users} total")
-        
-        # Calcular ingresos totales usando configuración por tipo
-        logger.info("Calculando ingresos...")
-        all_posts = db.query(Post).all()
-        total_ingresos = 0.0
-        ganancia_usuarios_total = 0.0
-        
-        for post in all_posts:
-            try:
-                earnings_config = get_earnings_for_type(db, post.tipo)
-                # Manejar valores NULL
-                views = post.views if post.views is not None else 0
-                clicks = post.clicks if post.clicks is not None else 0
-                interacciones = post.interacciones if post.interacciones is not None else 0
-                
-                total_interactions = views + clicks + interacciones
-                cost_per_interaction = earnings_config["cost_per_interaction"]
-                user_percentage = earnings_config["percentage"] / 100
-                
-                # Ingresos totales por este post
-                post_revenue = total_interactions * cost_per_interaction
-                total_ingresos += post_revenue
-                
-                # Ganancias del usuario por este post
-                user_earning = post_revenue * user_percentage
-                ganancia_usuarios_total += user_earning
-            except Exception as e:
-                logger.warning(f"Error calculando earnings para post {post.id}: {e}")
-                continue
-        
-        ganancia_admin = total_ingresos - ganancia_usuarios_total
-        logger.info(f"✅ Ingresos calculados: ${total_ingresos}")
-        
-        # Obtener reportes con manejo de errores
-        logger.info("Obteniendo reportes...")
-        try:
-            # Usar raw SQL para evitar problemas con enums
-            total_reportes = db.execute(text("SELECT COUNT(*) FROM reports")).scalar() or 0
-            reportes_pendientes = db.execute(
-                text("SELECT COUNT(*) FROM reports WHERE estado = 'pending'")
-            ).scalar() or 0
-            logger.info(f"✅ Reportes obtenidos: {total_reportes} total, {reportes_pendientes} pendientes")
-        except Exception as e:
-            logger.error(f"❌ Error obteniendo reportes: {e}")
-            total_reportes = 0
-            reportes_pendientes = 0
-        
-        logger.info("📦 Preparando respuesta del dashboard...")
-        
-        response_data = {
-            "posts": {
-                "total": total_posts,
-                "pending": pending_posts,
-                "published": published_posts,
-                "rejected": rejected_posts,
-                "flagged": flagged_posts
-            },
-            "users": {
-                "total": total_users,
-                "admins": admin_users,
-                "suspended": suspended_users
-            },
-            "earnings": {
-                "total_ingresos": round(total_ingresos, 2),
-                "ganancia_admin": round(ganancia_admin, 2),
-                "ganancia_usuarios": round(ganancia_usuarios_total, 2)
-            },
-            "reports": {
-                "total": total_reportes,
-                "pending": reportes_pendientes
-            }
-        }
-        
-        logger.info("✅ Dashboard obtenido exitosamente")
-        return response_data
-        
+        return get_dashboard_service().get(db)
     except Exception as e:
         logger.error(f"❌ ERROR CRÍTICO en dashboard: {e}")
         logger.exception(e)  # Esto mostrará el stack trace completo
@@ -1168,6 +935,8 @@ async def approve_post(
         logger.warning(f"No se pudo enviar notificación: {e}")
     
     db.commit()
+    get_feed_service().invalidate()
+    get_creator_stats_service().invalidate_user(post.user_id)
     
     logger.info(f"✅ Post {post_id} aprobado por admin {current_user.id}")
     
@@ -1207,6 +976,8 @@ async def reject_post(
         logger.warning(f"No se pudo enviar notificación: {e}")
     
     db.commit()
+    get_feed_service().invalidate()
+    get_creator_stats_service().invalidate_user(post.user_id)
     
     logger.info(f"❌ Post {post_id} rechazado por admin {current_user.id}")
     
@@ -1326,36 +1097,8 @@ async def update_report_threshold(
 # ===== GESTIÓN DE GANANCIAS POR TIPO DE CONTENIDO =====
 
 def get_earnings_for_type(db: Session, content_type: str) -> dict:
-    """Obtener configuración de ganancias para un tipo de contenido específico"""
-    try:
-        setting = db.query(SystemSettings).filter(
-            SystemSettings.clave == "earnings_config"
-        ).first()
-        
-        default_config = {
-            "noticia": {"percentage": 30, "cost_per_interaction": 0.05},
-            "texto": {"percentage": 30, "cost_per_interaction": 0.01},
-            "imagen": {"percentage": 30, "cost_per_interaction": 0.02},
-            "video": {"percentage": 30, "cost_per_interaction": 0.03},
-            "comentario": {"percentage": 30, "cost_per_interaction": 0.005},
-            "resena": {"percentage": 30, "cost_per_interaction": 0.02},
-            "post": {"percentage": 30, "cost_per_interaction": 0.01}
-        }
-        
-        if setting and setting.valor:
-            try:
-                config = json.loads(setting.valor)
-            except Exception as e:
-                logger.warning(f"Error parsing earnings config: {e}, using default")
-                config = default_config
-        else:
-            config = default_config
-        
-        return config.get(content_type, {"percentage": 30, "cost_per_interaction": 0.01})
-    except Exception as e:
-        logger.error(f"Error in get_earnings_for_type: {e}")
-        # Retornar configuración por defecto en caso de error
-        return {"percentage": 30, "cost_per_interaction": 0.01}
+    """Obtener configuración de ganancias para un tipo de contenido específico (en caché)"""
+    return get_earnings_config_cache().for_type(db, content_type)
 
 @admin_router.get("/settings/earnings-config")
 async def get_earnings_config(
@@ -1363,27 +1106,7 @@ async def get_earnings_config(
     db: Session = Depends(get_db)
 ):
     """Obtener configuración de ganancias por tipo de contenido"""
-    # Buscar la configuración en system_settings
-    setting = db.query(SystemSettings).filter(
-        SystemSettings.clave == "earnings_config"
-    ).first()
-    
-    if setting:
-        try:
-            config = json.loads(setting.valor)
-        except:
-            config = {}
-    else:
-        # Configuración por defecto
-        config = {
-            "noticia": {"percentage": 30, "cost_per_interaction": 0.05},
-            "texto": {"percentage": 30, "cost_per_interaction": 0.01},
-            "imagen": {"percentage": 30, "cost_per_interaction": 0.02},
-            "video": {"percentage": 30, "cost_per_interaction": 0.03},
-            "comentario": {"percentage": 30, "cost_per_interaction": 0.005},
-            "resena": {"percentage": 30, "cost_per_interaction": 0.02},
-            "post": {"percentage": 30, "cost_per_interaction": 0.01}
-        }
+    config = get_earnings_config_cache().get(db)
     
     return {"config": config}
 
@@ -1428,6 +1151,9 @@ async def update_earnings_config(
     
     try:
         db.commit()
+        get_earnings_config_cache().invalidate()
+        get_dashboard_service().invalidate()
+        get_creator_stats_service().invalidate_all()
         logger.info(f"✅ Configuración de ganancias actualizada por admin {current_user.id}")
         
         return {
@@ -1,76 +1,74 @@
 """
-Script para actualizar fechas antiguas de noticias de Twitter a fecha actual (2025)
+Script para actualizar fechas antiguas de noticias de Twitter a fecha actual (2025).
+Recorre las noticias con el marco de backfill (rangos de id con checkpoint y UPDATE masivos).
 """
 import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from sqlalchemy.orm import Session
-from backend.database import SessionLocal
-from backend.models import Noticia, Diario
+from database import SessionLocal
+from models import Noticia, Diario
+from backfill import BackfillJob, add_backfill_arguments, run_backfill
 from datetime import datetime, timezone
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def update_twitter_dates():
+
+def necesita_actualizar(fecha) -> bool:
+    """Fechas nulas, sin timezone o anteriores a 2025"""
+    return fecha is None or fecha.tzinfo is None or fecha.year < 2025
+
+
+class TwitterDatesBackfill(BackfillJob):
+    """Actualiza las fechas de publicación de noticias de Twitter a fecha actual con timezone UTC"""
+    name = "update_twitter_dates"
+    model = Noticia
+    columns = ("id", "titulo", "fecha_publicacion")
+
+    def __init__(self, diario_id: int):
+        self.diario_id = diario_id
+        self.fecha_actual = datetime.now(timezone.utc)
+
+    def filters(self):
+        return [Noticia.diario_id == self.diario_id]
+
+    def enrich(self, row):
+        fecha_antigua = row["fecha_publicacion"]
+        if not necesita_actualizar(fecha_antigua):
+            return None
+        logger.info(f"🔄 Actualizada: '{row['titulo'][:50]}...' - {fecha_antigua} → {self.fecha_actual.date()}")
+        return {"id": row["id"], "fecha_publicacion": self.fecha_actual}
+
+
+def update_twitter_dates(args):
     """Actualiza las fechas de publicación de noticias de Twitter a fecha actual (2025) con timezone UTC"""
     db = SessionLocal()
-    
+
     try:
         # Buscar el diario de Twitter
         twitter_diario = db.query(Diario).filter(Diario.nombre == 'Twitter').first()
-        
+
         if not twitter_diario:
             logger.warning("⚠️ Diario 'Twitter' no encontrado en la base de datos.")
             return
-        
-        # Obtener TODAS las noticias de Twitter para actualizar
-        twitter_news = db.query(Noticia).filter(
-            Noticia.diario_id == twitter_diario.id
-        ).all()
-        
-        logger.info(f"📊 Encontradas {len(twitter_news)} noticias de Twitter")
-        
-        # Actualizar todas las fechas a fecha actual con timezone UTC
-        fecha_actual = datetime.now(timezone.utc)
-        updated_count = 0
-        
-        for noticia in twitter_news:
-            fecha_antigua = noticia.fecha_publicacion
-            
-            # Si la fecha no tiene timezone o es anterior a 2025, actualizarla
-            necesita_actualizar = False
-            
-            if fecha_antigua:
-                # Verificar si tiene timezone
-                if fecha_antigua.tzinfo is None:
-                    necesita_actualizar = True
-                    logger.info(f"⚠️ Fecha sin timezone: '{noticia.titulo[:50]}...' - {fecha_antigua}")
-                # Verificar si es anterior a 2025
-                elif fecha_antigua.year < 2025:
-                    necesita_actualizar = True
-                    logger.info(f"⚠️ Fecha anterior a 2025: '{noticia.titulo[:50]}...' - {fecha_antigua}")
-            else:
-                necesita_actualizar = True
-                logger.info(f"⚠️ Fecha nula: '{noticia.titulo[:50]}...'")
-            
-            if necesita_actualizar:
-                noticia.fecha_publicacion = fecha_actual
-                updated_count += 1
-                logger.info(f"🔄 Actualizada: '{noticia.titulo[:50]}...' - {fecha_antigua} → {fecha_actual.date()}")
-        
-        db.commit()
-        logger.info(f"✅ Total de noticias actualizadas: {updated_count}")
-        
-    except Exception as e:
-        logger.error(f"❌ Error al actualizar fechas de Twitter: {e}", exc_info=True)
-        db.rollback()
+        diario_id = twitter_diario.id
     finally:
         db.close()
 
+    try:
+        progress = run_backfill(TwitterDatesBackfill(diario_id), args)
+        logger.info(f"✅ Total de noticias actualizadas: {progress.updated}")
+    except Exception as e:
+        logger.error(f"❌ Error al actualizar fechas de Twitter: {e}", exc_info=True)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Actualizar fechas de noticias de Twitter")
+    add_backfill_arguments(parser)
+    args = parser.parse_args()
+
     logger.info("🚀 Iniciando actualización de fechas de Twitter...")
-    update_twitter_dates()
+    update_twitter_dates(args)
     logger.info("✅ Proceso completado")
@@ -0,0 +1,202 @@
+"""
+Pipeline de imágenes subidas por usuarios (UGC).
+La subida se escribe a disco por bloques mientras se calcula su sha256; si el contenido ya
+existía se reutiliza. Luego, en un pool de hilos fuera del event loop, se eliminan los metadatos
+EXIF (corrigiendo la orientación) y se generan las versiones medium y thumbnail en WebP.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads", "images")
+UPLOAD_URL_PREFIX = "/uploads/images"
+
+MAX_UPLOAD_BYTES = int(float(os.getenv('UGC_MAX_UPLOAD_MB', '5')) * 1024 * 1024)
+CHUNK_SIZE = 64 * 1024
+
+# Anchos máximos de cada versión
+RENDITIONS = {
+    'medium': 1080,
+    'thumb': 320
+}
+WEBP_QUALITY = 80
+
+ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp', 'bmp'}
+# Formato detectado por Pillow -> extensión con la que se guarda
+FORMAT_EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp', 'BMP': 'bmp'}
+
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv('UGC_IMAGE_WORKERS', '2')), thread_name_prefix='ugc-img')
+
+
+class UploadTooLarge(Exception):
+    """La subida supera MAX_UPLOAD_BYTES"""
+
+
+class InvalidImage(Exception):
+    """El archivo no es una imagen que se pueda procesar"""
+
+
+@dataclass
+class UploadResult:
+    filename: str
+    size: int
+    digest: str
+    deduplicated: bool
+
+    @property
+    def image_url(self) -> str:
+        return f"{UPLOAD_URL_PREFIX}/{self.filename}"
+
+
+def rendition_filename(filename: str, rendition: str) -> str:
+    """Nombre de archivo de una versión: <nombre>_<versión>.webp"""
+    base = os.path.splitext(filename)[0]
+    return f"{base}_{rendition}.webp"
+
+
+def image_renditions(imagen_url: Optional[str]) -> Dict[str, Optional[str]]:
+    """
+    URLs para listados: imagen_url apunta a la versión medium (si existe) y se agregan
+    la miniatura y el original. Imágenes externas o subidas antiguas quedan igual.
+    """
+    result = {'imagen_url': imagen_url, 'imagen_thumb_url': None, 'imagen_original_url': imagen_url}
+    if not imagen_url or not imagen_url.startswith(UPLOAD_URL_PREFIX + '/'):
+        return result
+
+    filename = imagen_url[len(UPLOAD_URL_PREFIX) + 1:]
+    medium = rendition_filename(filename, 'medium')
+    thumb = rendition_filename(filename, 'thumb')
+    if os.path.exists(os.path.join(UPLOAD_DIR, medium)):
+        result['imagen_url'] = f"{UPLOAD_URL_PREFIX}/{medium}"
+    if os.path.exists(os.path.join(UPLOAD_DIR, thumb)):
+        result['imagen_thumb_url'] = f"{UPLOAD_URL_PREFIX}/{thumb}"
+    return result
+
+
+def _process_image(tmp_path: str, final_base: str) -> str:
+    """
+    Reescribe la imagen sin EXIF (aplicando la orientación) y genera las versiones WebP.
+    Se ejecuta en el pool de hilos. La extensión sale del formato real del contenido, no del
+    nombre que envió el cliente. El original se publica con su nombre final solo al terminar:
+    si algo falla se borra lo escrito y se lanza InvalidImage. Retorna el nombre del original.
+    """
+    try:
+        with Image.open(tmp_path) as image:
+            image.load()
+            animated = getattr(image, 'is_animated', False)
+            # Fotos de celular en formato MPO se guardan como JPEG normal
+            source_format = 'JPEG' if image.format == 'MPO' else image.format
+            if not animated:
+                image = ImageOps.exif_transpose(image)
+    except Exception as e:
+        raise InvalidImage(str(e))
+
+    extension = FORMAT_EXTENSIONS.get(source_format)
+    if extension is None:
+        # Pillow abre formatos que no se sirven como imagen web (PSD, TIFF...)
+        raise InvalidImage(f"Formato no soportado: {source_format}")
+
+    final_name = f"{final_base}.{extension}"
+    final_path = os.path.join(UPLOAD_DIR, final_name)
+    partial_path = os.path.join(UPLOAD_DIR, f".{final_name}.part")
+    written = [partial_path] + [os.path.join(UPLOAD_DIR, rendition_filename(final_name, rendition))
+                                for rendition in RENDITIONS]
+
+    try:
+        if animated:
+            # GIF/WebP animados se guardan tal cual (no suelen traer EXIF)
+            os.replace(tmp_path, partial_path)
+        else:
+            # Al volver a guardar sin pasar exif=... se descartan los metadatos
+            save_kwargs = {'quality': 90} if source_format in ('JPEG', 'WEBP') else {}
+            if source_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            image.save(partial_path, format=source_format, **save_kwargs)
+            os.remove(tmp_path)
+
+        with Image.open(partial_path) as base_image:
+            base_image.seek(0)
+            frame = base_image.convert('RGBA' if base_image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+            for rendition, max_width in RENDITIONS.items():
+                variant = frame.copy()
+                variant.thumbnail((max_width, max_width * 4), Image.LANCZOS)
+                variant.save(os.path.join(UPLOAD_DIR, rendition_filename(final_name, rendition)),
+                             format='WEBP', quality=WEBP_QUALITY, method=4)
+
+        os.replace(partial_path, final_path)
+    except Exception as e:
+        for path in written:
+            if os.path.exists(path):
+                os.remove(path)
+        raise InvalidImage(f"No se pudo procesar la imagen: {e}")
+
+    return final_name
+
+
+async def save_upload(upload_file, max_bytes: int = MAX_UPLOAD_BYTES) -> UploadResult:
+    """Guarda un UploadFile por bloques, deduplica por hash y genera las versiones"""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    loop = asyncio.get_running_loop()
+
+    tmp_path = os.path.join(UPLOAD_DIR, f".upload-{uuid.uuid4().hex}.tmp")
+    hasher = hashlib.sha256()
+    size = 0
+    output = await loop.run_in_executor(None, open, tmp_path, 'wb')
+    try:
+        while True:
+            chunk = await upload_file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"El archivo supera {max_bytes // (1024 * 1024)}MB")
+            hasher.update(chunk)
+            await loop.run_in_executor(None, output.write, chunk)
+    except Exception:
+        output.close()
+        os.remove(tmp_path)
+        raise
+    output.close()
+
+    digest = hasher.hexdigest()
+    final_base = digest[:32]
+
+    # Deduplicación: la misma imagen ya fue subida y procesada
+    for existing_ext in ALLOWED_EXTENSIONS:
+        existing = f"{final_base}.{existing_ext}"
+        if os.path.exists(os.path.join(UPLOAD_DIR, existing)):
+            os.remove(tmp_path)
+            logger.info(f"♻️ Imagen duplicada, se reutiliza {existing}")
+            return UploadResult(filename=existing, size=size, digest=digest, deduplicated=True)
+
+    if PIL_AVAILABLE:
+        try:
+            filename = await loop.run_in_executor(_executor, _process_image, tmp_path, final_base)
+        except InvalidImage:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    else:
+        # Sin Pillow se guarda el original sin procesar (la extensión solo puede salir del nombre)
+        extension = upload_file.filename.rsplit('.', 1)[-1].lower() if upload_file.filename and '.' in upload_file.filename else 'jpg'
+        if extension not in ALLOWED_EXTENSIONS:
+            extension = 'jpg'
+        if extension == 'jpeg':
+            extension = 'jpg'
+        filename = f"{final_base}.{extension}"
+        os.replace(tmp_path, os.path.join(UPLOAD_DIR, filename))
+
+    return UploadResult(filename=filename, size=size, digest=digest, deduplicated=False)
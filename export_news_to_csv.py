@@ -15,6 +15,7 @@ from sqlalchemy.orm import sessionmaker
 sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
 from database import engine, get_db
+from export_service import CSV_STYLE_PLAIN, export_filename, export_to_file
 from models import Noticia, Diario, EstadisticaScraping, AlertaConfiguracion, AlertaDisparo, TrendingKeywords, SiteMonitoring
 import logging
 
@@ -23,91 +24,20 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def export_noticias_to_csv():
-    """Exportar todas las noticias a CSV con todos los campos"""
+    """Exportar todas las noticias a CSV con todos los campos (en streaming, memoria constante)"""
     
     logger.info("🚀 Iniciando exportación de noticias a CSV...")
     
-    # Crear sesión de base de datos
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = SessionLocal()
+    export_dir = "exports"
+    os.makedirs(export_dir, exist_ok=True)
+    filename = os.path.join(export_dir, export_filename('csv'))
     
     try:
-        # Obtener todas las noticias con información del diario
-        noticias = db.query(Noticia).join(Diario).all()
-        
-        if not noticias:
-            logger.warning("⚠️ No se encontraron noticias en la base de datos")
-            return
-        
-        logger.info(f"📊 Encontradas {len(noticias)} noticias para exportar")
-        
-        # Crear directorio de exportación si no existe
-        export_dir = "exports"
-        os.makedirs(export_dir, exist_ok=True)
-        
-        # Nombre del archivo con timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{export_dir}/noticias_export_{timestamp}.csv"
-        
-        # Campos a exportar
-        fieldnames = [
-            'id', 'titulo', 'contenido', 'enlace', 'imagen_url', 'categoria',
-            'fecha_publicacion', 'fecha_extraccion', 'diario_id', 'diario_nombre',
-            'autor', 'tags', 'sentimiento', 'tiempo_lectura_min', 'popularidad_score',
-            'es_trending', 'palabras_clave', 'resumen_auto', 'idioma', 'region',
-            'titulo_hash', 'contenido_hash', 'similarity_hash', 'es_alerta',
-            'nivel_urgencia', 'keywords_alerta', 'geographic_type', 'geographic_confidence',
-            'geographic_keywords'
-        ]
-        
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for noticia in noticias:
-                # Preparar datos para CSV
-                row_data = {
-                    'id': noticia.id,
-                    'titulo': noticia.titulo,
-                    'contenido': noticia.contenido or '',
-                    'enlace': noticia.enlace or '',
-                    'imagen_url': noticia.imagen_url or '',
-                    'categoria': noticia.categoria,
-                    'fecha_publicacion': noticia.fecha_publicacion.isoformat() if noticia.fecha_publicacion else '',
-                    'fecha_extraccion': noticia.fecha_extraccion.isoformat() if noticia.fecha_extraccion else '',
-                    'diario_id': noticia.diario_id,
-                    'diario_nombre': noticia.diario.nombre if noticia.diario else '',
-                    'autor': noticia.autor or '',
-                    'tags': json.dumps(noticia.tags, ensure_ascii=False) if noticia.tags else '',
-                    'sentimiento': noticia.sentimiento or '',
-                    'tiempo_lectura_min': noticia.tiempo_lectura_min or '',
-                    'popularidad_score': noticia.popularidad_score or '',
-                    'es_trending': noticia.es_trending or False,
-                    'palabras_clave': json.dumps(noticia.palabras_clave, ensure_ascii=False) if noticia.palabras_clave else '',
-                    'resumen_auto': noticia.resumen_auto or '',
-                    'idioma': noticia.idioma or '',
-                    'region': noticia.region or '',
-                    'titulo_hash': noticia.titulo_hash or '',
-                    'contenido_hash': noticia.contenido_hash or '',
-                    'similarity_hash': noticia.similarity_hash or '',
-                    'es_alerta': noticia.es_alerta or False,
-                    'nivel_urgencia': noticia.nivel_urgencia or '',
-                    'keywords_alerta': json.dumps(noticia.keywords_alerta, ensure_ascii=False) if noticia.keywords_alerta else '',
-                    'geographic_type': noticia.geographic_type or '',
-                    'geographic_confidence': noticia.geographic_confidence or '',
-                    'geographic_keywords': json.dumps(noticia.geographic_keywords, ensure_ascii=False) if noticia.geographic_keywords else ''
-                }
-                
-                writer.writerow(row_data)
-        
-        logger.info(f"✅ Noticias exportadas exitosamente a: {filename}")
+        export_to_file(filename, formato='csv', csv_style=CSV_STYLE_PLAIN)
         return filename
-        
     except Exception as e:
         logger.error(f"❌ Error exportando noticias: {e}")
         return None
-    finally:
-        db.close()
 
 def export_diarios_to_csv():
     """Exportar información de diarios a CSV"""
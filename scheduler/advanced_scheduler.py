@@ -2,7 +2,10 @@
 """
 Sistema de Scheduler Avanzado para Scraping Automático
 Características:
-- Programación por horarios específicos
+- Un trabajo por diario y red social, cada uno con su intervalo, jitter y timeout
+- Reintentos con backoff por fuente (un fallo no retrasa a las demás)
+- Pool de hilos acotado (max_workers)
+- Frecuencia adaptativa por sección (diario, categoría) según su tasa de publicación
 - Manejo robusto de errores
 - Logging detallado
 - Recuperación automática
@@ -15,19 +18,20 @@ import os
 import time
 import logging
 import json
-import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from pathlib import Path
-import schedule
 import signal
 
-# Agregar el directorio raíz al path
+# Agregar el directorio raíz y el de este script al path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from backend.scraping_service import ScrapingService
 from backend.database import get_db, test_connection
 from backend.models import EstadisticaScraping
+from backend.crawl_frequency import section_intervals
+from source_scheduler import SourceJob, SourceScheduler
 
 class AdvancedScheduler:
     def __init__(self, config_file: str = "scheduler_config.json"):
@@ -37,12 +41,15 @@ class AdvancedScheduler:
         self.is_running = False
         self.last_execution = None
         self.execution_count = 0
-        self.failed_attempts = 0
         self.max_retries = self.config.get('max_retries', 3)
+        self.section_jobs: Dict = {}  # (fuente, sección) -> nombre del trabajo
+        self.section_budget = 0.0  # visitas por hora a repartir entre secciones
         
         # Configurar logging avanzado
         self.setup_logging()
         
+        self.jobs = SourceScheduler(max_workers=self.config.get('max_workers', 4), log=self.logger)
+        
         # Configurar manejo de señales
         signal.signal(signal.SIGINT, self.signal_handler)
         signal.signal(signal.SIGTERM, self.signal_handler)
@@ -53,7 +60,19 @@ class AdvancedScheduler:
     def load_config(self) -> Dict:
         """Cargar configuración desde archivo JSON"""
         default_config = {
-            "scraping_hours": [6, 9, 12, 15, 18, 21],  # Horarios específicos
+            "scraping_hours": [6, 9, 12, 15, 18, 21],  # Sin interval_minutes, el menor hueco define el intervalo
+            "max_workers": 4,  # Fuentes scrapeadas a la vez
+            "source_defaults": {"jitter_seconds": 120},  # interval_minutes, timeout_seconds, max_retries...
+            "sources": {},  # Ajustes por fuente, p. ej. {"comercio": {"interval_minutes": 10}}
+            "premium_refresh_minutes": 15,
+            "adaptive_crawl": {
+                "enabled": True,  # Un trabajo por sección con intervalo según su tasa de publicación
+                "min_interval_minutes": 10,
+                "max_interval_minutes": 240,
+                "history_days": 14,
+                "relearn_minutes": 60,
+                "budget_fetches_per_hour": None  # None = las mismas visitas que con intervalos fijos
+            },
             "timezone": "America/Lima",
             "max_retries": 3,
             "retry_delay_minutes": 5,
@@ -152,99 +171,126 @@ class AdvancedScheduler:
             self.logger.error(f"❌ Error de conexión a BD: {e}")
             return False
     
-    def execute_scraping_with_retry(self) -> Dict:
-        """Ejecutar scraping con reintentos automáticos"""
-        max_retries = self.config.get('max_retries', 3)
-        retry_delay = self.config.get('retry_delay_minutes', 5)
-        
-        for attempt in range(max_retries + 1):
-            try:
-                self.logger.info(f"🔄 Intento {attempt + 1}/{max_retries + 1} de scraping")
-                
-                # Verificar conexión a BD antes de intentar
-                if not self.check_database_connection():
-                    raise Exception("No hay conexión a la base de datos")
-                
-                # Ejecutar scraping con timeout
-                result = self.scraping_service.execute_scraping()
-                
-                if result.get('success', False):
-                    self.failed_attempts = 0  # Reset contador de fallos
-                    self.logger.info(f"✅ Scraping exitoso: {result}")
-                    return result
-                else:
-                    raise Exception(f"Scraping falló: {result.get('error', 'Error desconocido')}")
-                    
-            except Exception as e:
-                self.logger.error(f"❌ Error en intento {attempt + 1}: {e}")
-                self.failed_attempts += 1
-                
-                if attempt < max_retries:
-                    self.logger.info(f"⏳ Esperando {retry_delay} minutos antes del siguiente intento...")
-                    time.sleep(retry_delay * 60)
-                else:
-                    self.logger.error(f"💥 Todos los intentos fallaron. Total de fallos consecutivos: {self.failed_attempts}")
-                    
-                    # Parada de emergencia si hay demasiados fallos
-                    if self.failed_attempts >= self.config.get('emergency_stop_after_failures', 10):
-                        self.logger.critical("🚨 PARADA DE EMERGENCIA: Demasiados fallos consecutivos")
-                        self.is_running = False
-                        return {'success': False, 'error': 'Emergency stop triggered', 'emergency_stop': True}
-        
-        return {'success': False, 'error': 'Max retries exceeded', 'attempts': max_retries + 1}
+    @property
+    def failed_attempts(self) -> int:
+        """Fallos consecutivos sumados de todas las fuentes"""
+        return sum(job.consecutive_failures for job in self.jobs.jobs.values())
     
-    def scraping_job(self):
-        """Trabajo principal de scraping"""
-        job_start = datetime.now()
-        self.execution_count += 1
-        
-        self.logger.info("=" * 80)
-        self.logger.info(f"🚀 INICIANDO SCRAPING PROGRAMADO #{self.execution_count}")
-        self.logger.info(f"🕒 Hora de inicio: {job_start.strftime('%Y-%m-%d %H:%M:%S')}")
-        self.logger.info("=" * 80)
-        
+    def default_interval_minutes(self) -> float:
+        """Intervalo por defecto: source_defaults.interval_minutes o el menor hueco entre scraping_hours"""
+        interval = self.config.get('source_defaults', {}).get('interval_minutes')
+        if interval:
+            return float(interval)
+        hours = sorted(set(self.config.get('scraping_hours', [])))
+        if len(hours) > 1:
+            gaps = [later - earlier for earlier, later in zip(hours, hours[1:])]
+            gaps.append(hours[0] + 24 - hours[-1])
+            return min(gaps) * 60.0
+        return 24 * 60.0 if hours else 180.0
+    
+    def source_config(self, name: str) -> Dict:
+        """Configuración efectiva de una fuente: globales < source_defaults < sources[name]"""
+        config = {
+            'enabled': True,
+            'interval_minutes': self.default_interval_minutes(),
+            'jitter_seconds': 120,
+            'timeout_seconds': self.config.get('scraping_timeout', 600),
+            'max_retries': self.config.get('max_retries', 3),
+            'retry_delay_minutes': self.config.get('retry_delay_minutes', 5),
+            'max_retry_delay_minutes': 60
+        }
+        config.update(self.config.get('source_defaults', {}))
+        config.update(self.config.get('sources', {}).get(name, {}))
+        return config
+    
+    def adaptive_config(self) -> Dict:
+        config = {
+            'enabled': True,
+            'min_interval_minutes': 10,
+            'max_interval_minutes': 240,
+            'history_days': 14,
+            'relearn_minutes': 60,
+            'budget_fetches_per_hour': None
+        }
+        config.update(self.config.get('adaptive_crawl', {}))
+        return config
+    
+    def run_source(self, name: str, section: Optional[str] = None) -> Dict:
+        """Trabajo de una fuente (o de una sección): verifica la BD y scrapea solo eso"""
+        if not self.check_database_connection():
+            return {'success': False, 'source': name, 'section': section, 'error': 'No hay conexión a la base de datos'}
+        return self.scraping_service.execute_source_scraping(name, section)
+    
+    def learn_crawl_rates(self) -> Dict:
+        """Calcula el intervalo de cada sección a partir de su tasa de publicación"""
+        adaptive = self.adaptive_config()
+        db = next(get_db())
         try:
-            # Ejecutar scraping con reintentos
-            result = self.execute_scraping_with_retry()
-            
-            # Calcular duración
-            duration = (datetime.now() - job_start).total_seconds()
-            
-            # Registrar estadísticas
-            self.save_execution_stats(result, duration)
-            
-            # Log de resultado
-            if result.get('success', False):
-                self.logger.info(f"✅ SCRAPING COMPLETADO EXITOSAMENTE")
-                self.logger.info(f"📊 Noticias extraídas: {result.get('total_extracted', 0)}")
-                self.logger.info(f"💾 Noticias guardadas: {result.get('total_saved', 0)}")
-                self.logger.info(f"🔍 Duplicados detectados: {result.get('duplicates_detected', 0)}")
-                self.logger.info(f"🚨 Alertas activadas: {result.get('alerts_triggered', 0)}")
-                self.logger.info(f"⏱️  Duración: {duration:.2f} segundos")
-                
-                # Enviar notificación de éxito si está habilitado
-                if self.config.get('enable_notifications', False):
-                    self.send_success_notification(result)
-            else:
-                self.logger.error(f"❌ SCRAPING FALLÓ: {result.get('error', 'Error desconocido')}")
-                
-                # Parada de emergencia
-                if result.get('emergency_stop', False):
-                    self.logger.critical("🚨 Activando parada de emergencia...")
-                    self.is_running = False
-            
-            self.last_execution = job_start
-            
-        except Exception as e:
-            self.logger.error(f"💥 Error crítico en scraping job: {e}")
-            self.failed_attempts += 1
+            intervals = section_intervals(
+                db,
+                list(self.section_jobs),
+                budget_per_hour=self.section_budget,
+                min_interval=float(adaptive['min_interval_minutes']) * 60,
+                max_interval=float(adaptive['max_interval_minutes']) * 60,
+                days=int(adaptive['history_days'])
+            )
+        finally:
+            db.close()
+        return {'success': True, 'intervals': intervals}
+    
+    def apply_crawl_rates(self, job: SourceJob, result: Dict, duration: float):
+        """Aplica los intervalos aprendidos (corre en el hilo del planificador)"""
+        now = time.time()
+        for key, interval in result.get('intervals', {}).items():
+            section_job = self.jobs.jobs.get(self.section_jobs.get(key))
+            if section_job is None:
+                continue
+            section_job.interval_seconds = interval
+            # Reprogramar desde la última visita, salvo si está corriendo o reintentando
+            if section_job.started_at and not section_job.running and not section_job.retry_attempt:
+                section_job.next_run = max(now, section_job.started_at + interval) + section_job.jitter()
+    
+    def record_source_result(self, job: SourceJob, result: Dict, duration: float):
+        """Registra el resultado de cada ejecución de una fuente"""
+        self.execution_count += 1
+        self.last_execution = job.last_run
+        self.save_execution_stats(result, duration)
         
-        self.logger.info("=" * 80)
-        self.logger.info(f"🏁 SCRAPING FINALIZADO - Próxima ejecución programada")
-        self.logger.info("=" * 80)
+        if result.get('success', False):
+            self.logger.info(
+                f"📊 {job.name}: extraídas {result.get('total_extracted', 0)}, "
+                f"guardadas {result.get('total_saved', 0)}, duplicados {result.get('duplicates_detected', 0)}, "
+                f"alertas {result.get('alerts_triggered', 0)} en {duration:.2f}s"
+            )
+            if self.config.get('enable_notifications', False) and result.get('total_saved', 0):
+                self.send_success_notification(result)
+    
+    def refresh_premium_job(self) -> Dict:
+        """Recalcula puntajes premium una vez por intervalo en lugar de tras cada fuente"""
+        self.scraping_service.refresh_premium_scores()
+        return {'success': True}
+    
+    def health_check_job(self) -> Dict:
+        status = self.health_check()
+        return {'success': bool(status.get('database_connection')), 'error': status.get('error')}
     
     def save_execution_stats(self, result: Dict, duration: float):
-        """Guardar estadísticas de ejecución"""
+        """Guardar estadísticas de ejecución (las visitas a secciones ya las registra ScrapingService)"""
+        if result.get('section'):
+            return
+        # estadisticas_scraping no tiene columna de detalles: van al log
+        detalles = json.dumps({
+            'source': result.get('source'),
+            'total_extracted': result.get('total_extracted', 0),
+            'total_saved': result.get('total_saved', 0),
+            'duplicates_detected': result.get('duplicates_detected', 0),
+            'alerts_triggered': result.get('alerts_triggered', 0),
+            'execution_count': self.execution_count,
+            'failed_attempts': self.failed_attempts,
+            'error': result.get('error')
+        })
+        self.logger.debug(f"📋 Detalle de ejecución: {detalles}")
+        db = None
         try:
             db = next(get_db())
             
@@ -253,16 +299,7 @@ class AdvancedScheduler:
                 categoria='scheduler_execution',
                 cantidad_noticias=result.get('total_saved', 0),
                 duracion_segundos=int(duration),
-                estado='exitoso' if result.get('success', False) else 'error',
-                detalles=json.dumps({
-                    'total_extracted': result.get('total_extracted', 0),
-                    'total_saved': result.get('total_saved', 0),
-                    'duplicates_detected': result.get('duplicates_detected', 0),
-                    'alerts_triggered': result.get('alerts_triggered', 0),
-                    'execution_count': self.execution_count,
-                    'failed_attempts': self.failed_attempts,
-                    'error': result.get('error')
-                })
+                estado='exitoso' if result.get('success', False) else 'error'
             )
             
             db.add(stats)
@@ -271,7 +308,8 @@ class AdvancedScheduler:
         except Exception as e:
             self.logger.error(f"❌ Error guardando estadísticas: {e}")
         finally:
-            db.close()
+            if db is not None:
+                db.close()
     
     def send_success_notification(self, result: Dict):
         """Enviar notificación de éxito (placeholder para futuras implementaciones)"""
@@ -281,7 +319,7 @@ class AdvancedScheduler:
             # - Email
             # - Slack
             # - Discord Webhook
-            self.logger.info(f"📢 Notificación: Scraping exitoso - {result.get('total_saved', 0)} noticias nuevas")
+            self.logger.info(f"📢 Notificación: {result.get('source', 'Scraping')} - {result.get('total_saved', 0)} noticias nuevas")
         except Exception as e:
             self.logger.warning(f"⚠️  Error enviando notificación: {e}")
     
@@ -304,6 +342,8 @@ class AdvancedScheduler:
                 'execution_count': self.execution_count,
                 'failed_attempts': self.failed_attempts,
                 'is_running': self.is_running,
+                'running_jobs': [job.name for job in self.jobs.jobs.values() if job.running],
+                'disabled_jobs': [job.name for job in self.jobs.jobs.values() if not job.enabled],
                 'config_loaded': bool(self.config)
             }
             
@@ -315,32 +355,86 @@ class AdvancedScheduler:
             return {'error': str(e)}
     
     def schedule_jobs(self):
-        """Programar trabajos en horarios específicos"""
-        scraping_hours = self.config.get('scraping_hours', [6, 9, 12, 15, 18, 21])
+        """Registrar un trabajo por diario y red social, más los de mantenimiento"""
+        run_now = self.config.get('run_initial_scraping', True)
+        adaptive = self.adaptive_config()
+        main_scraper = self.scraping_service.main_scraper
+        self.section_jobs = {}
+        self.section_budget = 0.0
         
-        # Limpiar trabajos anteriores
-        schedule.clear()
+        for name in main_scraper.newspaper_sources() + main_scraper.social_sources():
+            source = self.source_config(name)
+            if not source.get('enabled', True):
+                self.logger.info(f"⏸️  {name}: deshabilitado en la configuración")
+                continue
+            
+            sections = main_scraper.source_sections(name) if adaptive['enabled'] else []
+            if not sections:
+                self.jobs.add_job(self.build_source_job(name, source), run_now=run_now)
+                continue
+            
+            # Un trabajo por sección; parten con el intervalo de la fuente hasta aprender su tasa
+            for section in sections:
+                job = self.build_source_job(name, source, section)
+                self.section_jobs[(name, section)] = job.name
+                self.section_budget += 3600 / job.interval_seconds
+                self.jobs.add_job(job, run_now=run_now)
+        
+        if self.section_jobs:
+            if adaptive.get('budget_fetches_per_hour'):
+                self.section_budget = float(adaptive['budget_fetches_per_hour'])
+            self.logger.info(
+                f"📐 {len(self.section_jobs)} secciones con frecuencia adaptativa, "
+                f"{self.section_budget:.1f} visitas/hora en total"
+            )
+            self.jobs.add_job(SourceJob(
+                name='crawl_rates',
+                func=self.learn_crawl_rates,
+                interval_seconds=float(adaptive['relearn_minutes']) * 60,
+                on_result=self.apply_crawl_rates
+            ), run_now=True)
         
-        # Programar scraping en horarios específicos
-        for hour in scraping_hours:
-            schedule.every().day.at(f"{hour:02d}:00").do(self.scraping_job)
-            self.logger.info(f"⏰ Scraping programado a las {hour:02d}:00")
+        # Puntajes premium una vez por intervalo (antes se recalculaban tras cada scraping)
+        self.jobs.add_job(SourceJob(
+            name='premium_scores',
+            func=self.refresh_premium_job,
+            interval_seconds=self.config.get('premium_refresh_minutes', 15) * 60
+        ))
         
-        # Programar health check cada cierto tiempo
-        health_interval = self.config.get('health_check_interval', 300) // 60  # convertir a minutos
-        schedule.every(health_interval).minutes.do(self.health_check)
-        self.logger.info(f"🏥 Health check programado cada {health_interval} minutos")
+        # Health check cada cierto tiempo
+        health_interval = self.config.get('health_check_interval', 300)
+        self.jobs.add_job(SourceJob(
+            name='health_check',
+            func=self.health_check_job,
+            interval_seconds=health_interval
+        ))
         
         # Mostrar próximas ejecuciones
         self.show_next_executions()
     
+    def build_source_job(self, name: str, source: Dict, section: Optional[str] = None) -> SourceJob:
+        """Trabajo de una fuente (o de una de sus secciones) con su configuración efectiva"""
+        return SourceJob(
+            name=f"{name}/{section}" if section else name,
+            func=lambda: self.run_source(name, section),
+            interval_seconds=float(source['interval_minutes']) * 60,
+            jitter_seconds=float(source['jitter_seconds']),
+            timeout_seconds=float(source['timeout_seconds']) if source.get('timeout_seconds') else None,
+            max_retries=int(source['max_retries']),
+            backoff_seconds=float(source['retry_delay_minutes']) * 60,
+            max_backoff_seconds=float(source['max_retry_delay_minutes']) * 60,
+            disable_after_failures=self.config.get('emergency_stop_after_failures', 10),
+            on_result=self.record_source_result,
+            group=name
+        )
+    
     def show_next_executions(self):
         """Mostrar próximas ejecuciones programadas"""
-        jobs = schedule.jobs
+        jobs = self.jobs.status()
         if jobs:
             self.logger.info("📅 Próximas ejecuciones programadas:")
-            for job in sorted(jobs, key=lambda x: x.next_run):
-                self.logger.info(f"   🔹 {job.next_run.strftime('%Y-%m-%d %H:%M:%S')} - {job.job_func.__name__}")
+            for job in jobs:
+                self.logger.info(f"   🔹 {job['next_run'].replace('T', ' ')[:19]} - {job['name']}")
     
     def signal_handler(self, signum, frame):
         """Manejar señales del sistema"""
@@ -362,10 +456,8 @@ class AdvancedScheduler:
         # Marcar como en ejecución
         self.is_running = True
         
-        # Ejecutar scraping inicial si se desea
         if self.config.get('run_initial_scraping', True):
-            self.logger.info("🔄 Ejecutando scraping inicial...")
-            threading.Thread(target=self.scraping_job, daemon=True).start()
+            self.logger.info("🔄 Scraping inicial de todas las fuentes (escalonado con jitter)...")
         
         # Loop principal
         self.logger.info("✅ Scheduler iniciado correctamente")
@@ -373,8 +465,8 @@ class AdvancedScheduler:
         
         try:
             while self.is_running:
-                schedule.run_pending()
-                time.sleep(30)  # Verificar cada 30 segundos
+                self.jobs.tick()
+                time.sleep(1)
                 
         except KeyboardInterrupt:
             self.logger.info("⌨️  Interrupción por teclado detectada")
@@ -390,8 +482,8 @@ class AdvancedScheduler:
         self.logger.info("🛑 Deteniendo Advanced Scheduler...")
         self.is_running = False
         
-        # Limpiar trabajos programados
-        schedule.clear()
+        # No esperar a los trabajos en curso (pueden estar colgados)
+        self.jobs.shutdown()
         
         self.logger.info("👋 Advanced Scheduler detenido")
     
@@ -403,8 +495,9 @@ class AdvancedScheduler:
             'execution_count': self.execution_count,
             'failed_attempts': self.failed_attempts,
             'config': self.config,
-            'scheduled_jobs': len(schedule.jobs),
-            'next_execution': schedule.next_run().isoformat() if schedule.jobs else None
+            'scheduled_jobs': len(self.jobs.jobs),
+            'jobs': self.jobs.status(),
+            'next_execution': self.jobs.next_run().isoformat() if self.jobs.next_run() else None
         }
 
 def main():
@@ -84,11 +84,14 @@ class ScrapingScheduler:
                 saved_count += 1
             
             db.commit()
+            # Los validadores HTTP solo se guardan cuando sus noticias ya están en la base de datos
+            self.main_scraper.commit_validators()
             logger.info(f"Guardadas {saved_count} noticias nuevas en la base de datos")
             
         except Exception as e:
             logger.error(f"Error guardando noticias: {e}")
             db.rollback()
+            self.main_scraper.discard_validators()
         finally:
             db.close()
         
@@ -155,6 +158,7 @@ class ScrapingScheduler:
             
         except Exception as e:
             logger.error(f"Error en scraping programado: {e}")
+            self.main_scraper.discard_validators()
             duration = int((datetime.now() - start_time).total_seconds())
             
             # Guardar estadística de error
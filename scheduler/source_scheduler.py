@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Planificador de trabajos por fuente.
+Cada diario o red social es un trabajo independiente con su propio intervalo, jitter, timeout
+y reintentos con backoff exponencial: si una fuente falla solo se reintenta esa fuente y las
+demás siguen su calendario. Los trabajos corren en un pool de hilos acotado (max_workers); si
+hay más trabajos vencidos que hilos libres, salen primero los que vencieron antes.
+
+Un hilo de Python no se puede interrumpir: al vencer el timeout el trabajo se da por fallido
+(y se programa su reintento), pero la fuente no vuelve a lanzarse hasta que el hilo colgado
+termine, así nunca hay dos ejecuciones de la misma fuente a la vez. Lo mismo vale para los
+trabajos de un mismo grupo (p. ej. las secciones de un diario): mientras uno corre, los demás
+esperan su turno en el planificador en vez de ocupar un hilo del pool bloqueados.
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SourceJob:
+    """Trabajo periódico de una fuente; func() retorna un dict con 'success'"""
+    name: str
+    func: Callable[[], Dict]
+    interval_seconds: float
+    jitter_seconds: float = 0.0
+    timeout_seconds: Optional[float] = None
+    max_retries: int = 0
+    backoff_seconds: float = 60.0
+    max_backoff_seconds: float = 3600.0
+    disable_after_failures: int = 0  # 0 = nunca deshabilitar
+    on_result: Optional[Callable[["SourceJob", Dict, float], None]] = field(default=None, repr=False)
+    group: Optional[str] = None  # trabajos del mismo grupo nunca corren a la vez
+
+    # Estado (lo modifica solo el hilo del planificador)
+    enabled: bool = True
+    next_run: float = 0.0
+    started_at: Optional[float] = None
+    future: Optional[Future] = field(default=None, repr=False)
+    timed_out: bool = False
+    retry_attempt: int = 0
+    consecutive_failures: int = 0
+    runs: int = 0
+    failures: int = 0
+    last_run: Optional[datetime] = None
+    last_success: Optional[datetime] = None
+    last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self.future is not None
+
+    def jitter(self) -> float:
+        return random.uniform(0, self.jitter_seconds) if self.jitter_seconds > 0 else 0.0
+
+    def backoff(self) -> float:
+        """Espera antes del reintento número retry_attempt (1, 2, 4... veces backoff_seconds)"""
+        return min(self.backoff_seconds * (2 ** (self.retry_attempt - 1)), self.max_backoff_seconds)
+
+    def status(self) -> Dict:
+        return {
+            'name': self.name,
+            'enabled': self.enabled,
+            'running': self.running,
+            'group': self.group,
+            'interval_seconds': self.interval_seconds,
+            'next_run': datetime.fromtimestamp(self.next_run).isoformat() if self.next_run else None,
+            'runs': self.runs,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'retry_attempt': self.retry_attempt,
+            'last_run': self.last_run.isoformat() if self.last_run else None,
+            'last_success': self.last_success.isoformat() if self.last_success else None,
+            'last_error': self.last_error
+        }
+
+
+class SourceScheduler:
+    """Lanza los SourceJob vencidos en un pool acotado; tick() se llama desde un único hilo"""
+
+    def __init__(self, max_workers: int = 4, log: Optional[logging.Logger] = None):
+        self.max_workers = max(1, max_workers)
+        self.logger = log or logger
+        self.jobs: Dict[str, SourceJob] = {}
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='source-job')
+        self._lock = threading.Lock()
+
+    def add_job(self, job: SourceJob, run_now: bool = False):
+        """Registra un trabajo; la primera ejecución es inmediata (con jitter) o tras un intervalo"""
+        now = time.time()
+        job.next_run = now + job.jitter() + (0 if run_now else job.interval_seconds)
+        with self._lock:
+            self.jobs[job.name] = job
+        self.logger.info(
+            f"⏰ {job.name}: cada {job.interval_seconds / 60:.0f} min "
+            f"(jitter {job.jitter_seconds:.0f}s, timeout {job.timeout_seconds or '-'}s, "
+            f"{job.max_retries} reintentos)"
+        )
+
+    def run_now(self, name: str):
+        """Adelanta la próxima ejecución de un trabajo al siguiente tick"""
+        job = self.jobs[name]
+        job.next_run = time.time()
+        job.enabled = True
+
+    def _running_count(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.running)
+
+    def tick(self):
+        """Recoge resultados, aplica timeouts y lanza los trabajos vencidos"""
+        now = time.time()
+        with self._lock:
+            jobs = list(self.jobs.values())
+
+        for job in jobs:
+            if job.running:
+                self._check_running(job, now)
+
+        free = self.max_workers - self._running_count()
+        busy = {job.group for job in jobs if job.running and job.group}
+        due = sorted(
+            (job for job in jobs if job.enabled and not job.running and job.next_run <= now),
+            key=lambda job: job.next_run
+        )
+        for job in due:
+            if free <= 0:
+                break
+            if job.group in busy:
+                # Sigue vencido y sale en cuanto termine el trabajo de su grupo
+                continue
+            self._submit(job)
+            free -= 1
+            if job.group:
+                busy.add(job.group)
+
+    def _submit(self, job: SourceJob):
+        job.started_at = time.time()
+        job.timed_out = False
+        job.last_run = datetime.now()
+        job.runs += 1
+        attempt = f" (reintento {job.retry_attempt}/{job.max_retries})" if job.retry_attempt else ""
+        self.logger.info(f"🚀 {job.name}: iniciando{attempt}")
+        job.future = self._executor.submit(job.func)
+
+    def _check_running(self, job: SourceJob, now: float):
+        future = job.future
+        if future.done():
+            job.future = None
+            duration = now - job.started_at
+            if job.timed_out:
+                # Ya se contó como fallo al vencer el timeout
+                self.logger.warning(f"⌛ {job.name}: terminó tras el timeout ({duration:.0f}s), resultado descartado")
+                return
+            try:
+                result = future.result()
+                if not isinstance(result, dict):
+                    result = {'success': bool(result)}
+            except Exception as e:
+                result = {'success': False, 'error': str(e)}
+            self._finish(job, result, duration)
+            return
+
+        if job.timeout_seconds and not job.timed_out and now - job.started_at > job.timeout_seconds:
+            job.timed_out = True
+            self._finish(job, {
+                'success': False,
+                'error': f"Timeout tras {job.timeout_seconds:.0f}s"
+            }, now - job.started_at)
+
+    def _finish(self, job: SourceJob, result: Dict, duration: float):
+        now = time.time()
+        if result.get('success', False):
+            job.consecutive_failures = 0
+            job.retry_attempt = 0
+            job.last_success = datetime.now()
+            job.last_error = None
+            job.next_run = now + job.interval_seconds + job.jitter()
+            self.logger.info(f"✅ {job.name}: completado en {duration:.1f}s")
+        else:
+            job.failures += 1
+            job.consecutive_failures += 1
+            job.last_error = result.get('error', 'Error desconocido')
+            if job.retry_attempt < job.max_retries:
+                job.retry_attempt += 1
+                delay = job.backoff()
+                self.logger.error(
+                    f"❌ {job.name}: {job.last_error} - reintento {job.retry_attempt}/{job.max_retries} "
+                    f"en {delay / 60:.1f} min"
+                )
+            else:
+                job.retry_attempt = 0
+                delay = job.interval_seconds
+                self.logger.error(
+                    f"💥 {job.name}: {job.last_error} - sin reintentos, próxima ejecución en {delay / 60:.0f} min"
+                )
+            job.next_run = now + delay + job.jitter()
+
+            if job.disable_after_failures and job.consecutive_failures >= job.disable_after_failures:
+                job.enabled = False
+                self.logger.critical(
+                    f"🚨 {job.name}: deshabilitado tras {job.consecutive_failures} fallos consecutivos"
+                )
+
+        if job.on_result:
+            try:
+                job.on_result(job, result, duration)
+            except Exception as e:
+                self.logger.warning(f"⚠️  {job.name}: error en on_result: {e}")
+
+    def next_run(self) -> Optional[datetime]:
+        pending = [job.next_run for job in self.jobs.values() if job.enabled and not job.running]
+        return datetime.fromtimestamp(min(pending)) if pending else None
+
+    def status(self) -> List[Dict]:
+        return [job.status() for job in sorted(self.jobs.values(), key=lambda job: job.next_run)]
+
+    def shutdown(self):
+        """No espera a los trabajos en curso (pueden estar colgados)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,22 +1,75 @@
 import asyncio
 import aiohttp
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
+from urllib.parse import urlparse
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from image_extractor import extract_image_from_soup
+from http_cache import get_http_cache
+from url_frontier import get_url_frontier
+from fetch_scheduler import get_fetch_scheduler
+from date_extraction_utils import get_publication_date
+
+# Límites del motor asíncrono (configurables por entorno)
+DEFAULT_MAX_CONNECTIONS_PER_HOST = int(os.getenv('ASYNC_MAX_CONNECTIONS_PER_HOST', '8'))
+DEFAULT_MAX_CONCURRENT_ARTICLES = int(os.getenv('ASYNC_MAX_CONCURRENT_ARTICLES', '48'))
+DEFAULT_MAX_PAGES = int(os.getenv('ASYNC_MAX_PAGES_PER_SECTION', '3'))
 
 class EnhancedScraper:
     """Scraper mejorado con procesamiento paralelo y más categorías"""
     
-    def __init__(self):
+    # Nombres de categoría con tildes, igual que los scrapers Selenium
+    CATEGORY_NAMES = {
+        'economia': 'Economía',
+        'politica': 'Política',
+        'tecnologia': 'Tecnología',
+        'espectaculos': 'Espectáculos'
+    }
+    
+    DIARIO_NAMES = {
+        'comercio': 'El Comercio',
+        'correo': 'Diario Correo',
+        'popular': 'El Popular'
+    }
+    
+    CONTENT_SELECTORS = [
+        'div.story-contents',
+        'div.story-content',
+        'div.story-body',
+        'div.article-body',
+        'div.article-content',
+        'div.entry-content',
+        'div.post-content',
+        'article'
+    ]
+    
+    def __init__(self, diarios: Optional[List[str]] = None,
+                 max_connections_per_host: int = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                 max_concurrent_articles: int = DEFAULT_MAX_CONCURRENT_ARTICLES,
+                 max_pages: int = DEFAULT_MAX_PAGES,
+                 fetch_articles: bool = True):
         self.base_urls = {
             'comercio': 'https://elcomercio.pe',
             'correo': 'https://diariocorreo.pe',
             'popular': 'https://elpopular.pe'
         }
+        if diarios:
+            self.base_urls = {d: url for d, url in self.base_urls.items() if d in diarios}
+        
+        self.max_connections_per_host = max_connections_per_host
+        self.max_concurrent_articles = max_concurrent_articles
+        self.max_pages = max_pages
+        self.fetch_articles = fetch_articles
+        self.http_cache = get_http_cache().staged()
+        self.url_frontier = get_url_frontier()
+        self.fetch_scheduler = get_fetch_scheduler()
+        self._article_semaphore: Optional[asyncio.Semaphore] = None
         
         self.categories = {
             'comercio': ['deportes', 'economia', 'mundo', 'politica', 'sociedad', 'tecnologia', 'cultura'],
@@ -24,19 +77,51 @@ class EnhancedScraper:
             'popular': ['deportes', 'espectaculos', 'actualidad', 'politica', 'sociedad', 'tecnologia']
         }
         
+        self.categories = {d: cats for d, cats in self.categories.items() if d in self.base_urls}
+        
         self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8'
         }
     
-    async def fetch_page(self, session: aiohttp.ClientSession, url: str) -> str:
-        """Obtiene el contenido de una página de forma asíncrona"""
+    def create_session(self) -> aiohttp.ClientSession:
+        """Crea la sesión compartida con límite de conexiones por host"""
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections_per_host * max(len(self.base_urls), 1),
+            limit_per_host=self.max_connections_per_host,
+            ttl_dns_cache=300
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=20, connect=10)
+        )
+    
+    async def fetch_page(self, session: aiohttp.ClientSession, url: str, conditional: bool = False) -> str:
+        """Obtiene el contenido de una página de forma asíncrona
+        
+        Con conditional=True se envían ETag/Last-Modified guardados y se retorna
+        cadena vacía si la página no cambió desde la última ejecución.
+        """
+        headers = self.http_cache.request_headers(url) if conditional else None
         try:
-            async with session.get(url, headers=self.headers, timeout=10) as response:
-                if response.status == 200:
-                    return await response.text()
-                else:
+            await self.fetch_scheduler.acquire_async(url)
+            async with session.get(url, headers=headers) as response:
+                self.fetch_scheduler.report(url, response.status, response.headers.get('Retry-After'))
+                if response.status == 304:
+                    self.http_cache.record(url, response.status, response.headers, None)
+                    logging.info(f"⏭️ Sin cambios desde la última ejecución, se omite: {url}")
+                    return ""
+                if response.status != 200:
                     logging.warning(f"Error {response.status} al obtener {url}")
                     return ""
+                
+                body = await response.read()
+                if conditional and not self.http_cache.record(url, response.status, response.headers, body):
+                    logging.info(f"⏭️ Sin cambios desde la última ejecución, se omite: {url}")
+                    return ""
+                return body.decode(response.get_encoding() or 'utf-8', errors='replace')
         except Exception as e:
             logging.error(f"Error obteniendo {url}: {e}")
             return ""
@@ -54,10 +139,11 @@ class EnhancedScraper:
             else:
                 url = f"{base_url}/{category}/page/{page}/"
             
-            tasks.append(self.fetch_page(session, url))
+            tasks.append(self.fetch_page(session, url, conditional=True))
         
         # Ejecutar todas las páginas en paralelo
         pages_content = await asyncio.gather(*tasks, return_exceptions=True)
+        seen_links = set()
         
         for page_content in pages_content:
             if isinstance(page_content, Exception) or not page_content:
@@ -76,13 +162,91 @@ class EnhancedScraper:
             for article in articles[:20]:  # Aumentar a 20 por página
                 try:
                     noticia = await self.extract_article_data(article, diario, category, base_url)
-                    if noticia:
-                        noticias.append(noticia)
+                    if not noticia or not self._is_article_link(noticia['enlace'], base_url):
+                        continue
+                    if noticia['enlace'] in seen_links:
+                        continue
+                    seen_links.add(noticia['enlace'])
+                    noticias.append(noticia)
                 except Exception as e:
                     logging.warning(f"Error extrayendo artículo: {e}")
                     continue
         
-        return noticias
+        if not self.fetch_articles:
+            return noticias
+        
+        # Descargar solo los artículos nuevos (frontera persistente) en paralelo
+        nuevas = [n for n in noticias if self.url_frontier.should_fetch(n['enlace'])]
+        enriched = await asyncio.gather(
+            *(self.enrich_article(session, noticia, base_url) for noticia in nuevas),
+            return_exceptions=True
+        )
+        
+        return [n for n in enriched if n and not isinstance(n, Exception)]
+    
+    def _is_article_link(self, link: Optional[str], base_url: str) -> bool:
+        """Descarta enlaces externos, de sección o de paginación"""
+        if not link:
+            return False
+        parsed = urlparse(link)
+        if parsed.netloc and not parsed.netloc.endswith(urlparse(base_url).netloc):
+            return False
+        segments = [s for s in parsed.path.split('/') if s]
+        return len(segments) >= 2 and 'page' not in segments
+    
+    async def enrich_article(self, session: aiohttp.ClientSession, noticia: Dict, base_url: str) -> Optional[Dict]:
+        """Descarga la página del artículo y completa contenido, imagen y fecha"""
+        async with self._get_article_semaphore():
+            html = await self.fetch_page(session, noticia['enlace'])
+        
+        if not html:
+            return noticia
+        
+        # El parseo es CPU; se hace fuera del event loop para no bloquear otras descargas
+        loop = asyncio.get_running_loop()
+        details = await loop.run_in_executor(None, self._parse_article_page, html, noticia['enlace'], base_url)
+        
+        if details.get('contenido') and len(details['contenido']) > len(noticia.get('contenido') or ''):
+            noticia['contenido'] = details['contenido']
+        if details.get('imagen_url'):
+            noticia['imagen_url'] = details['imagen_url']
+        if details.get('fecha_publicacion'):
+            noticia['fecha_publicacion'] = details['fecha_publicacion']
+        
+        return noticia
+    
+    def _get_article_semaphore(self) -> asyncio.Semaphore:
+        """Semáforo que limita las páginas de artículo descargándose a la vez"""
+        if self._article_semaphore is None:
+            self._article_semaphore = asyncio.Semaphore(self.max_concurrent_articles)
+        return self._article_semaphore
+    
+    def _parse_article_page(self, html: str, article_url: str, base_url: str) -> Dict:
+        """Extrae contenido completo, imagen principal y fecha del HTML de un artículo"""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        paragraphs = []
+        for selector in self.CONTENT_SELECTORS:
+            container = soup.select_one(selector)
+            if container:
+                paragraphs = [p.get_text(strip=True) for p in container.find_all('p')]
+                paragraphs = [text for text in paragraphs if len(text) > 30]
+                if paragraphs:
+                    break
+        
+        fecha_publicacion = None
+        meta_date = soup.find('meta', property='article:published_time')
+        if meta_date and meta_date.get('content'):
+            try:
+                fecha_publicacion = datetime.strptime(meta_date['content'].split('T')[0], '%Y-%m-%d').date()
+            except ValueError:
+                pass
+        
+        return {
+            'contenido': '\n\n'.join(paragraphs),
+            'imagen_url': extract_image_from_soup(soup, article_url, base_url),
+            'fecha_publicacion': fecha_publicacion
+        }
     
     async def extract_article_data(self, article, diario: str, category: str, base_url: str) -> Dict:
         """Extrae datos de un artículo individual"""
@@ -117,21 +281,18 @@ class EnhancedScraper:
             content_elem = article.find('p') or article.find('div', class_='summary')
             content = content_elem.get_text(strip=True) if content_elem else ""
             
-            # Mapear nombres de diarios
-            diario_names = {
-                'comercio': 'El Comercio',
-                'correo': 'Diario Correo',
-                'popular': 'El Popular'
-            }
+            fecha_publicacion = get_publication_date(article, self.DIARIO_NAMES[diario])
+            if isinstance(fecha_publicacion, datetime):
+                fecha_publicacion = fecha_publicacion.date()
             
             return {
                 'titulo': title,
                 'contenido': content,
                 'enlace': link,
                 'imagen_url': imagen_url,
-                'categoria': category.title(),
-                'diario': diario_names[diario],
-                'fecha_publicacion': datetime.now().date(),
+                'categoria': self.CATEGORY_NAMES.get(category, category.title()),
+                'diario': self.DIARIO_NAMES[diario],
+                'fecha_publicacion': fecha_publicacion or datetime.now().date(),
                 'fecha_extraccion': datetime.now().isoformat()
             }
             
@@ -142,14 +303,15 @@ class EnhancedScraper:
     async def scrape_all_enhanced(self) -> List[Dict]:
         """Scraping completo con procesamiento paralelo"""
         all_news = []
+        self._article_semaphore = None  # Se crea dentro del event loop actual
         
-        async with aiohttp.ClientSession() as session:
+        async with self.create_session() as session:
             # Crear tareas para todos los diarios y categorías
             tasks = []
             
             for diario, categories in self.categories.items():
                 for category in categories:
-                    task = self.scrape_category_async(session, diario, category, max_pages=5)
+                    task = self.scrape_category_async(session, diario, category, max_pages=self.max_pages)
                     tasks.append(task)
             
             # Ejecutar todas las tareas en paralelo
@@ -166,6 +328,44 @@ class EnhancedScraper:
         logging.info(f"Scraping completado. Total de noticias: {len(all_news)}")
         return all_news
     
+    async def scrape_categories_async(self, category: str) -> List[Dict]:
+        """Scraping de una misma categoría en todos los diarios que la tienen"""
+        self._article_semaphore = None
+        async with self.create_session() as session:
+            tasks = [
+                self.scrape_category_async(session, diario, category, max_pages=self.max_pages)
+                for diario, categories in self.categories.items()
+                if category in categories
+            ]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        noticias = []
+        for result in results:
+            if isinstance(result, Exception):
+                logging.error(f"Error en scraping de {category}: {result}")
+                continue
+            noticias.extend(result)
+        return noticias
+    
+    def _run(self, coroutine):
+        """Ejecuta una corrutina desde código síncrono (MainScraper, scheduler)"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        
+        # Ya hay un event loop en este hilo (p. ej. FastAPI): usar un hilo aparte
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
+    
+    def get_all_news(self) -> List[Dict]:
+        """Interfaz síncrona compatible con el resto de scrapers"""
+        return self._run(self.scrape_all_enhanced())
+    
+    def get_news_by_category(self, category: str) -> List[Dict]:
+        """Noticias de una categoría (sin tildes, p. ej. 'economia') en todos los diarios"""
+        return self._run(self.scrape_categories_async(category.lower()))
+    
     def scrape_historical(self, days_back: int = 7) -> List[Dict]:
         """Scraping histórico de días anteriores (simulado)"""
         # En un scraper real, esto navegaría a archivos históricos
@@ -0,0 +1,209 @@
+"""
+Planificador de descargas con cortesía por dominio.
+Cada dominio tiene su propio token bucket: las peticiones a un mismo diario se espacian,
+mientras que las de diarios distintos avanzan en paralelo sin esperarse entre sí.
+El ritmo baja automáticamente ante 429/5xx y respeta el Crawl-delay de robots.txt.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import urllib.request
+from typing import Dict, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_PER_DOMAIN = float(os.getenv('FETCH_RATE_PER_DOMAIN', '1.0'))  # peticiones por segundo
+DEFAULT_BURST = float(os.getenv('FETCH_BURST_PER_DOMAIN', '3'))
+MIN_RATE_PER_DOMAIN = 0.05  # nunca bajar de una petición cada 20 segundos
+ROBOTS_TIMEOUT_SECONDS = 5
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+class DomainBucket:
+    """Token bucket de un dominio con ritmo adaptativo"""
+
+    def __init__(self, domain: str, rate: float, capacity: float):
+        self.domain = domain
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Consume un token si hay disponible; si no, retorna los segundos a esperar"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def slow_down(self, factor: float, pause_seconds: Optional[float] = None):
+        """Reduce el ritmo (y opcionalmente pausa el dominio) tras una respuesta de error"""
+        with self._lock:
+            self.rate = max(MIN_RATE_PER_DOMAIN, self.rate * factor)
+            self.tokens = min(self.tokens, 0)
+            pause = pause_seconds if pause_seconds is not None else 1 / self.rate
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+
+    def recover(self):
+        """Recupera el ritmo de forma gradual (incremento aditivo) tras respuestas correctas"""
+        with self._lock:
+            if self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate + self.base_rate * 0.1)
+
+    def apply_crawl_delay(self, delay: float):
+        """Limita el ritmo base al Crawl-delay declarado en robots.txt"""
+        if delay and delay > 0:
+            with self._lock:
+                self.base_rate = min(self.base_rate, 1 / delay)
+                self.rate = min(self.rate, self.base_rate)
+                self.capacity = 1
+
+
+class FetchScheduler:
+    """Punto central por el que pasan todas las descargas de los scrapers"""
+
+    def __init__(self, rate_per_domain: float = DEFAULT_RATE_PER_DOMAIN, burst: float = DEFAULT_BURST,
+                 respect_robots: bool = True):
+        self.rate_per_domain = rate_per_domain
+        self.burst = burst
+        self.respect_robots = respect_robots and os.getenv('FETCH_RESPECT_ROBOTS', 'true').lower() == 'true'
+        self._buckets: Dict[str, DomainBucket] = {}
+        # Dominios cuyo bucket se está creando (leyendo robots.txt): los demás hilos esperan el evento
+        self._initializing: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _domain(url: str) -> str:
+        """Clave del bucket: el host de la URL"""
+        return urlparse(url).netloc.lower() if url else ""
+
+    def _get_bucket(self, domain: str) -> DomainBucket:
+        """
+        Obtiene (o crea, aplicando robots.txt) el bucket de un dominio. El bucket se publica recién
+        con el Crawl-delay aplicado; quien llegue mientras tanto espera en vez de usar el ritmo por defecto.
+        """
+        with self._lock:
+            bucket = self._buckets.get(domain)
+            if bucket:
+                return bucket
+            ready = self._initializing.get(domain)
+            creator = ready is None
+            if creator:
+                ready = self._initializing[domain] = threading.Event()
+
+        if not creator:
+            ready.wait()
+            with self._lock:
+                return self._buckets[domain]
+
+        bucket = DomainBucket(domain, self.rate_per_domain, self.burst)
+        try:
+            if self.respect_robots:
+                bucket.apply_crawl_delay(self._read_crawl_delay(domain))
+        finally:
+            with self._lock:
+                self._buckets[domain] = bucket
+                del self._initializing[domain]
+            ready.set()
+        return bucket
+
+    def _read_crawl_delay(self, domain: str) -> Optional[float]:
+        """Lee el Crawl-delay de robots.txt (una sola vez por dominio)"""
+        robots_url = f"https://{domain}/robots.txt"
+        try:
+            request = urllib.request.Request(robots_url, headers={'User-Agent': USER_AGENT})
+            with urllib.request.urlopen(request, timeout=ROBOTS_TIMEOUT_SECONDS) as response:
+                lines = response.read().decode('utf-8', errors='replace').splitlines()
+        except Exception as e:
+            logger.debug(f"No se pudo leer {robots_url}: {e}")
+            return None
+
+        parser = RobotFileParser(robots_url)
+        parser.parse(lines)
+        delay = parser.crawl_delay(USER_AGENT) or parser.crawl_delay('*')
+        if delay:
+            logger.info(f"🤖 {domain} declara Crawl-delay de {delay}s")
+        return float(delay) if delay else None
+
+    def acquire(self, url: str):
+        """Bloquea el hilo actual hasta que el dominio de la URL admita otra petición"""
+        domain = self._domain(url)
+        if not domain:
+            return
+        bucket = self._get_bucket(domain)
+        while True:
+            wait = bucket.reserve()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, url: str):
+        """Versión asíncrona de acquire para el motor aiohttp"""
+        domain = self._domain(url)
+        if not domain:
+            return
+        with self._lock:
+            bucket = self._buckets.get(domain)
+        if bucket is None:
+            # La primera vez se lee robots.txt, que es bloqueante
+            loop = asyncio.get_running_loop()
+            bucket = await loop.run_in_executor(None, self._get_bucket, domain)
+        while True:
+            wait = bucket.reserve()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def report(self, url: str, status: Optional[int], retry_after: Optional[str] = None):
+        """Ajusta el ritmo del dominio según el código de estado recibido"""
+        domain = self._domain(url)
+        if not domain or status is None:
+            return
+        # Sin bloquear por robots.txt: solo se ajustan dominios cuyo bucket ya está listo
+        with self._lock:
+            bucket = self._buckets.get(domain)
+        if bucket is None:
+            return
+
+        if status in (429, 503):
+            pause = None
+            if retry_after and retry_after.strip().isdigit():
+                pause = float(retry_after.strip())
+            bucket.slow_down(0.5, pause)
+            logger.warning(f"🐢 {domain} respondió {status}, ritmo reducido a {bucket.rate:.2f} req/s")
+        elif status >= 500:
+            bucket.slow_down(0.75)
+            logger.warning(f"🐢 {domain} respondió {status}, ritmo reducido a {bucket.rate:.2f} req/s")
+        elif status < 400:
+            bucket.recover()
+
+    def report_response(self, url: str, response):
+        """Atajo para respuestas de requests"""
+        if response is None:
+            return
+        self.report(url, response.status_code, response.headers.get('Retry-After'))
+
+
+_default_scheduler: Optional[FetchScheduler] = None
+
+
+def get_fetch_scheduler() -> FetchScheduler:
+    """Retorna el planificador compartido por todos los scrapers del proceso"""
+    global _default_scheduler
+    if _default_scheduler is None:
+        _default_scheduler = FetchScheduler()
+    return _default_scheduler
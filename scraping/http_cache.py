@@ -0,0 +1,176 @@
+"""
+Caché de validadores HTTP (ETag / Last-Modified) para páginas de sección y feeds RSS.
+Permite hacer peticiones condicionales y saltar el parseo cuando el contenido no cambió.
+Los validadores nuevos solo se guardan cuando las noticias de la página quedaron en la base.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'http_validators.json')
+
+# Entradas sin uso durante más de este tiempo se descartan al cargar la caché
+DEFAULT_MAX_AGE_DAYS = 14
+
+
+class HttpValidatorCache:
+    """Guarda en disco ETag, Last-Modified y hash del contenido por URL"""
+
+    def __init__(self, cache_path: Optional[str] = None, max_age_days: int = DEFAULT_MAX_AGE_DAYS):
+        self.cache_path = cache_path or os.getenv('HTTP_CACHE_PATH', DEFAULT_CACHE_PATH)
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self.enabled = os.getenv('HTTP_CACHE_ENABLED', 'true').lower() == 'true'
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        """Carga la caché desde disco descartando entradas antiguas"""
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ No se pudo leer la caché HTTP {self.cache_path}: {e}")
+            return {}
+
+        cutoff = time.time() - self.max_age_seconds
+        return {url: entry for url, entry in entries.items() if entry.get('checked_at', 0) >= cutoff}
+
+    def _save(self):
+        """Escribe la caché de forma atómica (archivo temporal + rename)"""
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo guardar la caché HTTP {self.cache_path}: {e}")
+
+    def request_headers(self, url: str) -> Dict[str, str]:
+        """Cabeceras condicionales (If-None-Match / If-Modified-Since) para una URL"""
+        if not self.enabled:
+            return {}
+        with self._lock:
+            entry = self._entries.get(url)
+        if not entry:
+            return {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def evaluate(self, url: str, status: int, headers, content: Optional[bytes]) -> Tuple[bool, Optional[Dict]]:
+        """
+        Compara una respuesta con los validadores guardados sin modificarlos.
+        Retorna (cambió, entrada nueva); la entrada se guarda con commit() cuando el
+        contenido ya se procesó.
+        """
+        if not self.enabled:
+            return True, None
+
+        with self._lock:
+            previous = dict(self._entries.get(url, {}))
+
+        if status == 304:
+            previous['checked_at'] = time.time()
+            return False, previous
+
+        content_hash = hashlib.sha256(content or b'').hexdigest()
+        entry = {
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'content_hash': content_hash,
+            'checked_at': time.time()
+        }
+        return previous.get('content_hash') != content_hash, entry
+
+    def commit(self, entries: Dict[str, Dict]):
+        """Guarda varios validadores de una vez (una sola escritura a disco)"""
+        if not self.enabled or not entries:
+            return
+        with self._lock:
+            self._entries.update(entries)
+            self._save()
+
+    def staged(self) -> 'StagedValidators':
+        """Vista para un scraper: los validadores quedan pendientes hasta que se guarden sus noticias"""
+        return StagedValidators(self)
+
+    def clear(self):
+        """Elimina todas las entradas (fuerza descarga completa en la próxima ejecución)"""
+        with self._lock:
+            self._entries = {}
+            self._save()
+
+
+class StagedValidators:
+    """
+    Validadores de las páginas que descargó un scraper en la ejecución actual.
+    Si se guardaran al descargar, una falla al parsear o al guardar las noticias dejaría la
+    sección marcada como vista (304 o mismo hash) y no se volvería a procesar hasta que cambie.
+    Por eso quedan pendientes: quien guarda las noticias llama a commit() tras el commit de la
+    base de datos, o a discard() si falló.
+    """
+
+    def __init__(self, cache: HttpValidatorCache):
+        self.cache = cache
+        self._pending: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def request_headers(self, url: str) -> Dict[str, str]:
+        return self.cache.request_headers(url)
+
+    def has_changed(self, url: str, response) -> bool:
+        """
+        Retorna si el contenido cambió y deja pendientes sus validadores.
+
+        Se considera sin cambios si el servidor responde 304 o si el cuerpo tiene
+        el mismo hash que la última descarga (servidores sin ETag/Last-Modified).
+        """
+        return self.record(url, response.status_code, response.headers, response.content)
+
+    def record(self, url: str, status: int, headers, content: Optional[bytes]) -> bool:
+        """Igual que has_changed pero con los datos sueltos (útil para respuestas de aiohttp)"""
+        changed, entry = self.cache.evaluate(url, status, headers, content)
+        if entry is not None:
+            with self._lock:
+                self._pending[url] = entry
+        return changed
+
+    def forget(self, url: str):
+        """Descarta el validador pendiente de una página que no se pudo procesar"""
+        with self._lock:
+            self._pending.pop(url, None)
+
+    def commit(self):
+        """Guarda los validadores pendientes (las noticias de estas páginas ya están en la base)"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        self.cache.commit(pending)
+
+    def discard(self):
+        """Olvida los validadores pendientes: las páginas se vuelven a procesar en la próxima ejecución"""
+        with self._lock:
+            self._pending = {}
+
+
+_default_cache: Optional[HttpValidatorCache] = None
+
+
+def get_http_cache() -> HttpValidatorCache:
+    """Retorna la instancia compartida de la caché de validadores"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = HttpValidatorCache()
+    return _default_cache
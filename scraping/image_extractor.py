@@ -8,6 +8,7 @@ from typing import Optional
 import logging
 import re
 from urllib.parse import urljoin
+from fetch_scheduler import get_fetch_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -38,189 +39,16 @@ def extract_image_from_article(article_url: str, base_url: str = None, session:
                 'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8'
             })
         
-        # Hacer request al artículo individual
+        # Hacer request al artículo individual (respetando el ritmo del dominio)
+        scheduler = get_fetch_scheduler()
+        scheduler.acquire(article_url)
         response = session.get(article_url, timeout=15)
+        scheduler.report_response(article_url, response)
         response.raise_for_status()
         
         soup = BeautifulSoup(response.content, 'html.parser')
         
-        # ESTRATEGIA 1: Buscar meta tags (más confiables) - PRIORIDAD MÁXIMA
-        meta_selectors = [
-            ('meta', {'property': 'og:image'}),
-            ('meta', {'name': 'og:image'}),
-            ('meta', {'property': 'twitter:image'}),
-            ('meta', {'name': 'twitter:image'}),
-            ('meta', {'itemprop': 'image'}),
-            ('link', {'rel': 'image_src'})
-        ]
-        
-        for tag_name, attrs in meta_selectors:
-            meta = soup.find(tag_name, attrs)
-            if meta:
-                img_url = meta.get('content') or meta.get('href')
-                if img_url and _is_valid_image_url(img_url):
-                    normalized = _normalize_image_url(img_url, base_url or article_url)
-                    logger.info(f"✅ Imagen encontrada en meta tag de {article_url[:80]}...: {normalized[:100]}...")
-                    return normalized
-        
-        # ESTRATEGIA 2: Selectores específicos para CNN en Español (PRIORITARIOS)
-        cnn_selectors = [
-            # Selectores específicos de CNN
-            'div.media__image img',
-            'div.media-image img',
-            'div.Article__image img',
-            'div.article-image img',
-            'figure.media__image img',
-            'figure.media-image img',
-            'div.zn-body__image img',
-            'div.zn-body__read-all img',
-            'div[class*="Article"] img[class*="image"]',
-            'div[class*="article"] img[class*="image"]',
-            'div[class*="media"] img[class*="image"]',
-            'div[class*="story"] img[class*="image"]',
-            # Imágenes dentro del contenido principal del artículo
-            'article div.media img',
-            'article div.Article img',
-            'article figure img',
-            'div.zn-body__paragraph img',
-            'div.zn-body__read-all img',
-            # Selectores con data attributes comunes en CNN
-            'img[data-src]',
-            'img[data-lazy-src]',
-            'img[data-original]'
-        ]
-        
-        for selector in cnn_selectors:
-            imgs = soup.select(selector)
-            for img in imgs:
-                img_url = (img.get('src') or 
-                          img.get('data-src') or 
-                          img.get('data-lazy-src') or 
-                          img.get('data-original'))
-                if img_url and _is_valid_image_url(img_url) and 'default' not in img_url.lower():
-                    # Verificar que no sea un logo o icono pequeño
-                    img_class = ' '.join(img.get('class', [])).lower()
-                    if any(skip in img_class for skip in ['logo', 'icon', 'avatar', 'sprite']):
-                        continue
-                    normalized = _normalize_image_url(img_url, base_url or article_url)
-                    logger.info(f"✅ Imagen CNN encontrada con selector '{selector}' de {article_url[:80]}...: {normalized[:100]}...")
-                    return normalized
-        
-        # ESTRATEGIA 3: Buscar imágenes destacadas en el contenido principal (fallback genérico)
-        # Selectores específicos por diario (ordenados por prioridad)
-        featured_selectors = [
-            # Selectores específicos de Diario Correo
-            'div.entry-image img',
-            'div.post-image img',
-            'div.featured-image img',
-            'figure.wp-caption img',
-            'div.imagen-principal img',
-            'div.img-container img',
-            'div[class*="img-"] img',
-            'div[class*="image-"] img',
-            # Imágenes en contenedores específicos de El Comercio
-            'div.story-image img',
-            'div.story__image img',
-            'div.article-image img',
-            'div.article__image img',
-            'div.media-image img',
-            'div.media__image img',
-            'figure.story-image img',
-            'figure.article-image img',
-            'div[class*="story-image"] img',
-            'div[class*="story__image"] img',
-            'div[class*="article-image"] img',
-            'div[class*="article__image"] img',
-            'div[class*="media-image"] img',
-            'div[class*="media__image"] img',
-            # Imágenes con clases específicas
-            'img[class*="story-image"]',
-            'img[class*="story__image"]',
-            'img[class*="article-image"]',
-            'img[class*="article__image"]',
-            'img[class*="media-image"]',
-            'img[class*="media__image"]',
-            'img[class*="entry-image"]',
-            'img[class*="post-image"]',
-            # Selectores genéricos pero prioritarios
-            'img[class*="featured"]',
-            'img[class*="main"]',
-            'img[class*="hero"]',
-            'img[class*="principal"]',
-            'img[class*="destacada"]',
-            'img[class*="article"]',
-            'img[class*="story"]',
-            '.featured-image img',
-            '.main-image img',
-            '.hero-image img',
-            '.article-image img',
-            '.entry-image img',
-            '.post-image img',
-            'article img:first-of-type',
-            'div[class*="featured"] img',
-            'div[class*="hero"] img',
-            'figure img:first-of-type'
-        ]
-        
-        for selector in featured_selectors:
-            img = soup.select_one(selector)
-            if img:
-                img_url = (img.get('src') or 
-                          img.get('data-src') or 
-                          img.get('data-lazy-src') or 
-                          img.get('data-original'))
-                if img_url and _is_valid_image_url(img_url) and 'default' not in img_url.lower():
-                    normalized = _normalize_image_url(img_url, base_url or article_url)
-                    logger.debug(f"✅ Imagen encontrada con selector '{selector}': {normalized[:80]}...")
-                    return normalized
-        
-        # ESTRATEGIA 4: Buscar en srcset (para imágenes responsivas)
-        img_with_srcset = soup.find('img', srcset=True)
-        if img_with_srcset:
-            srcset = img_with_srcset.get('srcset', '')
-            if srcset:
-                # Extraer la URL más grande del srcset
-                urls = re.findall(r'([^\s,]+)(?:\s+\d+[wx])?', srcset)
-                for url in urls:
-                    if _is_valid_image_url(url) and 'default' not in url.lower():
-                        normalized = _normalize_image_url(url, base_url or article_url)
-                        logger.debug(f"✅ Imagen encontrada en srcset: {normalized[:80]}...")
-                        return normalized
-        
-        # ESTRATEGIA 5: Buscar primera imagen grande en el contenido del artículo (último recurso)
-        # Buscar en el contenido del artículo de forma genérica
-        article_content = soup.find('article') or soup.find('div', class_=lambda x: x and ('content' in str(x).lower() or 'article' in str(x).lower() or 'story' in str(x).lower() or 'zn-body' in str(x).lower()))
-        if article_content:
-            images = article_content.find_all('img')
-            # Priorizar imágenes grandes y con atributos específicos
-            for img in images:
-                img_url = img.get('src') or img.get('data-src') or img.get('data-lazy-src') or img.get('data-original')
-                if img_url and _is_valid_image_url(img_url) and 'default' not in img_url.lower():
-                    # Verificar que no sea un logo o icono
-                    img_class = ' '.join(img.get('class', [])).lower()
-                    if any(skip in img_class for skip in ['logo', 'icon', 'avatar', 'sprite', 'placeholder']):
-                        continue
-                    
-                    # Verificar dimensiones si están disponibles
-                    width = img.get('width')
-                    height = img.get('height')
-                    if width and height:
-                        try:
-                            w, h = int(width), int(height)
-                            if w > 200 and h > 200:  # Imágenes grandes
-                                normalized = _normalize_image_url(img_url, base_url or article_url)
-                                logger.debug(f"✅ Imagen grande encontrada en contenido: {normalized[:80]}...")
-                                return normalized
-                        except (ValueError, TypeError):
-                            pass
-                    
-                    # Si no tiene dimensiones pero parece válida, usar de todos modos
-                    normalized = _normalize_image_url(img_url, base_url or article_url)
-                    logger.debug(f"✅ Imagen encontrada en contenido (sin dimensiones): {normalized[:80]}...")
-                    return normalized
-        
-        logger.warning(f"⚠️ No se encontró imagen para {article_url[:80]}...")
-        return None
+        return extract_image_from_soup(soup, article_url, base_url)
         
     except requests.exceptions.RequestException as e:
         logger.warning(f"Error al obtener imagen de {article_url}: {e}")
@@ -230,6 +58,197 @@ def extract_image_from_article(article_url: str, base_url: str = None, session:
         return None
 
 
+def extract_image_from_soup(soup: BeautifulSoup, article_url: str, base_url: str = None) -> Optional[str]:
+    """
+    Aplica las estrategias de búsqueda de imagen sobre el HTML parseado de un artículo.
+    
+    Args:
+        soup: HTML del artículo parseado con BeautifulSoup
+        article_url: URL del artículo (para logs y URLs relativas)
+        base_url: URL base del sitio
+        
+    Returns:
+        URL de la imagen o None si no se encuentra
+    """
+    # ESTRATEGIA 1: Buscar meta tags (más confiables) - PRIORIDAD MÁXIMA
+    meta_selectors = [
+        ('meta', {'property': 'og:image'}),
+        ('meta', {'name': 'og:image'}),
+        ('meta', {'property': 'twitter:image'}),
+        ('meta', {'name': 'twitter:image'}),
+        ('meta', {'itemprop': 'image'}),
+        ('link', {'rel': 'image_src'})
+    ]
+    
+    for tag_name, attrs in meta_selectors:
+        meta = soup.find(tag_name, attrs)
+        if meta:
+            img_url = meta.get('content') or meta.get('href')
+            if img_url and _is_valid_image_url(img_url):
+                normalized = _normalize_image_url(img_url, base_url or article_url)
+                logger.info(f"✅ Imagen encontrada en meta tag de {article_url[:80]}...: {normalized[:100]}...")
+                return normalized
+    
+    # ESTRATEGIA 2: Selectores específicos para CNN en Español (PRIORITARIOS)
+    cnn_selectors = [
+        # Selectores específicos de CNN
+        'div.media__image img',
+        'div.media-image img',
+        'div.Article__image img',
+        'div.article-image img',
+        'figure.media__image img',
+        'figure.media-image img',
+        'div.zn-body__image img',
+        'div.zn-body__read-all img',
+        'div[class*="Article"] img[class*="image"]',
+        'div[class*="article"] img[class*="image"]',
+        'div[class*="media"] img[class*="image"]',
+        'div[class*="story"] img[class*="image"]',
+        # Imágenes dentro del contenido principal del artículo
+        'article div.media img',
+        'article div.Article img',
+        'article figure img',
+        'div.zn-body__paragraph img',
+        'div.zn-body__read-all img',
+        # Selectores con data attributes comunes en CNN
+        'img[data-src]',
+        'img[data-lazy-src]',
+        'img[data-original]'
+    ]
+    
+    for selector in cnn_selectors:
+        imgs = soup.select(selector)
+        for img in imgs:
+            img_url = (img.get('src') or 
+                      img.get('data-src') or 
+                      img.get('data-lazy-src') or 
+                      img.get('data-original'))
+            if img_url and _is_valid_image_url(img_url) and 'default' not in img_url.lower():
+                # Verificar que no sea un logo o icono pequeño
+                img_class = ' '.join(img.get('class', [])).lower()
+                if any(skip in img_class for skip in ['logo', 'icon', 'avatar', 'sprite']):
+                    continue
+                normalized = _normalize_image_url(img_url, base_url or article_url)
+                logger.info(f"✅ Imagen CNN encontrada con selector '{selector}' de {article_url[:80]}...: {normalized[:100]}...")
+                return normalized
+    
+    # ESTRATEGIA 3: Buscar imágenes destacadas en el contenido principal (fallback genérico)
+    # Selectores específicos por diario (ordenados por prioridad)
+    featured_selectors = [
+        # Selectores específicos de Diario Correo
+        'div.entry-image img',
+        'div.post-image img',
+        'div.featured-image img',
+        'figure.wp-caption img',
+        'div.imagen-principal img',
+        'div.img-container img',
+        'div[class*="img-"] img',
+        'div[class*="image-"] img',
+        # Imágenes en contenedores específicos de El Comercio
+        'div.story-image img',
+        'div.story__image img',
+        'div.article-image img',
+        'div.article__image img',
+        'div.media-image img',
+        'div.media__image img',
+        'figure.story-image img',
+        'figure.article-image img',
+        'div[class*="story-image"] img',
+        'div[class*="story__image"] img',
+        'div[class*="article-image"] img',
+        'div[class*="article__image"] img',
+        'div[class*="media-image"] img',
+        'div[class*="media__image"] img',
+        # Imágenes con clases específicas
+        'img[class*="story-image"]',
+        'img[class*="story__image"]',
+        'img[class*="article-image"]',
+        'img[class*="article__image"]',
+        'img[class*="media-image"]',
+        'img[class*="media__image"]',
+        'img[class*="entry-image"]',
+        'img[class*="post-image"]',
+        # Selectores genéricos pero prioritarios
+        'img[class*="featured"]',
+        'img[class*="main"]',
+        'img[class*="hero"]',
+        'img[class*="principal"]',
+        'img[class*="destacada"]',
+        'img[class*="article"]',
+        'img[class*="story"]',
+        '.featured-image img',
+        '.main-image img',
+        '.hero-image img',
+        '.article-image img',
+        '.entry-image img',
+        '.post-image img',
+        'article img:first-of-type',
+        'div[class*="featured"] img',
+        'div[class*="hero"] img',
+        'figure img:first-of-type'
+    ]
+    
+    for selector in featured_selectors:
+        img = soup.select_one(selector)
+        if img:
+            img_url = (img.get('src') or 
+                      img.get('data-src') or 
+                      img.get('data-lazy-src') or 
+                      img.get('data-original'))
+            if img_url and _is_valid_image_url(img_url) and 'default' not in img_url.lower():
+                normalized = _normalize_image_url(img_url, base_url or article_url)
+                logger.debug(f"✅ Imagen encontrada con selector '{selector}': {normalized[:80]}...")
+                return normalized
+    
+    # ESTRATEGIA 4: Buscar en srcset (para imágenes responsivas)
+    img_with_srcset = soup.find('img', srcset=True)
+    if img_with_srcset:
+        srcset = img_with_srcset.get('srcset', '')
+        if srcset:
+            # Extraer la URL más grande del srcset
+            urls = re.findall(r'([^\s,]+)(?:\s+\d+[wx])?', srcset)
+            for url in urls:
+                if _is_valid_image_url(url) and 'default' not in url.lower():
+                    normalized = _normalize_image_url(url, base_url or article_url)
+                    logger.debug(f"✅ Imagen encontrada en srcset: {normalized[:80]}...")
+                    return normalized
+    
+    # ESTRATEGIA 5: Buscar primera imagen grande en el contenido del artículo (último recurso)
+    # Buscar en el contenido del artículo de forma genérica
+    article_content = soup.find('article') or soup.find('div', class_=lambda x: x and ('content' in str(x).lower() or 'article' in str(x).lower() or 'story' in str(x).lower() or 'zn-body' in str(x).lower()))
+    if article_content:
+        images = article_content.find_all('img')
+        # Priorizar imágenes grandes y con atributos específicos
+        for img in images:
+            img_url = img.get('src') or img.get('data-src') or img.get('data-lazy-src') or img.get('data-original')
+            if img_url and _is_valid_image_url(img_url) and 'default' not in img_url.lower():
+                # Verificar que no sea un logo o icono
+                img_class = ' '.join(img.get('class', [])).lower()
+                if any(skip in img_class for skip in ['logo', 'icon', 'avatar', 'sprite', 'placeholder']):
+                    continue
+                
+                # Verificar dimensiones si están disponibles
+                width = img.get('width')
+                height = img.get('height')
+                if width and height:
+                    try:
+                        w, h = int(width), int(height)
+                        if w > 200 and h > 200:  # Imágenes grandes
+                            normalized = _normalize_image_url(img_url, base_url or article_url)
+                            logger.debug(f"✅ Imagen grande encontrada en contenido: {normalized[:80]}...")
+                            return normalized
+                    except (ValueError, TypeError):
+                        pass
+                
+                # Si no tiene dimensiones pero parece válida, usar de todos modos
+                normalized = _normalize_image_url(img_url, base_url or article_url)
+                logger.debug(f"✅ Imagen encontrada en contenido (sin dimensiones): {normalized[:80]}...")
+                return normalized
+    
+    logger.warning(f"⚠️ No se encontró imagen para {article_url[:80]}...")
+    return None
+
+
 def extract_image_from_element(element, article_url: str = None, base_url: str = None, session: requests.Session = None) -> Optional[str]:
     """
     Extrae imagen de un elemento HTML (fallback si no se puede obtener del artículo).
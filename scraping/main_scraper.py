@@ -2,6 +2,9 @@
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import time
 from datetime import datetime
 import logging
 import os
@@ -9,6 +12,9 @@ import os
 # Configurar logging PRIMERO antes de usarlo
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Segundos sin visitas de sección tras los que se cierra el Chrome que comparten
+SECTION_DRIVER_IDLE_SECONDS = float(os.getenv('SECTION_DRIVER_IDLE_SECONDS', '900'))
+
 # Intentar importar scraper tradicional de El Comercio (opcional, solo como fallback)
 try:
     from scraper_comercio import ScraperComercio
@@ -77,6 +83,8 @@ from scraper_twitter import ScraperTwitter
 from scraper_facebook import ScraperFacebook
 from scraper_instagram import ScraperInstagram
 from scraper_youtube import ScraperYouTube
+from url_frontier import get_url_frontier
+from http_cache import StagedValidators
 
 # Intentar importar scraper de CNN con Selenium primero (mejor para contenido dinámico)
 try:
@@ -99,6 +107,15 @@ except ImportError:
         CNN_SCRAPER_TYPE = None
         logging.error("❌ No se pudo importar ningún scraper de CNN")
 
+# Motor asíncrono (aiohttp) para los diarios que no requieren JavaScript
+try:
+    from enhanced_scraper import EnhancedScraper
+    ASYNC_ENGINE_AVAILABLE = True
+except ImportError as e:
+    EnhancedScraper = None
+    ASYNC_ENGINE_AVAILABLE = False
+    logging.debug(f"Motor asíncrono no disponible: {e}")
+
 # Importar scrapers con Selenium para redes sociales (si existen)
 try:
     from scraper_facebook_selenium import ScraperFacebookSelenium
@@ -110,7 +127,26 @@ except ImportError:
     HAS_SELENIUM_SCRAPERS = False
 
 class MainScraper:
-    def __init__(self):
+    def __init__(self, engine: str = None):
+        # Motor para diarios: 'selenium' (por defecto, un scraper por diario) o
+        # 'async' (EnhancedScraper con aiohttp para Comercio, Correo y Popular, sin Chrome)
+        self.engine = (engine or os.getenv('SCRAPER_ENGINE', 'selenium')).lower()
+        self.async_engine = None
+        self._async_sources = {}  # EnhancedScraper de un solo diario, para scrape_source
+        # Un lock por fuente: sus secciones comparten instancia (driver, processed_urls,
+        # validadores HTTP pendientes). Reentrante: el servicio lo toma hasta guardar las noticias
+        self._source_locks = {}
+        self._source_locks_guard = threading.Lock()
+        # Chrome abierto entre visitas de sección: última visita y temporizador de cierre por fuente
+        self._driver_last_used = {}
+        self._driver_timers = {}
+        if self.engine == 'async':
+            if ASYNC_ENGINE_AVAILABLE:
+                self.async_engine = EnhancedScraper()
+                logging.info("⚡ Usando motor asíncrono (aiohttp) para Comercio, Correo y Popular")
+            else:
+                logging.warning("⚠️ SCRAPER_ENGINE=async pero aiohttp no está disponible, usando scrapers por diario")
+        
         # Inicializar scraper de CNN (Selenium si está disponible, sino tradicional)
         cnn_scraper = None
         if CNN_SCRAPER_CLASS:
@@ -208,6 +244,11 @@ class MainScraper:
         else:
             logging.warning("⚠️ Scraper de CNN no disponible - se omitirá en el scraping")
         
+        # Con el motor asíncrono, los diarios que cubre ya no pasan por su scraper individual
+        if self.async_engine:
+            for name in self.async_engine.base_urls:
+                self.scrapers.pop(name, None)
+        
         # Scrapers de redes sociales (usar Selenium si está disponible, si no usar mock)
         use_selenium = HAS_SELENIUM_SCRAPERS and os.getenv('USE_SELENIUM', 'False').lower() == 'true'
         
@@ -231,22 +272,41 @@ class MainScraper:
             self.use_real_scraping = False
     
     def scrape_all(self):
-        """Ejecuta el scraping de todos los diarios"""
+        """Ejecuta el scraping de todos los diarios
+        
+        Los diarios se procesan en paralelo (SCRAPER_MAX_WORKERS hilos): el ritmo por
+        dominio lo controla fetch_scheduler, así que un diario lento no frena a los demás.
+        """
         all_news = []
+        url_frontier = get_url_frontier()
+        url_frontier.reset_stats()
+        url_frontier.prune()
         
-        for name, scraper in self.scrapers.items():
-            try:
-                logging.info(f"Iniciando scraping de {name}")
-                news = scraper.get_all_news()
-                all_news.extend(news)
-                logging.info(f"Scraping de {name} completado. Noticias obtenidas: {len(news)}")
-            except Exception as e:
-                logging.error(f"Error en scraping de {name}: {e}")
-                continue
+        jobs = dict(self.scrapers)
+        if self.async_engine:
+            jobs['async'] = self.async_engine
+        
+        max_workers = max(1, min(int(os.getenv('SCRAPER_MAX_WORKERS', '4')), len(jobs) or 1))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scraper') as executor:
+            futures = {executor.submit(self._scrape_source, name, scraper): name for name, scraper in jobs.items()}
+            for future in as_completed(futures):
+                all_news.extend(future.result())
         
         logging.info(f"Scraping total completado. Total de noticias: {len(all_news)}")
+        url_frontier.log_stats("Diarios")
         return all_news
     
+    def _scrape_source(self, name, scraper):
+        """Ejecuta get_all_news de un diario aislando sus errores"""
+        try:
+            logging.info(f"Iniciando scraping de {name}")
+            news = scraper.get_all_news()
+            logging.info(f"Scraping de {name} completado. Noticias obtenidas: {len(news)}")
+            return news
+        except Exception as e:
+            logging.error(f"Error en scraping de {name}: {e}")
+            return []
+    
     def scrape_social_media(self):
         """Ejecuta el scraping solo de redes sociales"""
         all_news = []
@@ -267,7 +327,142 @@ class MainScraper:
         
         logging.info(f"Scraping de redes sociales completado. Total de noticias: {len(all_news)}")
         return all_news
-    
+
+    def newspaper_sources(self):
+        """Nombres de los diarios disponibles (con el motor asíncrono, uno por diario que cubre)"""
+        names = list(self.scrapers)
+        if self.async_engine:
+            names.extend(self.async_engine.base_urls)
+        return names
+
+    def social_sources(self):
+        """Nombres de las redes sociales disponibles"""
+        return list(self.social_scrapers)
+
+    def source_lock(self, name):
+        """Lock de una fuente; quien guarda sus noticias lo mantiene hasta confirmar los validadores"""
+        with self._source_locks_guard:
+            if name not in self._source_locks:
+                self._source_locks[name] = threading.RLock()
+            return self._source_locks[name]
+
+    def _staged_validators(self, name=None):
+        """Validadores HTTP pendientes de una fuente, o de todos los scrapers si name es None"""
+        if name is None:
+            scrapers = [*self.scrapers.values(), *self.social_scrapers.values(), *self._async_sources.values()]
+            if self.async_engine:
+                scrapers.append(self.async_engine)
+        else:
+            scrapers = [self.scrapers.get(name) or self.social_scrapers.get(name) or self._async_sources.get(name)]
+        return [scraper.http_cache for scraper in scrapers
+                if isinstance(getattr(scraper, 'http_cache', None), StagedValidators)]
+
+    def commit_validators(self, name=None):
+        """Guarda los validadores HTTP de las páginas cuyas noticias ya están en la base de datos"""
+        for staged in self._staged_validators(name):
+            staged.commit()
+
+    def discard_validators(self, name=None):
+        """Olvida los validadores pendientes: esas páginas se procesan de nuevo en la próxima ejecución"""
+        for staged in self._staged_validators(name):
+            staged.discard()
+
+    def _async_source(self, name):
+        """EnhancedScraper de un solo diario (llamar con el lock de la fuente tomado)"""
+        if name not in self._async_sources:
+            self._async_sources[name] = EnhancedScraper(diarios=[name])
+        return self._async_sources[name]
+
+    def scrape_source(self, name):
+        """Ejecuta el scraping de un solo diario o red social
+
+        A diferencia de scrape_all, los errores se propagan para que quien llama pueda
+        reintentar solo esa fuente. Las llamadas sobre una misma fuente se serializan.
+        """
+        with self.source_lock(name):
+            if name in self.social_scrapers:
+                scraper = self.social_scrapers[name]
+                if self.use_real_scraping:
+                    return scraper.get_all_news(use_real=self.use_real_scraping)
+                return scraper.get_all_news()
+
+            if name in self.scrapers:
+                return self.scrapers[name].get_all_news()
+
+            if self.async_engine and name in self.async_engine.base_urls:
+                return self._async_source(name).get_all_news()
+
+        raise ValueError(f"Fuente desconocida: {name}")
+
+    def source_sections(self, name):
+        """Secciones de un diario que se pueden scrapear por separado (vacío si no se puede)"""
+        if self.async_engine and name in self.async_engine.base_urls:
+            return list(self.async_engine.categories.get(name, []))
+        scraper = self.scrapers.get(name)
+        if scraper is None:
+            return []
+        return [section for section in getattr(scraper, 'sections', {})
+                if callable(getattr(scraper, f"get_{section}", None))]
+
+    def scrape_section(self, name, section):
+        """Ejecuta el scraping de una sola sección de un diario; los errores se propagan
+
+        Las secciones de un mismo diario comparten el scraper (un solo WebDriver y sus
+        processed_urls), así que se ejecutan de a una aunque el scheduler las lance a la vez.
+        El Chrome queda abierto entre secciones y se cierra tras SECTION_DRIVER_IDLE_SECONDS
+        sin visitas (o de inmediato si la sección falla).
+        """
+        with self.source_lock(name):
+            if self.async_engine and name in self.async_engine.base_urls:
+                return self._async_source(name).get_news_by_category(section)
+
+            scraper = self.scrapers.get(name)
+            method = getattr(scraper, f"get_{section}", None) if scraper else None
+            if method is None:
+                raise ValueError(f"Sección desconocida: {name}/{section}")
+
+            # Algunos scrapers Selenium solo abren Chrome en get_all_news
+            init_driver = getattr(scraper, '_init_driver', None)
+            close_driver = getattr(scraper, '_close_driver', None)
+            if not (init_driver and close_driver and hasattr(scraper, 'keep_driver')):
+                return method()
+
+            scraper.keep_driver = True
+            try:
+                init_driver()
+                return method()
+            except Exception:
+                # Un driver en mal estado no se reutiliza
+                close_driver(force=True)
+                raise
+            finally:
+                self._driver_last_used[name] = time.monotonic()
+                self._schedule_driver_close(name)
+
+    def _schedule_driver_close(self, name):
+        """Programa el cierre del Chrome de la fuente si no hay otra visita de sección a tiempo"""
+        timer = self._driver_timers.pop(name, None)
+        if timer:
+            timer.cancel()
+        timer = threading.Timer(SECTION_DRIVER_IDLE_SECONDS, self._close_idle_driver, args=(name,))
+        timer.daemon = True
+        self._driver_timers[name] = timer
+        timer.start()
+
+    def _close_idle_driver(self, name):
+        with self.source_lock(name):
+            idle = time.monotonic() - self._driver_last_used.get(name, 0)
+            if idle < SECTION_DRIVER_IDLE_SECONDS:
+                return
+            scraper = self.scrapers.get(name)
+            if scraper is None:
+                return
+            # get_all_news vuelve a cerrar su propio Chrome al terminar
+            scraper.keep_driver = False
+            if getattr(scraper, 'driver', None):
+                logging.info(f"🧹 {name}: cerrando Chrome tras {idle / 60:.0f} min sin visitas")
+                scraper._close_driver(force=True)
+
     def scrape_all_sources(self):
         """Ejecuta el scraping de todas las fuentes (diarios + redes sociales)"""
         all_news = []
@@ -285,6 +480,14 @@ class MainScraper:
         """Obtiene noticias de una categoría específica de todos los diarios"""
         all_news = []
         
+        if self.async_engine:
+            try:
+                news = self.async_engine.get_news_by_category(category)
+                all_news.extend(news)
+                logging.info(f"Noticias de {category} (motor asíncrono): {len(news)}")
+            except Exception as e:
+                logging.error(f"Error obteniendo {category} con el motor asíncrono: {e}")
+        
         for name, scraper in self.scrapers.items():
             try:
                 if hasattr(scraper, f'get_{category.lower()}'):
@@ -22,7 +22,13 @@ import logging
 import re
 import time
 import random
+import sys
+import os
 from urllib.parse import urljoin, urlparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from url_frontier import get_url_frontier
+from fetch_scheduler import get_fetch_scheduler
+from selenium_profile import build_chrome_options, apply_network_blocklist
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -34,7 +40,10 @@ class ScraperCNNSelenium:
         
         self.base_url = "https://cnnespanol.cnn.com"
         self.driver = None
+        self.keep_driver = False  # MainScraper lo activa para reutilizar Chrome entre secciones
         self.processed_urls: Set[str] = set()
+        self.url_frontier = get_url_frontier()  # URLs ya ingeridas en ejecuciones anteriores
+        self.fetch_scheduler = get_fetch_scheduler()  # Ritmo de descargas por dominio
         self.processed_images: Set[str] = set()
         
         # Configuración de secciones
@@ -59,19 +68,12 @@ class ScraperCNNSelenium:
         if self.driver:
             return
         
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')  # Ejecutar sin ventana
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        
-        # Deshabilitar imágenes para mayor velocidad (opcional)
-        # chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        # Perfil ligero: sin imágenes, fuentes ni publicidad; carga 'eager'
+        chrome_options = build_chrome_options()
         
         try:
             self.driver = webdriver.Chrome(options=chrome_options)
+            apply_network_blocklist(self.driver)
             self.driver.set_page_load_timeout(30)
             self.driver.implicitly_wait(10)
             logging.info("✅ Driver de Chrome inicializado")
@@ -80,9 +82,9 @@ class ScraperCNNSelenium:
             logging.error("Asegúrate de tener ChromeDriver instalado y en PATH")
             raise
 
-    def _close_driver(self):
-        """Cierra el driver"""
-        if self.driver:
+    def _close_driver(self, force: bool = False):
+        """Cierra el driver (si keep_driver está activo, solo con force=True)"""
+        if self.driver and (force or not self.keep_driver):
             self.driver.quit()
             self.driver = None
 
@@ -90,6 +92,7 @@ class ScraperCNNSelenium:
         """Carga una página y espera a que se ejecute JavaScript"""
         try:
             logging.info(f"🔍 Cargando página: {url}")
+            self.fetch_scheduler.acquire(url)
             self.driver.get(url)
             
             # Esperar a que se cargue el contenido
@@ -191,6 +194,10 @@ class ScraperCNNSelenium:
         if article_url in self.processed_urls:
             return None
         
+        # No abrir la página si ya fue ingerida en una ejecución anterior
+        if not self.url_frontier.should_fetch(article_url):
+            return None
+        
         if not self._load_page_with_js(article_url, wait_seconds=3):
             return None
         
@@ -696,15 +703,9 @@ class ScraperCNNSelenium:
                 article_data = self._extract_article_data_selenium(link)
                 if article_data:
                     articles.append(article_data)
-                
-                # Delay entre artículos
-                time.sleep(random.uniform(1, 3))
             
             if len(articles) >= max_articles:
                 break
-            
-            # Delay entre secciones
-            time.sleep(2)
         
         logging.info(f"✅ Sección {section_name} completada: {len(articles)} artículos")
         return articles
@@ -734,7 +735,6 @@ class ScraperCNNSelenium:
                 try:
                     articles = self.scrape_section(section_name, max_articles_per_section)
                     all_news.extend(articles)
-                    time.sleep(3)  # Delay entre secciones
                 except Exception as e:
                     logging.error(f"Error en sección {section_name}: {e}")
             
@@ -24,7 +24,12 @@ import time
 import random
 import requests
 import os
+import sys
 from urllib.parse import urljoin, urlparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from url_frontier import get_url_frontier
+from fetch_scheduler import get_fetch_scheduler
+from selenium_profile import build_chrome_options, apply_network_blocklist
 
 # Importar scraper tradicional como fallback (opcional)
 FALLBACK_AVAILABLE = False
@@ -43,8 +48,11 @@ class ScraperComercioSelenium:
         
         self.base_url = "https://elcomercio.pe"
         self.driver = None
+        self.keep_driver = False  # MainScraper lo activa para reutilizar Chrome entre secciones
         self.processed_urls: Set[str] = set()
         self.processed_images: Set[str] = set()  # Rastrear imágenes usadas para evitar duplicados
+        self.url_frontier = get_url_frontier()  # URLs ya ingeridas en ejecuciones anteriores
+        self.fetch_scheduler = get_fetch_scheduler()  # Ritmo de descargas por dominio
         
         # Configuración de secciones
         self.sections = {
@@ -79,16 +87,12 @@ class ScraperComercioSelenium:
         if self.driver:
             return
         
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+        # Perfil ligero: sin imágenes, fuentes ni publicidad; carga 'eager'
+        chrome_options = build_chrome_options()
         
         try:
             self.driver = webdriver.Chrome(options=chrome_options)
+            apply_network_blocklist(self.driver)
             self.driver.set_page_load_timeout(15)  # Reducido de 30 a 15 segundos
             self.driver.implicitly_wait(5)  # Reducido de 10 a 5 segundos
             logger.info("✅ Driver de Chrome inicializado para El Comercio")
@@ -96,9 +100,9 @@ class ScraperComercioSelenium:
             logger.error(f"❌ Error inicializando Chrome driver: {e}")
             raise
 
-    def _close_driver(self):
-        """Cierra el driver"""
-        if self.driver:
+    def _close_driver(self, force: bool = False):
+        """Cierra el driver (si keep_driver está activo, solo con force=True)"""
+        if self.driver and (force or not self.keep_driver):
             self.driver.quit()
             self.driver = None
 
@@ -120,6 +124,7 @@ class ScraperComercioSelenium:
                     return False
             
             logger.info(f"🔍 Cargando página: {url}")
+            self.fetch_scheduler.acquire(url)
             self.driver.get(url)
             
             time.sleep(min(wait_seconds, 3))  # Máximo 3 segundos de espera
@@ -140,7 +145,7 @@ class ScraperComercioSelenium:
             if "invalid session id" in str(e).lower() or "session" in str(e).lower():
                 logger.warning("Sesión de Selenium inválida, reinicializando driver...")
                 try:
-                    self._close_driver()
+                    self._close_driver(force=True)
                     self._init_driver()
                 except Exception as init_error:
                     logger.error(f"Error reinicializando driver: {init_error}")
@@ -453,7 +458,10 @@ class ScraperComercioSelenium:
                     seen.add(link)
                     unique_links.append(link)
             
-            logger.info(f"✅ Encontrados {len(unique_links)} artículos únicos en {section_url}")
+            # Omitir artículos ya ingeridos en ejecuciones anteriores
+            unique_links = self.url_frontier.filter_new(unique_links)
+            
+            logger.info(f"✅ Encontrados {len(unique_links)} artículos nuevos en {section_url}")
             # Limitar a 30 artículos por sección (se puede ajustar si se necesita más)
             return unique_links[:30]
             
@@ -691,7 +699,9 @@ class ScraperComercioSelenium:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
             })
             
+            self.fetch_scheduler.acquire(article_url)
             response = session.get(article_url, timeout=10)
+            self.fetch_scheduler.report_response(article_url, response)
             response.raise_for_status()
             soup = BeautifulSoup(response.content, 'html.parser')
             
@@ -781,7 +791,6 @@ class ScraperComercioSelenium:
                             article_data = self._extract_article_data_selenium(link)
                             if article_data:
                                 noticias.append(article_data)
-                                time.sleep(random.uniform(0.5, 1))  # Reducido de 1-2 a 0.5-1 segundos
                         except Exception as e:
                             logger.error(f"Error procesando artículo {link}: {e}")
                             continue
@@ -845,7 +854,6 @@ class ScraperComercioSelenium:
                             article_data = self._extract_article_data_selenium(link)
                             if article_data:
                                 noticias.append(article_data)
-                                time.sleep(random.uniform(0.5, 1))
                         except Exception as e:
                             logger.error(f"Error procesando artículo {link}: {e}")
                             continue
@@ -899,7 +907,6 @@ class ScraperComercioSelenium:
                         article_data = self._extract_article_data_selenium(link)
                         if article_data:
                             noticias.append(article_data)
-                            time.sleep(random.uniform(1, 2))
                     except Exception as e:
                         logger.error(f"Error procesando artículo {link}: {e}")
                         continue
@@ -970,7 +977,6 @@ class ScraperComercioSelenium:
                             article_data = self._extract_article_data_selenium(link)
                             if article_data:
                                 noticias.append(article_data)
-                                time.sleep(random.uniform(0.5, 1))
                         except Exception as e:
                             logger.error(f"Error procesando artículo {link}: {e}")
                             continue
@@ -1024,7 +1030,6 @@ class ScraperComercioSelenium:
                         article_data = self._extract_article_data_selenium(link)
                         if article_data:
                             noticias.append(article_data)
-                            time.sleep(random.uniform(1, 2))
                     except Exception as e:
                         logger.error(f"Error procesando artículo {link}: {e}")
                         continue
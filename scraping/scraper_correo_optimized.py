@@ -11,6 +11,9 @@ from urllib.parse import urljoin, urlparse
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
 from image_extractor import extract_image_from_element
+from http_cache import get_http_cache
+from url_frontier import get_url_frontier
+from fetch_scheduler import get_fetch_scheduler
 from date_extraction_utils import get_publication_date
 
 class ScraperCorreoOptimized:
@@ -35,6 +38,15 @@ class ScraperCorreoOptimized:
         # Rastrear imágenes usadas para evitar duplicados
         self.processed_images: Set[str] = set()
         
+        # Caché de ETag/Last-Modified para no re-descargar secciones sin cambios
+        self.http_cache = get_http_cache().staged()
+        
+        # URLs de artículos ya ingeridas en ejecuciones anteriores
+        self.url_frontier = get_url_frontier()
+        
+        # Ritmo de descargas por dominio (reemplaza las pausas fijas entre páginas)
+        self.fetch_scheduler = get_fetch_scheduler()
+        
         # URLs válidas identificadas en el análisis
         self.valid_sections = [
             '/deportes/',
@@ -92,11 +104,13 @@ class ScraperCorreoOptimized:
             'div[class*="item"] img'
         ]
     
-    def make_request(self, url: str, max_retries: int = 3) -> Optional[requests.Response]:
+    def make_request(self, url: str, max_retries: int = 3, headers: Optional[Dict[str, str]] = None) -> Optional[requests.Response]:
         """Realiza una petición HTTP con reintentos y manejo de errores"""
         for attempt in range(max_retries):
             try:
-                response = self.session.get(url, timeout=15)
+                self.fetch_scheduler.acquire(url)
+                response = self.session.get(url, timeout=15, headers=headers)
+                self.fetch_scheduler.report_response(url, response)
                 response.raise_for_status()
                 return response
             except requests.exceptions.RequestException as e:
@@ -108,6 +122,18 @@ class ScraperCorreoOptimized:
                     return None
         return None
     
+    def fetch_if_modified(self, url: str) -> Optional[requests.Response]:
+        """Descarga una página de sección solo si cambió desde la última ejecución"""
+        response = self.make_request(url, headers=self.http_cache.request_headers(url))
+        if not response:
+            return None
+        
+        if not self.http_cache.has_changed(url, response):
+            self.logger.info(f"⏭️ Sin cambios desde la última ejecución, se omite: {url}")
+            return None
+        
+        return response
+    
     def extract_article_content(self, article_url: str) -> str:
         """Extrae el contenido completo de un artículo individual"""
         try:
@@ -204,7 +230,7 @@ class ScraperCorreoOptimized:
         processed_urls = set()
         
         try:
-            response = self.make_request(url)
+            response = self.fetch_if_modified(url)
             if not response:
                 return []
             
@@ -245,6 +271,7 @@ class ScraperCorreoOptimized:
             
         except Exception as e:
             self.logger.error(f"Error obteniendo {url}: {e}")
+            self.http_cache.forget(url)  # la página se vuelve a procesar en la próxima ejecución
             return []
     
     def extract_news_data(self, article_element, category: str) -> Optional[Dict]:
@@ -260,6 +287,10 @@ class ScraperCorreoOptimized:
             if not link or not self.is_valid_article_url(link):
                 return None
             
+            # No descargar el artículo si ya fue ingerido en una ejecución anterior
+            if not self.url_frontier.should_fetch(link):
+                return None
+            
             # Extraer imagen con prevención de duplicados
             imagen_url = self.extract_image(article_element)
             
@@ -420,9 +451,6 @@ class ScraperCorreoOptimized:
                 if len(page_noticias) < 5:
                     break
                 
-                # Pequeña pausa entre páginas
-                time.sleep(1)
-                
             except Exception as e:
                 self.logger.warning(f"Error en página {page} de {section}: {e}")
                 continue
@@ -481,9 +509,6 @@ class ScraperCorreoOptimized:
                 all_news.extend(section_noticias)
                 self.logger.info(f"Scraping de {section_name} completado. Noticias obtenidas: {len(section_noticias)}")
                 
-                # Pausa entre secciones para evitar sobrecarga
-                time.sleep(2)
-                
             except Exception as e:
                 self.logger.error(f"Error en sección {section_name}: {e}")
                 continue
@@ -9,6 +9,9 @@ from urllib.parse import urlparse, urlunparse
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
 from image_extractor import extract_image_from_element
+from http_cache import get_http_cache
+from url_frontier import get_url_frontier
+from fetch_scheduler import get_fetch_scheduler
 from date_extraction_utils import get_publication_date
 
 class ScraperPopularImproved:
@@ -19,6 +22,9 @@ class ScraperPopularImproved:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         self.processed_urls: Set[str] = set()
+        self.http_cache = get_http_cache().staged()
+        self.url_frontier = get_url_frontier()
+        self.fetch_scheduler = get_fetch_scheduler()
     
     def get_full_article_content(self, article_url: str) -> str:
         """Extrae el contenido completo de un artículo individual"""
@@ -26,7 +32,9 @@ class ScraperPopularImproved:
             if not article_url:
                 return ""
             
+            self.fetch_scheduler.acquire(article_url)
             response = self.session.get(article_url, timeout=10)
+            self.fetch_scheduler.report_response(article_url, response)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -106,6 +114,9 @@ class ScraperPopularImproved:
         if normalized in self.processed_urls:
             return True
         self.processed_urls.add(normalized)
+        # Ya ingerida en una ejecución anterior (frontera persistente)
+        if not self.url_frontier.should_fetch(normalized):
+            return True
         return False
     
     def _find_image_url(self, element, article_url: str = None) -> Optional[str]:
@@ -132,9 +143,15 @@ class ScraperPopularImproved:
                         else:
                             page_url = f"{url}?page={page}"
                     
-                    response = self.session.get(page_url, timeout=10)
+                    self.fetch_scheduler.acquire(page_url)
+                    response = self.session.get(page_url, timeout=10, headers=self.http_cache.request_headers(page_url))
+                    self.fetch_scheduler.report_response(page_url, response)
                     response.raise_for_status()
                     
+                    if not self.http_cache.has_changed(page_url, response):
+                        logging.info(f"⏭️ Sin cambios desde la última ejecución, se omite: {page_url}")
+                        break
+                    
                     soup = BeautifulSoup(response.content, 'html.parser')
                     
                     # Buscar artículos con selectores más amplios
@@ -254,6 +271,7 @@ class ScraperPopularImproved:
                         
                 except Exception as e:
                     logging.warning(f"Error obteniendo página {page} de {url}: {e}")
+                    self.http_cache.forget(page_url)  # se vuelve a procesar en la próxima ejecución
                     continue
                     
             return noticias
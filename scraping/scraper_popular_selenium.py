@@ -28,6 +28,9 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
 from date_extraction_utils import get_publication_date
+from url_frontier import get_url_frontier
+from fetch_scheduler import get_fetch_scheduler
+from selenium_profile import build_chrome_options, apply_network_blocklist
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -40,7 +43,10 @@ class ScraperPopularSelenium:
         
         self.base_url = "https://elpopular.pe"
         self.driver = None
+        self.keep_driver = False  # MainScraper lo activa para reutilizar Chrome entre secciones
         self.processed_urls: Set[str] = set()
+        self.url_frontier = get_url_frontier()  # URLs ya ingeridas en ejecuciones anteriores
+        self.fetch_scheduler = get_fetch_scheduler()  # Ritmo de descargas por dominio
         self.processed_images: Set[str] = set()  # Rastrear imágenes usadas para evitar duplicados
         
         # Configuración de secciones
@@ -68,16 +74,12 @@ class ScraperPopularSelenium:
         if self.driver:
             return
         
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+        # Perfil ligero: sin imágenes, fuentes ni publicidad; carga 'eager'
+        chrome_options = build_chrome_options()
         
         try:
             self.driver = webdriver.Chrome(options=chrome_options)
+            apply_network_blocklist(self.driver)
             self.driver.set_page_load_timeout(30)
             self.driver.implicitly_wait(10)
             logger.info("✅ Driver de Chrome inicializado para El Popular")
@@ -85,9 +87,9 @@ class ScraperPopularSelenium:
             logger.error(f"❌ Error inicializando Chrome driver: {e}")
             raise
 
-    def _close_driver(self):
-        """Cierra el driver"""
-        if self.driver:
+    def _close_driver(self, force: bool = False):
+        """Cierra el driver (si keep_driver está activo, solo con force=True)"""
+        if self.driver and (force or not self.keep_driver):
             self.driver.quit()
             self.driver = None
 
@@ -95,6 +97,7 @@ class ScraperPopularSelenium:
         """Carga una página y espera a que se ejecute JavaScript"""
         try:
             logger.info(f"🔍 Cargando página El Popular: {url}")
+            self.fetch_scheduler.acquire(url)
             self.driver.get(url)
             
             time.sleep(wait_seconds)
@@ -204,7 +207,10 @@ class ScraperPopularSelenium:
                     seen.add(link)
                     unique_links.append(link)
             
-            logger.info(f"📰 Encontrados {len(unique_links)} artículos únicos en {section_url}")
+            # Omitir artículos ya ingeridos en ejecuciones anteriores
+            unique_links = self.url_frontier.filter_new(unique_links)
+            
+            logger.info(f"📰 Encontrados {len(unique_links)} artículos nuevos en {section_url}")
             return unique_links[:30]  # Limitar a 30 artículos por sección
             
         except Exception as e:
@@ -529,7 +535,6 @@ class ScraperPopularSelenium:
                     if article_data:
                         article_data['categoria'] = 'Deportes'
                         noticias.append(article_data)
-                        time.sleep(random.uniform(1, 2))  # Delay aleatorio
             
             logger.info(f"✅ Deportes: {len(noticias)} noticias extraídas")
             
@@ -555,7 +560,6 @@ class ScraperPopularSelenium:
                     if article_data:
                         article_data['categoria'] = 'Espectáculos'
                         noticias.append(article_data)
-                        time.sleep(random.uniform(1, 2))  # Delay aleatorio
             
             logger.info(f"✅ Espectáculos: {len(noticias)} noticias extraídas")
             
@@ -581,7 +585,6 @@ class ScraperPopularSelenium:
                     if article_data:
                         article_data['categoria'] = 'Mundo'
                         noticias.append(article_data)
-                        time.sleep(random.uniform(1, 2))  # Delay aleatorio
             
             logger.info(f"✅ Mundo: {len(noticias)} noticias extraídas")
             
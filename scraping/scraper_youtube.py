@@ -28,6 +28,15 @@ except ImportError:
         YOUTUBE_CHANNELS = []
         logger.warning("youtube_channels.py no encontrado, usando lista vacía")
 
+try:
+    from http_cache import get_http_cache
+    from fetch_scheduler import get_fetch_scheduler
+except ImportError:
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from http_cache import get_http_cache
+    from fetch_scheduler import get_fetch_scheduler
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -59,6 +68,10 @@ class ScraperYouTube:
                 "Chrome/118.0.0.0 Safari/537.36"
             )
         })
+        # Caché de validadores: los feeds sin cambios responden 304 y no se re-parsean
+        self.http_cache = get_http_cache().staged()
+        self.feeds_not_modified = 0
+        self.fetch_scheduler = get_fetch_scheduler()
 
     def _build_channel_lookup(self, sources: List[Dict]) -> Dict[str, Dict]:
         """Crear un índice para resolver canales por ID, handle o variantes."""
@@ -121,6 +134,8 @@ class ScraperYouTube:
             logger.warning("⚠️ Usando modo mock forzado para YouTube (YOUTUBE_FORCE_MOCK=true)")
             return self._generate_mock_batch()
 
+        self.feeds_not_modified = 0
+
         # PRIORIDAD: Intentar obtener videos reales primero
         try:
             logger.info("🚀 Intentando obtener videos REALES de YouTube desde feeds RSS...")
@@ -140,6 +155,10 @@ class ScraperYouTube:
                     return valid_videos
                 else:
                     logger.error("❌ No se encontraron videos válidos con enlaces reales")
+            elif self.feeds_not_modified:
+                # Los feeds no cambiaron: no hay videos nuevos, no es un error
+                logger.info(f"⏭️ {self.feeds_not_modified} feeds de YouTube sin cambios desde la última ejecución")
+                return []
             else:
                 logger.warning("⚠️ No se obtuvieron videos reales del feed RSS")
                 
@@ -250,9 +269,20 @@ class ScraperYouTube:
         logger.info(f"📡 Obteniendo feed RSS de {display_name} ({handle}) desde: {feed_url}")
         
         try:
-            response = self.http_session.get(feed_url, timeout=20)
+            self.fetch_scheduler.acquire(feed_url)
+            response = self.http_session.get(
+                feed_url,
+                timeout=20,
+                headers=self.http_cache.request_headers(feed_url)
+            )
+            self.fetch_scheduler.report_response(feed_url, response)
             response.raise_for_status()
             
+            if not self.http_cache.has_changed(feed_url, response):
+                logger.info(f"⏭️ Feed de {display_name} sin cambios desde la última ejecución")
+                self.feeds_not_modified += 1
+                return []
+            
             # Verificar si el feed está vacío o es inválido
             if not response.content or len(response.content) < 100:
                 logger.warning(f"⚠️ Feed vacío o inválido para {display_name}")
@@ -274,6 +304,7 @@ class ScraperYouTube:
             return []
         except Exception as e:
             logger.error(f"❌ Error inesperado al obtener feed de {display_name}: {e}")
+            self.http_cache.forget(feed_url)  # el feed se vuelve a procesar en la próxima ejecución
             import traceback
             logger.error(traceback.format_exc())
             return []
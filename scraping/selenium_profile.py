@@ -0,0 +1,97 @@
+"""
+Perfil de Chrome "ligero" compartido por los scrapers Selenium de diarios.
+Solo necesitamos el DOM y las URLs de las imágenes, no los bytes: se bloquean imágenes,
+fuentes, publicidad y analítica, y la carga termina en DOMContentLoaded (estrategia eager).
+"""
+import logging
+import os
+
+try:
+    from selenium.webdriver.chrome.options import Options
+    SELENIUM_AVAILABLE = True
+except ImportError:
+    SELENIUM_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# Patrones para Network.setBlockedURLs (admite comodines *)
+BLOCKED_URL_PATTERNS = [
+    # Publicidad
+    '*doubleclick.net*',
+    '*googlesyndication.com*',
+    '*googleadservices.com*',
+    '*googletagservices.com*',
+    '*adservice.google.*',
+    '*amazon-adsystem.com*',
+    '*adnxs.com*',
+    '*criteo.com*',
+    '*criteo.net*',
+    '*pubmatic.com*',
+    '*rubiconproject.com*',
+    '*taboola.com*',
+    '*outbrain.com*',
+    '*teads.tv*',
+    # Analítica y tracking
+    '*google-analytics.com*',
+    '*googletagmanager.com*',
+    '*scorecardresearch.com*',
+    '*chartbeat.com*',
+    '*chartbeat.net*',
+    '*comscore.com*',
+    '*quantserve.com*',
+    '*hotjar.com*',
+    '*nr-data.net*',
+    '*newrelic.com*',
+    '*connect.facebook.net*',
+    '*platform.twitter.com*',
+    # Fuentes web y multimedia pesada
+    '*fonts.googleapis.com*',
+    '*fonts.gstatic.com*',
+    '*.woff', '*.woff2', '*.ttf', '*.otf',
+    '*.mp4', '*.webm', '*.m3u8'
+]
+
+
+def lean_profile_enabled() -> bool:
+    """El perfil ligero se puede desactivar con SELENIUM_LEAN_PROFILE=false (p. ej. para depurar)"""
+    return os.getenv('SELENIUM_LEAN_PROFILE', 'true').lower() == 'true'
+
+
+def build_chrome_options(user_agent: str = DEFAULT_USER_AGENT) -> 'Options':
+    """Opciones de Chrome headless comunes a todos los scrapers de diarios"""
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--window-size=1920,1080')
+    chrome_options.add_argument(f'--user-agent={user_agent}')
+
+    if lean_profile_enabled():
+        # No descargar imágenes: los atributos src/data-src siguen en el DOM
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.default_content_setting_values.notifications': 2
+        })
+        chrome_options.add_argument('--disable-extensions')
+        chrome_options.add_argument('--mute-audio')
+        # driver.get retorna en DOMContentLoaded, sin esperar subrecursos
+        chrome_options.page_load_strategy = 'eager'
+
+    return chrome_options
+
+
+def apply_network_blocklist(driver):
+    """Bloquea dominios de publicidad/analítica y fuentes vía Chrome DevTools Protocol"""
+    if not lean_profile_enabled():
+        return
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+        logger.debug(f"🚫 {len(BLOCKED_URL_PATTERNS)} patrones de URL bloqueados en Chrome")
+    except Exception as e:
+        # Drivers sin CDP (p. ej. remotos) siguen funcionando sin la lista de bloqueo
+        logger.warning(f"⚠️ No se pudo aplicar la lista de bloqueo de red: {e}")
@@ -0,0 +1,136 @@
+"""
+Frontera persistente de URLs ya ingeridas.
+Guarda en un SQLite local cada URL de artículo con su fecha de descarga para que
+los scrapers no vuelvan a abrir páginas que ya se procesaron en ejecuciones anteriores.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FRONTIER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'url_frontier.sqlite3')
+
+# Pasado este tiempo una URL se vuelve a descargar (por si el artículo fue actualizado)
+DEFAULT_REFRESH_TTL_HOURS = 168
+
+
+def normalize_article_url(url: str) -> str:
+    """Normaliza una URL de artículo (sin query, fragmento ni barra final)"""
+    if not url:
+        return ""
+    parsed = urlparse(url.strip())
+    scheme = 'https' if parsed.scheme in ('http', 'https') else parsed.scheme
+    return f"{scheme}://{parsed.netloc.lower()}{parsed.path}".rstrip('/')
+
+
+class UrlFrontier:
+    """Almacén clave-valor en disco: URL normalizada -> timestamp de la última descarga"""
+
+    def __init__(self, db_path: Optional[str] = None, refresh_ttl_hours: Optional[float] = None):
+        self.db_path = db_path or os.getenv('URL_FRONTIER_PATH', DEFAULT_FRONTIER_PATH)
+        if refresh_ttl_hours is None:
+            refresh_ttl_hours = float(os.getenv('URL_FRONTIER_TTL_HOURS', DEFAULT_REFRESH_TTL_HOURS))
+        self.refresh_ttl_seconds = refresh_ttl_hours * 3600
+        self.enabled = os.getenv('URL_FRONTIER_ENABLED', 'true').lower() == 'true'
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen_urls (
+                url TEXT PRIMARY KEY,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+        # Estadísticas de la ejecución actual
+        self.skipped = 0
+        self.recorded = 0
+
+    def should_fetch(self, url: str) -> bool:
+        """True si la URL nunca se descargó o su última descarga superó el TTL"""
+        if not self.enabled or not url:
+            return True
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at FROM seen_urls WHERE url = ?",
+                (normalize_article_url(url),)
+            ).fetchone()
+
+        if row and time.time() - row[0] < self.refresh_ttl_seconds:
+            self.skipped += 1
+            logger.debug(f"⏭️ URL ya ingerida, se omite: {url}")
+            return False
+        return True
+
+    def filter_new(self, urls: Iterable[str]) -> List[str]:
+        """Filtra una lista de URLs dejando solo las que hay que descargar"""
+        return [url for url in urls if self.should_fetch(url)]
+
+    def mark_fetched(self, url: str):
+        """Registra que la URL se descargó e ingirió correctamente"""
+        self.mark_fetched_many([url])
+
+    def mark_fetched_many(self, urls: Iterable[str]):
+        """
+        Registra en una sola transacción las URLs ya guardadas en la base de datos.
+        Se llama después del commit de la ingesta, no al extraer el artículo: si el guardado
+        se revierte, las URLs se vuelven a descargar en la próxima ejecución.
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        rows = list({normalize_article_url(url): now for url in urls if url}.items())
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO seen_urls (url, fetched_at) VALUES (?, ?)", rows)
+            self._conn.commit()
+        self.recorded += len(rows)
+
+    def forget(self, url: str):
+        """Elimina una URL para forzar su descarga en la próxima ejecución"""
+        with self._lock:
+            self._conn.execute("DELETE FROM seen_urls WHERE url = ?", (normalize_article_url(url),))
+            self._conn.commit()
+
+    def prune(self, older_than_hours: Optional[float] = None) -> int:
+        """Elimina entradas antiguas para que el archivo no crezca indefinidamente"""
+        max_age = (older_than_hours * 3600) if older_than_hours else self.refresh_ttl_seconds * 4
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM seen_urls WHERE fetched_at < ?",
+                (time.time() - max_age,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def log_stats(self, source: str = ""):
+        """Resume cuántas páginas de artículo se evitaron en la ejecución"""
+        prefix = f"{source}: " if source else ""
+        logger.info(f"📊 {prefix}frontera de URLs - {self.skipped} artículos omitidos, {self.recorded} nuevos registrados")
+
+    def reset_stats(self):
+        """Reinicia los contadores al inicio de una ejecución"""
+        self.skipped = 0
+        self.recorded = 0
+
+
+_default_frontier: Optional[UrlFrontier] = None
+
+
+def get_url_frontier() -> UrlFrontier:
+    """Retorna la frontera compartida por todos los scrapers del proceso"""
+    global _default_frontier
+    if _default_frontier is None:
+        _default_frontier = UrlFrontier()
+    return _default_frontier
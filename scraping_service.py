@@ -4,6 +4,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
 
 from scraping.main_scraper import MainScraper
+from url_frontier import get_url_frontier
 from backend.database import get_db
 from backend.models import Noticia, Diario
 # Importar modelos de UGC para que SQLAlchemy pueda resolver las relaciones
@@ -21,11 +22,15 @@ import logging
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def save_news_to_database(news_list):
-    """Guarda las noticias en la base de datos"""
+def save_news_to_database(news_list, main_scraper=None):
+    """
+    Guarda las noticias en la base de datos. Con `main_scraper`, los validadores HTTP de las
+    páginas scrapeadas se guardan tras el commit o se descartan si el guardado falla.
+    """
     db = next(get_db())
     try:
         saved_count = 0
+        ingested_urls = []
         for news_item in news_list:
             # Buscar el diario por nombre
             diario = db.query(Diario).filter(Diario.nombre == news_item['diario']).first()
@@ -41,6 +46,7 @@ def save_news_to_database(news_list):
             
             if existing:
                 logging.info(f"Noticia ya existe: {news_item['titulo']}")
+                ingested_urls.append(news_item.get('enlace'))
                 continue
             
             # Crear nueva noticia
@@ -57,14 +63,21 @@ def save_news_to_database(news_list):
             
             db.add(noticia)
             saved_count += 1
+            ingested_urls.append(news_item.get('enlace'))
         
         db.commit()
+        # Solo después del commit: si se revierte, las URLs se vuelven a descargar
+        get_url_frontier().mark_fetched_many(ingested_urls)
+        if main_scraper:
+            main_scraper.commit_validators()
         logging.info(f"Guardadas {saved_count} noticias en la base de datos")
         return saved_count
         
     except Exception as e:
         logging.error(f"Error guardando noticias: {e}")
         db.rollback()
+        if main_scraper:
+            main_scraper.discard_validators()
         return 0
     finally:
         db.close()
@@ -82,7 +95,7 @@ def main():
         return
     
     # Guardar en base de datos
-    saved_count = save_news_to_database(all_news)
+    saved_count = save_news_to_database(all_news, main_scraper)
     
     # Mostrar estadísticas
     stats = main_scraper.get_comparative_stats()